@@ -1,49 +1,87 @@
 """
-Initializes the Flask application, sets up extensions (DB, Login, CSRF),
-and registers all application blueprints for modular routing.
+Initializes the Flask application, sets up extensions (DB, Login, CSRF,
+Cache), and registers all application blueprints for modular routing.
+Blueprints, subsystems and the migration tooling are imported inside
+create_app so that importing the package stays cheap.
 """
 
+import os
+import click
 from flask import Flask
-from app.extensions import db, login_manager, csrf
-from app.auth.routes import auth
-from app.main.routes import main
-from app.project.routes import project
+from app.extensions import db, login_manager, csrf, cache
 
 # This function creates and configures the Flask app
-def create_app():
+def create_app(config_object=None):
+    from config import configs
+    from app import (database, instrumentation, search, counters, identity, jobs, realtime, bulk,
+                     passwords, ratelimit, deadlines, reports, history, tenancy)
+
     app = Flask(__name__)
     
-    # Load development configuration directly (no .env file used)
-    app.config.from_object('config.DevelopmentConfig')
+    # Load the config named by APP_ENV (development by default) unless one is given
+    if config_object is None:
+        config_object = configs[os.environ.get('APP_ENV', 'development')]
+    app.config.from_object(config_object)
 
     # Initialize app with extensions
     db.init_app(app)
+    database.init_app(app)
+    instrumentation.init_app(app)
     login_manager.init_app(app)
     csrf.init_app(app)
+    cache.init_app(app)
+    search.init_app(app)
+    counters.init_app(app)
+    identity.init_app(app)
+    tenancy.init_app(app)
+    jobs.init_app(app)
+    realtime.init_app(app)
+    bulk.init_app(app)
+    passwords.init_app(app)
+    ratelimit.init_app(app)
+    deadlines.init_app(app)
+    reports.init_app(app)
+    history.init_app(app)
 
     # Set login view for @login_required redirects
     login_manager.login_view = 'auth.login'
     login_manager.login_message_category = 'info'
 
-    # Import models so they get registered with SQLAlchemy
-    from app import models
+    # To retrieve user from session (served from the identity cache)
+    @login_manager.user_loader
+    def load_user(user_id):
+        return identity.load_user(int(user_id))
 
-    # Create all database tables
-    with app.app_context():
-        db.create_all()
+    # Migration tooling is only loaded when it can be used: when asked to
+    # migrate at startup, or when the app is loaded by the `flask` CLI
+    if app.config['AUTO_MIGRATE'] or click.get_current_context(silent=True) is not None:
+        from app import schema
+        schema.init_app(app)
+        if app.config['AUTO_MIGRATE']:
+            with app.app_context():
+                schema.upgrade_database(app)
 
-    # Register blueprints
-    app.register_blueprint(auth)
-    app.register_blueprint(main)
-    app.register_blueprint(project)
+    # CLI command to create or upgrade the database schema
+    @app.cli.command('init-db')
+    def init_db():
+        """Create the database or apply pending migrations."""
+        from app import schema
+        schema.upgrade_database(app)
+        click.echo('Database is up to date.')
 
-    return app
+    register_blueprints(app)
 
-# To retrieve user from session
-from app.models import User
+    return app
 
-@login_manager.user_loader
-def load_user(user_id):
-    return User.query.get(int(user_id))
 
+def register_blueprints(app):
+    # Imported here so that importing the package doesn't load every view
+    from app.auth.routes import auth
+    from app.main.routes import main
+    from app.project.routes import project
+    from app.api.routes import api
 
+    app.register_blueprint(auth)
+    app.register_blueprint(main)
+    app.register_blueprint(project)
+    app.register_blueprint(api)
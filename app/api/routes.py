@@ -0,0 +1,270 @@
+"""
+Versioned JSON API (/api/v1) for projects, tasks and members:
+- Sparse fieldsets (?fields=id,title) and cursor pagination (?cursor=, ?limit=)
+- ETag / Last-Modified from the rows' version and updated_at columns, so
+  If-None-Match and If-Modified-Since get a 304 before anything is serialized;
+  lists carry only the ETag, as no row's updated_at records a delete
+- List endpoints select plain columns and serialize the rows directly,
+  without building ORM objects
+- Task history and a project's tasks as they were at a given time
+- Everything is the logged-in user's tenant's (app/tenancy.py)
+"""
+
+import hashlib
+import json
+from collections import Counter
+from datetime import date, datetime, timezone
+from flask import Blueprint, current_app, request, url_for
+from flask_login import current_user
+from sqlalchemy import select
+from werkzeug.exceptions import HTTPException, BadRequest, NotFound
+from app import db
+from app import history
+from app.models import Project, Task, TaskEvent, User, project_members
+from app.pagination import keyset_paginate
+
+api = Blueprint('api', __name__, url_prefix='/api/v1')
+
+# Public fields per resource; `fields` picks among these
+PROJECT_FIELDS = {column.key: column for column in (
+    Project.id, Project.name, Project.description, Project.status, Project.deadline,
+    Project.manager_id, Project.updated_at, Project.version)}
+TASK_FIELDS = {column.key: column for column in (
+    Task.id, Task.title, Task.description, Task.status, Task.priority, Task.due_date,
+    Task.project_id, Task.assignee_id, Task.updated_at, Task.version)}
+MEMBER_FIELDS = {column.key: column for column in (User.id, User.username, User.role)}
+EVENT_FIELDS = {column.key: column for column in (
+    TaskEvent.id, TaskEvent.kind, TaskEvent.occurred_at, TaskEvent.project_id, TaskEvent.status,
+    TaskEvent.priority, TaskEvent.assignee_id, TaskEvent.due_date)}
+
+
+# Session login is required; API clients get 401 rather than the login page
+@api.before_request
+def require_login():
+    if not current_user.is_authenticated:
+        return _error(401, 'Authentication required')
+
+
+@api.errorhandler(HTTPException)
+def http_error(exc):
+    return _error(exc.code, exc.description)
+
+
+def _error(status, message):
+    return _json({'error': {'status': status, 'message': message}}, status=status)
+
+
+def _json(payload, status=200):
+    body = json.dumps(payload, separators=(',', ':'))
+    return current_app.response_class(body, status=status, mimetype='application/json')
+
+
+# ---- Request parsing ---
+
+def _fields(available):
+    """Columns named by ?fields= (all of them by default), in the order given."""
+    names = request.args.get('fields')
+    if not names:
+        return list(available.values())
+    requested = [name.strip() for name in names.split(',') if name.strip()]
+    unknown = [name for name in requested if name not in available]
+    if unknown:
+        raise BadRequest(f"Unknown field(s) {', '.join(unknown)}; choose from {', '.join(available)}")
+    return [available[name] for name in dict.fromkeys(requested)]
+
+
+def _limit():
+    limit = request.args.get('limit', current_app.config['API_PAGE_SIZE'], type=int)
+    return max(1, min(limit, current_app.config['API_MAX_PAGE_SIZE']))
+
+
+# ---- Serialization and conditional responses ---
+
+def _serializer(columns):
+    """Turn result rows into dicts of the columns, with ISO dates."""
+    names = [column.key for column in columns]
+    dates = {column.key for column in columns if issubclass(column.type.python_type, date)}
+
+    def serialize(row):
+        item = dict(zip(names, row))
+        for name in dates:
+            if item[name] is not None:
+                item[name] = item[name].isoformat()
+        return item
+    return serialize
+
+
+def _etag(*parts):
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:20]
+
+
+def _conditional(render, etag, last_modified=None):
+    """304 if the client has this version (If-None-Match wins over If-Modified-Since); else render()."""
+    if request.if_none_match:
+        current = request.if_none_match.contains_weak(etag)
+    elif request.if_modified_since and last_modified is not None:
+        current = last_modified.replace(microsecond=0) <= request.if_modified_since.replace(tzinfo=None)
+    else:
+        current = False
+    response = current_app.response_class(status=304) if current else _json(render())
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    # Private data: caches must revalidate with the validators above
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.vary.add('Cookie')
+    return response
+
+
+def _versions(model):
+    return [model.version.label('_version'), model.updated_at.label('_updated_at')]
+
+
+def _list(query, columns, versioned=True):
+    """One cursor page of `query` (ordered by id) as a conditional JSON response.
+
+    Versioned resources get their ETag from the page's (id, version) pairs,
+    others from the selected values. There is no Last-Modified: a deleted row
+    leaves the newest updated_at unchanged, so If-Modified-Since would answer
+    304 for a stale page.
+    """
+    model = query.column_descriptions[0]['entity']
+    extra = ([] if model.id in columns else [model.id]) + ([model.version.label('_version')] if versioned else [])
+    page = keyset_paginate(query.with_entities(*columns, *extra), model.id, model.id, _limit(),
+                           cursor=request.args.get('cursor'))
+    width = len(columns)
+
+    keys = [(row.id, row._version) for row in page] if versioned else [tuple(row) for row in page]
+    etag = _etag(request.full_path, keys, page.next_cursor)
+
+    def render():
+        serialize = _serializer(columns)
+        links = {}
+        if page.next_cursor:
+            args = dict(request.view_args, **request.args.to_dict())
+            args['cursor'] = page.next_cursor
+            links['next'] = url_for(request.endpoint, **args)
+        return {'data': [serialize(row[:width]) for row in page], 'next_cursor': page.next_cursor,
+                'links': links}
+    return _conditional(render, etag)
+
+
+def _one(model, available, resource_id):
+    columns = _fields(available)
+    row = db.session.execute(select(*columns, *_versions(model)).where(model.id == resource_id)).first()
+    if row is None:
+        raise NotFound(f'{model.__name__} {resource_id} not found')
+    etag = _etag(request.full_path, resource_id, row._version)
+    return _conditional(lambda: {'data': _serializer(columns)(row[:len(columns)])}, etag, row._updated_at)
+
+
+def _filtered(model, *names):
+    """The model's query with equality filters from the query string, e.g. ?status=Completed."""
+    query = model.query
+    for name in names:
+        if request.args.get(name):
+            column = getattr(model, name)
+            value = request.args.get(name, type=column.type.python_type)
+            if value is None:
+                raise BadRequest(f'Invalid value for {name}')
+            query = query.filter(column == value)
+    return query
+
+
+def _require(model, resource_id):
+    if db.session.execute(select(model.id).where(model.id == resource_id)).first() is None:
+        raise NotFound(f'{model.__name__} {resource_id} not found')
+
+
+# ---- Projects ---
+
+@api.route('/projects')
+def list_projects():
+    return _list(_filtered(Project, 'status'), _fields(PROJECT_FIELDS))
+
+
+@api.route('/projects/<int:project_id>')
+def get_project(project_id):
+    return _one(Project, PROJECT_FIELDS, project_id)
+
+
+@api.route('/projects/<int:project_id>/tasks')
+def list_project_tasks(project_id):
+    _require(Project, project_id)
+    query = _filtered(Task, 'status', 'assignee_id').filter(Task.project_id == project_id)
+    return _list(query, _fields(TASK_FIELDS))
+
+
+@api.route('/projects/<int:project_id>/members')
+def list_project_members(project_id):
+    _require(Project, project_id)
+    query = User.query.join(project_members, project_members.c.user_id == User.id).filter(
+        project_members.c.project_id == project_id)
+    return _list(query, _fields(MEMBER_FIELDS), versioned=False)
+
+
+@api.route('/projects/<int:project_id>/state')
+def get_project_state(project_id):
+    """The project's tasks as they were at ?at= (ISO 8601, default now), from the task history."""
+    # The event log isn't tenant-scoped; the project is
+    _require(Project, project_id)
+    at = request.args.get('at')
+    try:
+        when = datetime.fromisoformat(at) if at else datetime.now(timezone.utc)
+    except ValueError:
+        raise BadRequest('Invalid value for at; use ISO 8601, e.g. 2026-01-31T17:00:00Z')
+    if when.tzinfo is not None:
+        when = when.astimezone(timezone.utc).replace(tzinfo=None)
+    states = history.state_at(when, project_id)
+    serialize = _serializer([TaskEvent.task_id, *(getattr(TaskEvent, field) for field in history.STATE_FIELDS)])
+    data = [serialize((task_id, *state)) for task_id, state in sorted(states.items())]
+    counts = Counter(state.status for state in states.values())
+    return _json({'at': when.isoformat(), 'status_counts': dict(counts), 'data': data})
+
+
+# ---- Tasks ---
+
+@api.route('/tasks')
+def list_tasks():
+    query = _filtered(Task, 'status', 'assignee_id', 'project_id')
+    return _list(query, _fields(TASK_FIELDS))
+
+
+@api.route('/tasks/<int:task_id>')
+def get_task(task_id):
+    return _one(Task, TASK_FIELDS, task_id)
+
+
+@api.route('/tasks/<int:task_id>/history')
+def get_task_history(task_id):
+    """The task's events, time spent in each status between them and its current status."""
+    columns = _fields(EVENT_FIELDS)
+    extra = [TaskEvent.id, TaskEvent.kind, TaskEvent.status, TaskEvent.occurred_at, TaskEvent.project_id]
+    rows = db.session.execute(select(*columns, *extra).where(TaskEvent.task_id == task_id)
+                              .order_by(TaskEvent.id)).all()
+    # Tasks stay in their tenant, so their last project tells whose history this is
+    last = rows[-1][len(columns):] if rows else None
+    if last is None or db.session.execute(select(Project.id).where(Project.id == last[4])).first() is None:
+        raise NotFound(f'No history for task {task_id}')
+    # The log is append-only, so its newest event identifies the response. The
+    # current status's time keeps growing but stays out of the ETag: a client
+    # revalidating keeps its figure, and current.since lets it bring it up to date
+    etag = _etag(request.full_path, task_id, last[0])
+    deleted = last[1] == 'deleted'
+
+    def render():
+        serialize = _serializer(columns)
+        # A live task is still in its current status: count that up to now
+        spent = history.time_in_status([task_id], until=last[3] if deleted else None).get(task_id, {})
+        current = None if deleted else {'status': last[2], 'since': last[3].isoformat()}
+        return {'data': [serialize(row[:len(columns)]) for row in rows],
+                'time_in_status': {status: duration.total_seconds() for status, duration in spent.items() if duration},
+                'current': current}
+    return _conditional(render, etag)
+
+
+# ---- Members ---
+
+@api.route('/members')
+def list_members():
+    return _list(_filtered(User, 'role'), _fields(MEMBER_FIELDS), versioned=False)
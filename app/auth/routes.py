@@ -5,11 +5,11 @@ Handles authentication-related routes:
 - Registration for new users (restricted to Admin role)
 """
 
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+from flask import Blueprint, render_template, redirect, url_for, flash
 from flask_login import login_user, logout_user, login_required, current_user
 from app.forms import LoginForm, RegistrationForm
 from app.models import User
-from app import db, login_manager
+from app import db, passwords, ratelimit
 
 auth = Blueprint('auth', __name__)
 
@@ -18,12 +18,27 @@ auth = Blueprint('auth', __name__)
 def login():
     form = LoginForm()
     if form.validate_on_submit():
-        # Find user by username
+        # Throttle before any hashing, so refused attempts cost next to nothing
+        wait = ratelimit.check_login(form.username.data)
+        if wait:
+            flash(f'Too many login attempts. Try again in {wait} seconds.', 'danger')
+            return render_template('login.html', form=form), 429, {'Retry-After': str(wait)}
+        # Find user by username; unknown names are checked against a dummy hash
+        # so the response takes as long as for a real user
         user = User.query.filter_by(username=form.username.data).first()
-        if user and user.check_password(form.password.data):
+        try:
+            valid = passwords.verify_password(user.password_hash if user else None, form.password.data)
+        except passwords.HashPoolBusy:
+            flash('The server is busy. Please try again in a moment.', 'warning')
+            return render_template('login.html', form=form), 503, {'Retry-After': '1'}
+        if valid:
+            # Upgrade hashes made with older cost parameters while the password is at hand
+            if passwords.rehash_if_needed(user, form.password.data):
+                db.session.commit()
             login_user(user)
             flash('Logged in successfully!', 'success')
             return redirect(url_for('main.user_dashboard'))
+        ratelimit.login_failed(form.username.data)
         flash('Invalid username or password', 'danger')
     return render_template('login.html', form=form)
 
@@ -37,10 +52,11 @@ def register():
 
     form = RegistrationForm()
     if form.validate_on_submit():
-        if User.query.filter_by(username=form.username.data).first():
+        # Usernames are unique across tenants: logging in doesn't name one
+        if User.query.filter_by(username=form.username.data).execution_options(all_tenants=True).first():
             flash('Username already exists.', 'warning')
             return redirect(url_for('auth.register'))
-        # Create new user
+        # Create new user (in the admin's tenant)
         user = User(username=form.username.data, role=form.role.data)
         user.set_password(form.password.data)
         db.session.add(user)
@@ -0,0 +1,278 @@
+"""
+Bulk task operations for a project.
+Imported rows (CSV or JSON lines) are validated with TaskForm, the same
+rules as the task form on the project page, then inserted with batched
+executemany transactions. Exports stream rows straight from the cursor,
+so memory use stays flat however many tasks a project has. Bulk updates
+and project deletion run as background jobs, one chunk per transaction.
+"""
+
+import csv
+import io
+import json
+from collections import Counter
+import click
+from flask import current_app
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from werkzeug.datastructures import MultiDict
+from app.extensions import db, cache
+from app.forms import TaskForm
+from app.models import Project, Task
+from app import counters, deadlines, directory, history, jobs, realtime, search, tenancy
+
+BULK_UPDATE_FIELDS = {'status': ('To Do', 'In Progress', 'Completed'), 'priority': ('Low', 'Medium', 'High')}
+IMPORT_FIELDS = ('title', 'description', 'due_date', 'status', 'priority', 'assignee_id')
+EXPORT_FIELDS = ('id',) + IMPORT_FIELDS
+FORMATS = ('csv', 'ndjson')
+
+
+class ImportResult:
+    """Outcome of an import: rows inserted plus per-row validation errors."""
+
+    def __init__(self):
+        self.imported = 0
+        self.errors = []
+
+    def add_error(self, row, errors):
+        self.errors.append({'row': row, 'errors': errors})
+
+    def to_dict(self):
+        return {'imported': self.imported, 'failed': len(self.errors), 'errors': self.errors}
+
+
+def guess_format(filename, default='csv'):
+    """Pick the format from a file name's extension."""
+    name = (filename or '').lower()
+    if name.endswith(('.ndjson', '.jsonl', '.json')):
+        return 'ndjson'
+    return 'csv' if name.endswith('.csv') else default
+
+
+def read_rows(stream, fmt):
+    """
+    Yield one dict per record (or a ValueError for unreadable lines) from a text stream.
+    Undecodable bytes end the file with a ValueError: the text after them can't be trusted.
+    """
+    try:
+        yield from _csv_records(stream) if fmt == 'csv' else _json_records(stream)
+    except UnicodeDecodeError:
+        yield ValueError('File is not UTF-8 text')
+
+
+def _csv_records(stream):
+    reader = csv.DictReader(stream)
+    while True:
+        try:
+            record = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as exc:
+            yield ValueError(f'Invalid CSV: {exc}')
+            continue
+        yield record
+
+
+def _json_records(stream):
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            yield ValueError(f'Invalid JSON: {exc}')
+            continue
+        yield record if isinstance(record, dict) else ValueError('Each line must be a JSON object')
+
+
+def _validate(record, choices, member_ids):
+    # Strings in, exactly like a form post; omitted status/priority take the model defaults
+    data = {key: str(value) for key, value in record.items() if key in IMPORT_FIELDS and value not in (None, '')}
+    unknown_assignee = None
+    if 'assignee_id' not in data and record.get('assignee'):
+        assignee_id = member_ids.get(str(record['assignee']))
+        if assignee_id is None:
+            unknown_assignee = record['assignee']
+        else:
+            data['assignee_id'] = str(assignee_id)
+    data.setdefault('status', 'To Do')
+    data.setdefault('priority', 'Medium')
+
+    form = TaskForm(formdata=MultiDict(data), meta={'csrf': False})
+    form.assignee_id.choices = choices
+    errors = {} if form.validate() else {field: errors for field, errors in form.errors.items()}
+    if unknown_assignee is not None:
+        errors.pop('assignee_id', None)  # the choice error would only repeat this, less clearly
+        errors['assignee'] = [f"Unknown assignee '{unknown_assignee}'"]
+    if errors:
+        return None, errors
+    return {field: getattr(form, field).data or None for field in IMPORT_FIELDS}, None
+
+
+def _insert_batch(project_id, tenant_id, batch, result):
+    # Core executemany skips the ORM events, so stamp the tenant and keep the
+    # search index, counters and history in step here, in the same transaction
+    rows = [dict(values, project_id=project_id, tenant_id=tenant_id) for _, values in batch]
+    try:
+        # RETURNING the indexed and logged columns means row order doesn't
+        # matter, which lets every backend batch the insert
+        returned = [Task.id, Task.title, Task.description] + [getattr(Task, field) for field in history.STATE_FIELDS]
+        inserted = db.session.execute(insert(Task).returning(*returned), rows).all()
+        connection = db.session.connection()
+        search.index_documents(connection, 'task', [(row.id, row.title, row.description) for row in inserted])
+        history.record(connection, 'created', inserted)
+        counters.apply_deltas(connection, Counter((row['assignee_id'], row['status']) for row in rows))
+        deadlines.invalidate(connection, (row['assignee_id'] for row in rows))
+        db.session.commit()
+    except SQLAlchemyError as exc:
+        db.session.rollback()
+        for number, _ in batch:
+            result.add_error(number, {'row': [f'Database error: {exc.__class__.__name__}']})
+        return
+
+    result.imported += len(inserted)
+    assignee_ids = {row['assignee_id'] for row in rows} - {None}
+    for entity in {('projects',), ('project', project_id)} | {('user-tasks', user_id) for user_id in assignee_ids}:
+        cache.bump(*entity)
+    realtime.publish_refresh(f'project:{project_id}', *(f'user:{user_id}' for user_id in assignee_ids))
+
+
+def import_tasks(project_id, records, batch_size=500):
+    """Validate and insert task records into a project; returns an ImportResult."""
+    # The task form's rules: a project with members takes only them as assignees
+    choices = directory.project_assignees(project_id)
+    member_ids = {username: user_id for user_id, username in choices}
+    tenant_id = tenancy.project_tenant(project_id)
+
+    result = ImportResult()
+    batch = []
+    for number, record in enumerate(records, start=1):
+        if isinstance(record, Exception):
+            result.add_error(number, {'row': [str(record)]})
+            continue
+        values, errors = _validate(record, choices, member_ids)
+        if errors:
+            result.add_error(number, errors)
+            continue
+        batch.append((number, values))
+        if len(batch) >= batch_size:
+            _insert_batch(project_id, tenant_id, batch, result)
+            batch = []
+    if batch:
+        _insert_batch(project_id, tenant_id, batch, result)
+    return result
+
+
+def export_tasks(project_id, fmt, chunk_size=1000):
+    """Yield a project's tasks as CSV or NDJSON text chunks, fetching `chunk_size` rows at a time."""
+    query = (select(*(getattr(Task, field) for field in EXPORT_FIELDS))
+             .where(Task.project_id == project_id)
+             .order_by(Task.id)
+             .execution_options(yield_per=chunk_size))
+    rows = db.session.execute(query)
+
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_FIELDS)
+        for chunk in rows.partitions():
+            writer.writerows(chunk)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+    else:
+        for chunk in rows.partitions():
+            yield ''.join(json.dumps(dict(zip(EXPORT_FIELDS, row)), default=str) + '\n' for row in chunk)
+
+
+# ---- Background jobs (handlers must be safe to re-run) ---
+
+def _task_ids(project_id, where_status=None):
+    query = select(Task.id).where(Task.project_id == project_id).order_by(Task.id)
+    if where_status:
+        query = query.where(Task.status == where_status)
+    return list(db.session.execute(query).scalars())
+
+
+@jobs.handler('update-tasks')
+def update_tasks(project_id, changes, where_status=None):
+    """Apply `changes` to a project's tasks (optionally only those in one status), chunk by chunk."""
+    chunk_size = current_app.config['JOB_CHUNK_SIZE']
+    task_ids = _task_ids(project_id, where_status)
+    # ORM updates, so the counters, search index and cache versions follow along
+    for start in range(0, len(task_ids), chunk_size):
+        for task in Task.query.filter(Task.id.in_(task_ids[start:start + chunk_size])):
+            for field, value in changes.items():
+                setattr(task, field, value)
+        jobs.heartbeat()
+        db.session.commit()
+    return {'updated': len(task_ids)}
+
+
+@jobs.handler('delete-project')
+def delete_project(project_id):
+    """Delete a project's tasks in chunks, then the project itself."""
+    chunk_size = current_app.config['JOB_CHUNK_SIZE']
+    deleted = 0
+    while True:
+        rows = db.session.execute(
+            select(Task.id, Task.assignee_id, Task.status)
+            .where(Task.project_id == project_id).order_by(Task.id).limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+        # Core delete skips the ORM events, so unindex, uncount and log the deletes here
+        connection = db.session.connection()
+        task_ids = [row.id for row in rows]
+        db.session.execute(delete(Task).where(Task.id.in_(task_ids)))
+        search.remove_documents(connection, 'task', task_ids)
+        history.record_deleted(connection, project_id, task_ids)
+        deltas = Counter()
+        for row in rows:
+            deltas[(row.assignee_id, row.status)] -= 1
+        counters.apply_deltas(connection, deltas)
+        deadlines.invalidate(connection, (row.assignee_id for row in rows))
+        jobs.heartbeat()
+        db.session.commit()
+        deleted += len(rows)
+        assignee_ids = {row.assignee_id for row in rows if row.assignee_id is not None}
+        for assignee_id in assignee_ids:
+            cache.bump('user-tasks', assignee_id)
+        realtime.publish_refresh(f'project:{project_id}', *(f'user:{user_id}' for user_id in assignee_ids))
+
+    # The project row goes through the ORM: member links, index entry and cache versions
+    project = db.session.get(Project, project_id)
+    if project is not None:
+        db.session.delete(project)
+        db.session.commit()
+    return {'project_deleted': project is not None, 'tasks_deleted': deleted}
+
+
+def init_app(app):
+    # CLI commands for migrating tasks in and out without the web UI
+    @app.cli.command('import-tasks')
+    @click.argument('project_id', type=int)
+    @click.argument('source', type=click.File('r', encoding='utf-8'))
+    @click.option('--format', 'fmt', type=click.Choice(FORMATS), help='Defaults to the file extension.')
+    def import_tasks_command(project_id, source, fmt):
+        """Import tasks into a project from a CSV or JSON-lines file ('-' for stdin)."""
+        project = db.session.get(Project, project_id)
+        if project is None:
+            raise click.BadParameter(f'No project with id {project_id}.', param_hint='PROJECT_ID')
+        # Assignees are checked against the project's tenant's members
+        tenancy.use(project.tenant_id)
+        result = import_tasks(project_id, read_rows(source, fmt or guess_format(source.name)),
+                              app.config['BULK_IMPORT_BATCH_SIZE'])
+        for error in result.errors:
+            click.echo(f"row {error['row']}: {error['errors']}", err=True)
+        click.echo(f'Imported {result.imported} tasks, {len(result.errors)} rows rejected.')
+
+    @app.cli.command('export-tasks')
+    @click.argument('project_id', type=int)
+    @click.argument('target', type=click.File('w', encoding='utf-8'), default='-')
+    @click.option('--format', 'fmt', type=click.Choice(FORMATS), help='Defaults to the file extension.')
+    def export_tasks_command(project_id, target, fmt):
+        """Export a project's tasks as CSV or JSON lines (stdout by default)."""
+        for chunk in export_tasks(project_id, fmt or guess_format(target.name)):
+            target.write(chunk)
@@ -0,0 +1,308 @@
+"""
+Server-side cache for rendered pages and template fragments.
+Backends are pluggable: an in-process LRU with TTL for a single worker,
+or a shared directory for several workers. Entries are keyed by entity
+version tokens that are bumped after each commit touching a project, task
+or user, so invalidation is precise and never has to delete keys.
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from functools import wraps
+from flask import current_app, request, session
+from flask_login import current_user
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+
+# ---- Backends ---
+
+class NullCache:
+    """Backend that stores nothing (CACHE_BACKEND = 'null')."""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl=None):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+
+class MemoryCache:
+    """Thread-safe in-process LRU cache with per-entry TTL."""
+
+    def __init__(self, max_entries=1024, default_ttl=300):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires and expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        expires = time.monotonic() + ttl if ttl else 0
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class FileSystemCache:
+    """Cache shared between worker processes through files in one directory."""
+
+    def __init__(self, directory, max_entries=10000, default_ttl=300, prune_every=100):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.prune_every = prune_every
+        self._writes = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest())
+
+    def get(self, key):
+        try:
+            with open(self._path(key), 'rb') as f:
+                expires, value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if expires and expires < time.time():
+            self.delete(key)
+            return None
+        return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        expires = time.time() + ttl if ttl else 0
+        # Write to a temp file and rename so readers never see partial entries
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump((expires, value), f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self._path(key))
+
+        self._writes += 1
+        if self._writes % self.prune_every == 0:
+            self._prune()
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            os.remove(entry.path)
+
+    def _prune(self):
+        # Drop the least recently written files once over max_entries
+        files = sorted(os.scandir(self.directory), key=lambda e: e.stat().st_mtime)
+        for entry in files[:max(0, len(files) - self.max_entries)]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+
+# ---- Cache facade ---
+
+class Cache:
+    """Flask extension wrapping a backend with versioning, metrics and helpers."""
+
+    def __init__(self, app=None):
+        self.backend = NullCache()
+        self.hits = defaultdict(int)
+        self.misses = defaultdict(int)
+        self._stats_lock = threading.Lock()  # request threads count lookups concurrently
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('CACHE_BACKEND', 'memory')
+        app.config.setdefault('CACHE_DEFAULT_TTL', 300)
+        app.config.setdefault('CACHE_MAX_ENTRIES', 1024)
+        app.config.setdefault('CACHE_DIR', os.path.join(app.instance_path, 'cache'))
+
+        kind = app.config['CACHE_BACKEND']
+        if kind == 'memory':
+            self.backend = MemoryCache(app.config['CACHE_MAX_ENTRIES'], app.config['CACHE_DEFAULT_TTL'])
+        elif kind == 'filesystem':
+            self.backend = FileSystemCache(app.config['CACHE_DIR'], app.config['CACHE_MAX_ENTRIES'],
+                                           app.config['CACHE_DEFAULT_TTL'])
+        elif kind == 'null':
+            self.backend = NullCache()
+        else:
+            raise ValueError(f'Unknown CACHE_BACKEND {kind!r}')
+
+        app.extensions['cache'] = self
+        app.jinja_env.add_extension(FragmentCacheExtension)
+        app.jinja_env.globals['cache_version'] = self.version
+
+    # Lookups are counted per namespace (the key up to its first ':')
+    def get(self, key):
+        value = self.backend.get(key)
+        namespace = key.split(':', 1)[0]
+        with self._stats_lock:
+            if value is None:
+                self.misses[namespace] += 1
+            else:
+                self.hits[namespace] += 1
+        return value
+
+    def set(self, key, value, ttl=None):
+        self.backend.set(key, value, ttl)
+
+    def get_or_render(self, key, render, ttl=None):
+        value = self.get(key)
+        if value is None:
+            value = render()
+            self.set(key, value, ttl)
+        return value
+
+    def version(self, *entity):
+        """Return the current version token of an entity, e.g. ('project', 3)."""
+        key = 'version:' + ':'.join(map(str, entity))
+        token = self.backend.get(key)
+        if token is None:
+            token = self.bump(*entity)
+        return token
+
+    def bump(self, *entity):
+        """Give an entity a new version token, orphaning every entry keyed on it."""
+        token = uuid.uuid4().hex[:12]
+        # Versions outlive the entries keyed on them, so they never expire
+        self.backend.set('version:' + ':'.join(map(str, entity)), token, ttl=0)
+        return token
+
+    def stats(self):
+        with self._stats_lock:
+            namespaces = sorted(set(self.hits) | set(self.misses))
+            return {ns: {'hits': self.hits[ns], 'misses': self.misses[ns]} for ns in namespaces}
+
+
+class FragmentCacheExtension(Extension):
+    """
+    Adds {% cache 'name', key, ... %}...{% endcache %} to templates.
+    Include cache_version(...) of every entity the fragment shows in its key.
+    """
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        parts = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            parts.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        call = self.call_method('_render', [nodes.List(parts)])
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _render(self, parts, caller):
+        cache = current_app.extensions['cache']
+        key = 'fragment:' + ':'.join(map(str, parts))
+        return Markup(cache.get_or_render(key, lambda: str(caller())))
+
+
+def cached_response(*entities):
+    """
+    Cache a GET view's rendered HTML per user and full URL, keyed by the
+    version tokens of the given entities, e.g. @cached_response(('projects',)).
+    Requests with pending flash messages bypass the cache.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            cache = current_app.extensions['cache']
+            if request.method != 'GET' or session.get('_flashes'):
+                return view(*args, **kwargs)
+
+            versions = ':'.join(cache.version(*entity) for entity in entities)
+            user_id = current_user.get_id() if current_user.is_authenticated else 'anon'
+            key = f'response:{request.endpoint}:{user_id}:{versions}:{request.full_path}'
+            html = cache.get(key)
+            if html is None:
+                html = view(*args, **kwargs)
+                if not isinstance(html, str):
+                    return html  # redirects and other responses are not cached
+                cache.set(key, html)
+            return html
+        return wrapper
+    return decorator
+
+
+# ---- Invalidation ---
+
+def _touched_entities(session_):
+    """Entities whose cached views a flush affects, from User/Project/Task changes."""
+    from app.models import User, Project, Task
+    touched = set()
+    for obj in list(session_.new) + list(session_.dirty) + list(session_.deleted):
+        if isinstance(obj, User):
+            # The member directory only holds ids, usernames and roles
+            state = inspect(obj)
+            if obj not in session_.dirty or any(state.attrs[attr].history.has_changes() for attr in ('username', 'role')):
+                touched.add(('members',))
+        elif isinstance(obj, Project):
+            touched.update({('projects',), ('project', obj.id)})
+        elif isinstance(obj, Task):
+            state = inspect(obj)
+            touched.add(('projects',))  # list cards show task progress
+            for attr, entity in (('project_id', 'project'), ('assignee_id', 'user-tasks')):
+                for value in state.attrs[attr].history.sum():
+                    if value is not None:
+                        touched.add((entity, value))
+    return touched
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_touched(session_, flush_context):
+    # new/dirty/deleted still describe the flushed objects at this point
+    session_.info.setdefault('cache_touched', set()).update(_touched_entities(session_))
+
+
+@event.listens_for(Session, 'after_commit')
+def _bump_touched(session_):
+    touched = session_.info.pop('cache_touched', None)
+    cache = current_app.extensions.get('cache') if current_app else None
+    if touched and cache is not None:
+        for entity in touched:
+            cache.bump(*entity)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _forget_touched(session_, previous_transaction):
+    session_.info.pop('cache_touched', None)
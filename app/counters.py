@@ -0,0 +1,108 @@
+"""
+Maintains the per-user task counters in UserTaskCounter.
+Task insert/update/delete events adjust the affected (assignee, status)
+counts in the same transaction, so the dashboard reads its summary without
+scanning the user's tasks. `flask rebuild-counters` fixes any drift.
+"""
+
+import click
+from sqlalchemy import event, inspect, text
+from app.extensions import db
+from app.models import Task, UserTaskCounter
+
+TASK_STATUSES = ('To Do', 'In Progress', 'Completed')
+
+_BUMP = text(
+    "INSERT INTO user_task_counter (user_id, status, count) VALUES (:user_id, :status, :delta) "
+    "ON CONFLICT (user_id, status) DO UPDATE SET count = user_task_counter.count + excluded.count"
+)
+
+
+def apply_deltas(connection, deltas):
+    """Add {(user_id, status): delta} to the counters in one executemany."""
+    params = [{'user_id': user_id, 'status': status, 'delta': delta}
+              for (user_id, status), delta in deltas.items()
+              if user_id is not None and status is not None and delta]
+    if params:
+        connection.execute(_BUMP, params)
+
+
+def _bump(connection, user_id, status, delta):
+    apply_deltas(connection, {(user_id, status): delta})
+
+
+def _previous(state, attr):
+    # Value as of the last flush (the old value if it was changed since)
+    history = state.attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    return history.unchanged[0] if history.unchanged else state.attrs[attr].value
+
+
+# Load old values on assignment so updates know which counters to move
+@event.listens_for(Task.status, 'set', active_history=True)
+@event.listens_for(Task.assignee_id, 'set', active_history=True)
+def _track_previous(target, value, oldvalue, initiator):
+    return value
+
+
+@event.listens_for(Task, 'after_insert')
+def _count_new_task(mapper, connection, target):
+    _bump(connection, target.assignee_id, target.status, 1)
+
+
+@event.listens_for(Task, 'after_update')
+def _move_task_count(mapper, connection, target):
+    state = inspect(target)
+    old = (_previous(state, 'assignee_id'), _previous(state, 'status'))
+    new = (target.assignee_id, target.status)
+    if old != new:
+        _bump(connection, *old, -1)
+        _bump(connection, *new, 1)
+
+
+@event.listens_for(Task, 'after_delete')
+def _uncount_task(mapper, connection, target):
+    state = inspect(target)
+    _bump(connection, _previous(state, 'assignee_id'), _previous(state, 'status'), -1)
+
+
+def rebuild_counters(connection):
+    """Recompute every counter from the task table."""
+    connection.execute(text("DELETE FROM user_task_counter"))
+    connection.execute(text(
+        "INSERT INTO user_task_counter (user_id, status, count) "
+        "SELECT assignee_id, status, COUNT(*) FROM task "
+        "WHERE assignee_id IS NOT NULL AND status IS NOT NULL "
+        "GROUP BY assignee_id, status"
+    ))
+
+
+# Backfill from existing tasks once create_all has made the counter table
+@event.listens_for(UserTaskCounter.__table__, 'after_create')
+def _mark_new_table(target, connection, **kw):
+    connection.info['rebuild_task_counters'] = True
+
+
+@event.listens_for(db.metadata, 'after_create')
+def _fill_new_table(target, connection, **kw):
+    if connection.info.pop('rebuild_task_counters', False):
+        rebuild_counters(connection)
+
+
+def status_counts(user_id):
+    """Return {status: count} for a user, with every known status present."""
+    counts = dict.fromkeys(TASK_STATUSES, 0)
+    rows = db.session.query(UserTaskCounter.status, UserTaskCounter.count).filter_by(user_id=user_id)
+    counts.update(rows)
+    return counts
+
+
+def init_app(app):
+    # CLI command to recompute the counters from scratch
+    @app.cli.command('rebuild-counters')
+    def rebuild_counters_command():
+        """Rebuild the per-user task status counters."""
+        with db.engine.begin() as connection:
+            rebuild_counters(connection)
+        click.echo('Task counters rebuilt.')
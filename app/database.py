@@ -0,0 +1,23 @@
+"""
+Per-connection database tuning.
+Applies the SQLITE_PRAGMAS config to every new SQLite connection; server
+databases are tuned through SQLALCHEMY_ENGINE_OPTIONS instead.
+"""
+
+from sqlalchemy import event
+from app.extensions import db
+
+
+def init_app(app):
+    pragmas = app.config.get('SQLITE_PRAGMAS') or {}
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+        cursor.close()
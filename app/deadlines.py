@@ -0,0 +1,249 @@
+"""
+Due-soon and overdue work, per-user deadline summaries and daily digests.
+Everything is an indexed date range over open tasks: (assignee_id, due_date)
+for one user, (due_date, status) across users, the project list's deadline
+sort key for projects.
+deadline_summary holds each user's "overdue / due this week" counts: task
+writes drop the affected users' rows, reads fall back to the index until the
+periodic 'refresh-deadlines' job rebuilds them in one pass over due items.
+'send-digests' writes a digest per user with due work to the outbox.
+"""
+
+import os
+from datetime import date, timedelta
+from email.message import EmailMessage
+from itertools import groupby
+import click
+from flask import current_app
+from sqlalchemy import bindparam, case, delete, event, func, inspect, select, text
+from sqlalchemy.orm import Session
+from app.extensions import db
+from app.models import DeadlineSummary, Project, Task, User
+from app.pagination import nulls_last_key
+from app import jobs
+
+OPEN = Task.status != 'Completed'
+# Project ranges filter on the list's sort key (NULL deadlines fall outside every window)
+DEADLINE_KEY = nulls_last_key(Project.deadline, Project.NO_DEADLINE)
+
+_UPSERT = text(
+    "INSERT INTO deadline_summary (user_id, overdue, due_this_week, computed_on) "
+    "VALUES (:user_id, :overdue, :due_this_week, :computed_on) "
+    "ON CONFLICT (user_id) DO UPDATE SET overdue = excluded.overdue, "
+    "due_this_week = excluded.due_this_week, computed_on = excluded.computed_on"
+).bindparams(bindparam('computed_on', type_=db.Date))
+
+
+def _horizon(today):
+    # "Due this week": today and the next DEADLINE_DUE_SOON_DAYS days
+    return today + timedelta(days=current_app.config['DEADLINE_DUE_SOON_DAYS'])
+
+
+# ---- Range queries ---
+
+def project_window(name, today=None):
+    """(start, end) dates, end exclusive and either one open, for a view_projects deadline filter."""
+    today = today or date.today()
+    if name == 'this_week':
+        start = today - timedelta(days=today.weekday())
+        return start, start + timedelta(days=7)
+    if name == 'this_month':
+        start = today.replace(day=1)
+        return start, (start + timedelta(days=32)).replace(day=1)
+    if name == '1_year':
+        return None, today + timedelta(days=366)
+    if name == 'overdue':
+        return None, today
+    return None
+
+
+def filter_projects(query, name, today=None):
+    """Apply a deadline filter by name to a Project query (unknown names are ignored)."""
+    window = project_window(name, today)
+    if window is None:
+        return query
+    start, end = window
+    if start is not None:
+        query = query.filter(DEADLINE_KEY >= start)
+    query = query.filter(DEADLINE_KEY < end)
+    if name == 'overdue':
+        query = query.filter(Project.status != 'Completed')
+    return query
+
+
+def upcoming_tasks(user_id, today=None):
+    """A user's open tasks due from today to the due-soon horizon, soonest first."""
+    today = today or date.today()
+    return (Task.query
+            .filter(Task.assignee_id == user_id, Task.due_date >= today, Task.due_date <= _horizon(today), OPEN)
+            .options(*Task.loading(project='joined'))
+            .order_by(Task.due_date, Task.id)
+            .all())
+
+
+def overdue_tasks(user_id, limit, today=None):
+    """A user's open tasks past their due date, most overdue first."""
+    today = today or date.today()
+    return (Task.query
+            .filter(Task.assignee_id == user_id, Task.due_date < today, OPEN)
+            .options(*Task.loading(project='joined'))
+            .order_by(Task.due_date, Task.id)
+            .limit(limit)
+            .all())
+
+
+# ---- Summaries ---
+
+def _counts(today):
+    """Per-assignee overdue and due-soon counts over the due items only."""
+    return (select(Task.assignee_id,
+                   func.sum(case((Task.due_date < today, 1), else_=0)).label('overdue'),
+                   func.sum(case((Task.due_date >= today, 1), else_=0)).label('due_this_week'))
+            .where(Task.assignee_id.isnot(None), Task.due_date <= _horizon(today), OPEN)
+            .group_by(Task.assignee_id))
+
+
+def summary_for(user_id, today=None):
+    """{'overdue': n, 'due_this_week': m} for a user: today's precomputed row, else from the index."""
+    today = today or date.today()
+    row = db.session.execute(
+        select(DeadlineSummary.overdue, DeadlineSummary.due_this_week)
+        .where(DeadlineSummary.user_id == user_id, DeadlineSummary.computed_on == today)
+    ).first() or db.session.execute(_counts(today).where(Task.assignee_id == user_id)).first()
+    return {'overdue': row.overdue if row else 0, 'due_this_week': row.due_this_week if row else 0}
+
+
+def invalidate(connection, user_ids):
+    """Drop the users' summaries, for writes that change their tasks' deadlines or status."""
+    user_ids = set(user_ids) - {None}
+    if user_ids:
+        connection.execute(delete(DeadlineSummary).where(DeadlineSummary.user_id.in_(user_ids)))
+
+
+@event.listens_for(Session, 'after_flush')
+def _invalidate_touched(session_, flush_context):
+    user_ids = set()
+    for objects, changed_only in ((session_.new, False), (session_.dirty, True), (session_.deleted, False)):
+        for task in objects:
+            if not isinstance(task, Task):
+                continue
+            state = inspect(task)
+            if changed_only and not any(state.attrs[attr].history.has_changes()
+                                        for attr in ('due_date', 'status', 'assignee_id')):
+                continue
+            user_ids.update(state.attrs.assignee_id.history.sum() or [task.assignee_id])
+    if user_ids:
+        invalidate(session_.connection(), user_ids)
+
+
+@jobs.handler('refresh-deadlines')
+def refresh_summaries():
+    """Rebuild today's summaries in one grouped scan of the due items."""
+    today = date.today()
+    rows = db.session.execute(_counts(today)).all()
+    chunk_size = current_app.config['JOB_CHUNK_SIZE']
+    for start in range(0, len(rows), chunk_size):
+        db.session.execute(_UPSERT, [
+            {'user_id': row.assignee_id, 'overdue': row.overdue, 'due_this_week': row.due_this_week,
+             'computed_on': today}
+            for row in rows[start:start + chunk_size]
+        ])
+        jobs.heartbeat()
+        db.session.commit()
+    # Users with nothing due any more
+    db.session.execute(delete(DeadlineSummary).where(DeadlineSummary.computed_on < today))
+    db.session.commit()
+    return {'users': len(rows)}
+
+
+# ---- Digests ---
+
+class FileOutbox:
+    """Mail sink writing one .eml file per message; a retried job overwrites its own files."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def send(self, name, message):
+        path = os.path.join(self.directory, f'{name}.eml')
+        with open(path, 'wb') as f:
+            f.write(bytes(message))
+        return path
+
+
+def _digest(user, items, today):
+    overdue = [item for item in items if item.due_date < today]
+    due_soon = [item for item in items if item.due_date >= today]
+    message = EmailMessage()
+    message['From'] = current_app.config['DIGEST_SENDER']
+    message['To'] = user.email
+    message['Subject'] = f'Your tasks: {len(overdue)} overdue, {len(due_soon)} due this week'
+    lines = [f'Hi {user.username},', '']
+    for heading, group in (('Overdue', overdue), ('Due this week', due_soon)):
+        if group:
+            lines.append(f'{heading}:')
+            lines += [f'  - {item.due_date:%b %d}  {item.title} ({item.project_name}, {item.status})' for item in group]
+            lines.append('')
+    message.set_content('\n'.join(lines))
+    return message
+
+
+@jobs.handler('send-digests')
+def send_digests(day=None):
+    """Write a digest for every user with open tasks overdue or due this week.
+
+    Users with due items are taken a chunk at a time, in assignee order, and
+    each chunk's items are read, written and committed before the next, so
+    no transaction (or write lock) spans the run and heartbeats are seen by
+    other workers as they happen.
+    """
+    today = date.fromisoformat(day) if day else date.today()
+    outbox = FileOutbox(current_app.config['DIGEST_OUTBOX'])
+    chunk_size = current_app.config['JOB_CHUNK_SIZE']
+    due = (Task.assignee_id.isnot(None), Task.due_date <= _horizon(today), OPEN)
+    query = (select(Task.assignee_id, Task.title, Task.due_date, Task.status, Project.name.label('project_name'))
+             .join(Project, Project.id == Task.project_id)
+             .where(*due)
+             .order_by(Task.assignee_id, Task.due_date, Task.id))
+    result = {'digests': 0, 'tasks': 0, 'skipped': 0}
+
+    last_user_id = 0
+    while True:
+        user_ids = list(db.session.execute(
+            select(Task.assignee_id).where(*due, Task.assignee_id > last_user_id).distinct()
+            .order_by(Task.assignee_id).limit(chunk_size)).scalars())
+        if not user_ids:
+            break
+        users = {user.id: user for user in db.session.execute(
+            select(User.id, User.username, User.email).where(User.id.in_(user_ids)))}
+        rows = db.session.execute(query.where(Task.assignee_id.in_(user_ids)))
+        for user_id, items in groupby(rows, key=lambda row: row.assignee_id):
+            user = users.get(user_id)
+            if user is None or not user.email:
+                result['skipped'] += 1
+                continue
+            items = list(items)
+            outbox.send(f'digest-{today}-user{user_id}', _digest(user, items, today))
+            result['digests'] += 1
+            result['tasks'] += len(items)
+        jobs.heartbeat()
+        db.session.commit()
+        last_user_id = user_ids[-1]
+    return result
+
+
+jobs.schedule('refresh-deadlines', 'DEADLINE_REFRESH_INTERVAL')
+jobs.schedule('send-digests', 'DIGEST_INTERVAL')
+
+
+def init_app(app):
+    app.config.setdefault('DIGEST_OUTBOX', os.path.join(app.instance_path, 'outbox'))
+
+    @app.cli.command('send-digests')
+    @click.option('--day', help='Date to write digests for (YYYY-MM-DD, default today).')
+    def send_digests_command(day):
+        """Write deadline digests to the outbox now."""
+        result = send_digests(day)
+        click.echo(f"Wrote {result['digests']} digests covering {result['tasks']} tasks "
+                   f"({result['skipped']} users without an email address) to {app.config['DIGEST_OUTBOX']}.")
@@ -0,0 +1,66 @@
+"""
+Member directory: the (id, username) pairs of the tenant's users with the
+'member' role, which feed every assignee choice list. Read with a
+column-projected query and kept in the page cache per tenant under the
+'members' version token, which is bumped after any commit that adds,
+removes, renames or re-roles a user.
+"""
+
+from flask import current_app
+from app.extensions import db, cache
+from app.models import User, project_members
+from app import tenancy
+
+
+def members():
+    """All of the tenant's members as (id, username) pairs, ordered by username."""
+    key = f"directory:members:{tenancy.current()}:{cache.version('members')}"
+    directory = cache.get(key)
+    if directory is None:
+        directory = [tuple(row) for row in
+                     db.session.query(User.id, User.username).filter_by(role='member').order_by(User.username)]
+        cache.set(key, directory)
+    return directory
+
+
+def search_members(term, limit=20):
+    """Members whose username starts with (or, failing that, contains) `term`, case-insensitively."""
+    term = term.strip().lower()
+    if not term:
+        return []
+    directory = members()
+    matches = [member for member in directory if member[1].lower().startswith(term)][:limit]
+    if len(matches) < limit:
+        seen = set(matches)
+        matches += [member for member in directory if term in member[1].lower() and member not in seen]
+    return matches[:limit]
+
+
+def _project_members(project_id):
+    return [tuple(row) for row in
+            db.session.query(User.id, User.username)
+            .join(project_members, project_members.c.user_id == User.id)
+            .filter(project_members.c.project_id == project_id)
+            .order_by(User.username)]
+
+
+def project_assignees(project_id):
+    """Everyone a project's tasks may be assigned to: its members if it has any, else the whole directory."""
+    return _project_members(project_id) or members()
+
+
+def assignee_choices(project_id, selected=None):
+    """
+    Choices for a project's task assignee field, and whether the page should
+    use the typeahead instead of a full <select>. Projects with members offer
+    only those; otherwise the whole directory, unless it is larger than
+    MEMBER_SELECT_LIMIT, in which case only the selected member is embedded.
+    """
+    scoped = _project_members(project_id)
+    if scoped:
+        return scoped, False
+
+    directory = members()
+    if len(directory) <= current_app.config['MEMBER_SELECT_LIMIT']:
+        return directory, False
+    return [member for member in directory if member[0] == selected], True
@@ -1,8 +1,10 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_wtf.csrf import CSRFProtect
+from app.cache import Cache
 
 # Centralized extension instances
 db = SQLAlchemy()
 login_manager = LoginManager()
 csrf = CSRFProtect()
+cache = Cache()
@@ -10,7 +10,7 @@ from wtforms.validators import DataRequired, EqualTo, Length, Optional
 
 # Login form for existing users
 class LoginForm(FlaskForm):
-    username = StringField('Username', validators=[DataRequired()])
+    username = StringField('Username', validators=[DataRequired(), Length(max=64)])
     password = PasswordField('Password', validators=[DataRequired()])
     submit = SubmitField('Login')
 
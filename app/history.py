@@ -0,0 +1,274 @@
+"""
+Append-only task history, for cycle times and point-in-time views.
+Every task insert and delete, and every change of a task's status, priority,
+assignee, due date or project, appends a task_event row with the task's state
+after it. A flush writes all of its events with one executemany in the same
+transaction; Core bulk writes call record() and record_deleted() themselves.
+As each event is a full state, a task's state at time T is its last event up
+to T. The periodic 'snapshot-tasks' job stores that state for every task, so
+point-in-time queries read the nearest earlier snapshot plus the events after
+it instead of replaying the log.
+"""
+
+from collections import Counter, defaultdict, namedtuple
+from datetime import datetime, timedelta, timezone
+from itertools import groupby
+from operator import attrgetter
+import click
+from flask import current_app
+from sqlalchemy import delete, event, exists, func, insert, inspect, literal, select, update
+from sqlalchemy.orm import Session
+from app.extensions import db
+from app.models import Task, TaskEvent, TaskSnapshot, TaskSnapshotRow
+from app import jobs
+
+# Changes to these columns are history; titles and descriptions are not
+TRACKED = ('status', 'priority', 'assignee_id', 'due_date', 'project_id')
+STATE_FIELDS = ('project_id', 'status', 'priority', 'assignee_id', 'due_date')
+TaskState = namedtuple('TaskState', STATE_FIELDS)
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _chunks(values, size=500):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+# ---- Recording ---
+
+def _event(task, kind, occurred_at, project_id=None):
+    values = {field: getattr(task, field) for field in STATE_FIELDS}
+    if project_id is not None:
+        values['project_id'] = project_id
+    return dict(values, task_id=task.id, kind=kind, occurred_at=occurred_at)
+
+
+def record(connection, kind, tasks):
+    """Append a `kind` event for each task (ORM objects or rows with id and the state fields)."""
+    now = _utcnow()
+    events = [_event(task, kind, now) for task in tasks]
+    if events:
+        connection.execute(insert(TaskEvent), events)
+
+
+def record_deleted(connection, project_id, task_ids):
+    now = _utcnow()
+    events = [{'task_id': task_id, 'project_id': project_id, 'kind': 'deleted', 'occurred_at': now,
+               'status': None, 'priority': None, 'assignee_id': None, 'due_date': None}
+              for task_id in task_ids]
+    if events:
+        connection.execute(insert(TaskEvent), events)
+
+
+@event.listens_for(Session, 'after_flush')
+def _record_flushed(session_, flush_context):
+    now = _utcnow()
+    events = []
+    for task in session_.new:
+        if isinstance(task, Task):
+            events.append(_event(task, 'created', now))
+    for task in session_.dirty:
+        if not isinstance(task, Task):
+            continue
+        state = inspect(task)
+        if not any(state.attrs[attr].history.has_changes() for attr in TRACKED):
+            continue
+        moved_from = state.attrs.project_id.history.deleted
+        if moved_from and moved_from[0] != task.project_id:
+            # Leaves one project's history and joins the other's
+            events.append(_event(task, 'deleted', now, project_id=moved_from[0]))
+            events.append(_event(task, 'created', now))
+        else:
+            events.append(_event(task, 'updated', now))
+    for task in session_.deleted:
+        if isinstance(task, Task):
+            events.append(_event(task, 'deleted', now))
+    if events:
+        session_.connection().execute(insert(TaskEvent), events)
+
+
+def backfill(connection):
+    """Give every task without history a 'created' event at its last change (for data loaded around the ORM)."""
+    columns = ('task_id', 'project_id', 'kind', 'status', 'priority', 'assignee_id', 'due_date', 'occurred_at')
+    rows = (select(Task.id, Task.project_id, literal('created'), Task.status, Task.priority, Task.assignee_id,
+                   Task.due_date, Task.updated_at)
+            .where(~exists().where(TaskEvent.task_id == Task.id))
+            .order_by(Task.updated_at, Task.id))
+    return connection.execute(insert(TaskEvent).from_select(columns, rows)).rowcount
+
+
+# ---- Snapshots ---
+
+@jobs.handler('snapshot-tasks')
+def take_snapshot(at=None):
+    """Store every live task's state as of `at` (default: TASK_SNAPSHOT_LAG seconds ago).
+
+    Built from the previous snapshot plus the events since, in SQL. Events
+    newer than the lag are left for the next snapshot, so that transactions
+    still in flight when this one reads the log are not skipped over.
+    """
+    cutoff = datetime.fromisoformat(at) if isinstance(at, str) else at
+    cutoff = cutoff or _utcnow() - timedelta(seconds=current_app.config['TASK_SNAPSHOT_LAG'])
+    previous = db.session.execute(select(TaskSnapshot).order_by(TaskSnapshot.id.desc()).limit(1)).scalar()
+    if previous is not None and previous.taken_at > cutoff:
+        raise ValueError(f'A snapshot at {previous.taken_at} is newer than {cutoff}')
+    after = previous.last_event_id if previous is not None else 0
+    upto = db.session.execute(
+        select(TaskEvent.id).where(TaskEvent.occurred_at <= cutoff).order_by(TaskEvent.id.desc()).limit(1)
+    ).scalar()
+    if upto is None or upto <= after:
+        return {'snapshot': None, 'events': 0}
+
+    snapshot = TaskSnapshot(taken_at=cutoff, last_event_id=upto, tasks=0)
+    db.session.add(snapshot)
+    db.session.flush()
+    columns = ('snapshot_id', 'task_id') + STATE_FIELDS
+    changed = (select(func.max(TaskEvent.id)).where(TaskEvent.id > after, TaskEvent.id <= upto)
+               .group_by(TaskEvent.task_id))
+    if previous is not None:
+        # Tasks without events since the previous snapshot keep their state
+        unchanged = ~exists().where(TaskEvent.task_id == TaskSnapshotRow.task_id,
+                                    TaskEvent.id > after, TaskEvent.id <= upto)
+        db.session.execute(insert(TaskSnapshotRow).from_select(columns, select(
+            literal(snapshot.id), TaskSnapshotRow.task_id, *(getattr(TaskSnapshotRow, field) for field in STATE_FIELDS)
+        ).where(TaskSnapshotRow.snapshot_id == previous.id, unchanged)))
+    db.session.execute(insert(TaskSnapshotRow).from_select(columns, select(
+        literal(snapshot.id), TaskEvent.task_id, *(getattr(TaskEvent, field) for field in STATE_FIELDS)
+    ).where(TaskEvent.id.in_(changed), TaskEvent.kind != 'deleted')))
+    tasks = db.session.execute(
+        select(func.count()).where(TaskSnapshotRow.snapshot_id == snapshot.id)).scalar()
+    db.session.execute(update(TaskSnapshot).where(TaskSnapshot.id == snapshot.id).values(tasks=tasks))
+    jobs.heartbeat()
+
+    # Older snapshots only speed up queries about older times; keep the newest few
+    expired = list(db.session.execute(
+        select(TaskSnapshot.id).order_by(TaskSnapshot.id.desc()).offset(current_app.config['TASK_SNAPSHOT_KEEP'])
+    ).scalars())
+    if expired:
+        db.session.execute(delete(TaskSnapshotRow).where(TaskSnapshotRow.snapshot_id.in_(expired)))
+        db.session.execute(delete(TaskSnapshot).where(TaskSnapshot.id.in_(expired)))
+    db.session.commit()
+    return {'snapshot': snapshot.id, 'events': upto - after, 'tasks': tasks, 'pruned': len(expired)}
+
+
+jobs.schedule('snapshot-tasks', 'TASK_SNAPSHOT_INTERVAL')
+
+
+# ---- Queries ---
+
+def _apply(states, row):
+    """Apply one event to {task_id: TaskState}; returns the task's (before, after) states."""
+    before = states.get(row.task_id)
+    if row.kind == 'deleted':
+        states.pop(row.task_id, None)
+        return before, None
+    states[row.task_id] = TaskState(*(getattr(row, field) for field in STATE_FIELDS))
+    return before, states[row.task_id]
+
+
+def _start(when, project_id):
+    """States from the newest snapshot taken by `when`, and the id of the last event it includes."""
+    snapshot = db.session.execute(
+        select(TaskSnapshot.id, TaskSnapshot.last_event_id).where(TaskSnapshot.taken_at <= when)
+        .order_by(TaskSnapshot.taken_at.desc()).limit(1)
+    ).first()
+    if snapshot is None:
+        return {}, 0
+    rows = select(TaskSnapshotRow.task_id, *(getattr(TaskSnapshotRow, field) for field in STATE_FIELDS)).where(
+        TaskSnapshotRow.snapshot_id == snapshot.id)
+    if project_id is not None:
+        rows = rows.where(TaskSnapshotRow.project_id == project_id)
+    return {row.task_id: TaskState(*row[1:]) for row in db.session.execute(rows)}, snapshot.last_event_id
+
+
+def _events(after, until, project_id, since=None):
+    query = select(TaskEvent.task_id, TaskEvent.kind, TaskEvent.occurred_at,
+                   *(getattr(TaskEvent, field) for field in STATE_FIELDS))
+    query = query.where(TaskEvent.id > after, TaskEvent.occurred_at <= until)
+    if since is not None:
+        query = query.where(TaskEvent.occurred_at > since)
+    if project_id is not None:
+        query = query.where(TaskEvent.project_id == project_id)
+    return db.session.execute(query.order_by(TaskEvent.id))
+
+
+def state_at(when, project_id=None):
+    """{task_id: TaskState} of a project's tasks (or all tasks) as they were at `when` (naive UTC)."""
+    states, after = _start(when, project_id)
+    for row in _events(after, when, project_id):
+        _apply(states, row)
+    return states
+
+
+def status_counts_at(when, project_id=None):
+    """{status: task count} of a project (or all tasks) at `when`."""
+    return dict(Counter(state.status for state in state_at(when, project_id).values()))
+
+
+def status_series(times, project_id=None):
+    """{status: count} at each of `times`, e.g. daily points of a burndown, in one pass over the events."""
+    times = sorted(times)
+    if not times:
+        return []
+    states, after = _start(times[0], project_id)
+    for row in _events(after, times[0], project_id):
+        _apply(states, row)
+    counts = Counter(state.status for state in states.values())
+    series = [dict(counts)]
+    for row in _events(after, times[-1], project_id, since=times[0]):
+        while row.occurred_at > times[len(series)]:
+            series.append(dict(+counts))
+        before, now = _apply(states, row)
+        if before is not None:
+            counts[before.status] -= 1
+        if now is not None:
+            counts[now.status] += 1
+    series += [dict(+counts)] * (len(times) - len(series))
+    return series
+
+
+def time_in_status(task_ids, until=None):
+    """{task_id: {status: timedelta}} each task spent in each status, up to `until` (default now) or its deletion."""
+    until = until or _utcnow()
+    durations = defaultdict(lambda: defaultdict(timedelta))
+    for chunk in _chunks(task_ids):
+        rows = db.session.execute(
+            select(TaskEvent.task_id, TaskEvent.kind, TaskEvent.status, TaskEvent.occurred_at)
+            .where(TaskEvent.task_id.in_(chunk), TaskEvent.occurred_at <= until)
+            .order_by(TaskEvent.task_id, TaskEvent.id))
+        for task_id, events in groupby(rows, key=attrgetter('task_id')):
+            status = since = None
+            for row in events:
+                if status is not None:
+                    durations[task_id][status] += row.occurred_at - since
+                status, since = (None if row.kind == 'deleted' else row.status), row.occurred_at
+            if status is not None:
+                durations[task_id][status] += until - since
+    return {task_id: dict(spent) for task_id, spent in durations.items()}
+
+
+def project_time_in_status(project_id, until=None):
+    """{status: {'tasks': n, 'total': timedelta, 'average': timedelta}} over a project's tasks' histories."""
+    task_ids = db.session.execute(
+        select(TaskEvent.task_id).where(TaskEvent.project_id == project_id).distinct()).scalars()
+    totals = defaultdict(lambda: {'tasks': 0, 'total': timedelta()})
+    for spent in time_in_status(task_ids, until).values():
+        for status, duration in spent.items():
+            totals[status]['tasks'] += 1
+            totals[status]['total'] += duration
+    return {status: dict(figures, average=figures['total'] / figures['tasks']) for status, figures in totals.items()}
+
+
+def init_app(app):
+    @app.cli.command('snapshot-tasks')
+    def snapshot_tasks_command():
+        """Snapshot every task's state, for faster point-in-time queries."""
+        result = take_snapshot()
+        if result['snapshot'] is None:
+            click.echo('No new task events since the last snapshot.')
+        else:
+            click.echo(f"Snapshot {result['snapshot']}: {result['tasks']} tasks, {result['events']} new events.")
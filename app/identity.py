@@ -0,0 +1,74 @@
+"""
+Identity cache for Flask-Login's user loader.
+Keeps lightweight, immutable snapshots (id, username, role, tenant) of
+recently seen users in a bounded in-process LRU with TTL, so authenticated
+requests don't each run a User primary-key lookup. Any committed change to
+a User row drops its snapshot in this process; other workers pick it up
+within the TTL.
+"""
+
+from collections import namedtuple
+from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from app.cache import MemoryCache, NullCache
+from app.extensions import db
+from app.models import User
+
+
+# What current_user is on requests that didn't just log in.
+# Views that modify the user must load the User row itself.
+class UserSnapshot(UserMixin, namedtuple('UserSnapshot', ['id', 'username', 'role', 'tenant_id'])):
+    __slots__ = ()
+
+    def __repr__(self):
+        return f'<UserSnapshot {self.username} ({self.role})>'
+
+
+_snapshots = NullCache()
+
+
+def load_user(user_id):
+    """Return a UserSnapshot for the id, from the cache when possible."""
+    snapshot = _snapshots.get(user_id)
+    if snapshot is None:
+        # Runs before the request is scoped to the user's tenant, which it names
+        row = (db.session.query(User.id, User.username, User.role, User.tenant_id)
+               .filter(User.id == user_id).execution_options(all_tenants=True).first())
+        if row is None:
+            return None
+        snapshot = UserSnapshot(*row)
+        _snapshots.set(user_id, snapshot)
+    return snapshot
+
+
+def forget_user(user_id):
+    _snapshots.delete(user_id)
+
+
+# Register, profile updates and role changes all flush the User row. The
+# snapshot is dropped once the change is committed: dropped at flush, a
+# concurrent request could cache the old row again before the commit.
+@event.listens_for(User, 'after_insert')
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _note_changed_user(mapper, connection, target):
+    object_session(target).info.setdefault('identity_pending', set()).add(target.id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _drop_snapshots(session_):
+    for user_id in session_.info.pop('identity_pending', ()):
+        forget_user(user_id)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _keep_snapshots(session_, previous_transaction):
+    session_.info.pop('identity_pending', None)
+
+
+def init_app(app):
+    global _snapshots
+    size = app.config.get('IDENTITY_CACHE_SIZE', 4096)
+    ttl = app.config.get('IDENTITY_CACHE_TTL', 60)
+    _snapshots = MemoryCache(max_entries=size, default_ttl=ttl) if size else NullCache()
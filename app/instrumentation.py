@@ -0,0 +1,192 @@
+"""
+Per-request SQL and rendering instrumentation.
+Hooks SQLAlchemy cursor events and Flask's request/template signals to
+record, per endpoint, query count, DB time, Jinja render time and repeated
+statements (the N+1 pattern). Exposes the totals at /metrics in Prometheus
+text format (to operators, or to scrapers holding METRICS_TOKEN), optionally
+adds a Server-Timing header, and logs slow requests with their most
+expensive statements. Totals are per worker process.
+"""
+
+import threading
+import time
+from collections import defaultdict
+import hmac
+from flask import Response, abort, g, has_request_context, request
+from flask.signals import before_render_template, request_finished, request_started, template_rendered
+from flask_login import current_user
+from sqlalchemy import event
+from app.extensions import db, cache
+from app import tenancy
+
+
+class RequestStats:
+    """What one request spent, filled in as it runs."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self.render_started = []
+        self.statements = defaultdict(lambda: [0, 0.0])  # sql -> [executions, seconds]
+
+    def duplicates(self, threshold):
+        """Statements run at least `threshold` times, most repeated first."""
+        repeated = [(count, sql) for sql, (count, _) in self.statements.items() if count >= threshold]
+        return sorted(repeated, reverse=True)
+
+    def slowest(self, limit=5):
+        ranked = sorted(((seconds, count, sql) for sql, (count, seconds) in self.statements.items()), reverse=True)
+        return ranked[:limit]
+
+
+class Metrics:
+    """Process-wide per-endpoint totals, rendered as Prometheus text."""
+
+    COUNTERS = (
+        ('requests_total', 'Requests handled.'),
+        ('request_seconds_total', 'Wall time spent handling requests.'),
+        ('db_queries_total', 'SQL statements executed.'),
+        ('db_seconds_total', 'Time spent executing SQL.'),
+        ('render_seconds_total', 'Time spent rendering Jinja templates.'),
+        ('duplicate_queries_total', 'Repeated executions of the same statement within a request (N+1).'),
+        ('slow_requests_total', 'Requests slower than SLOW_REQUEST_MS.'),
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = defaultdict(lambda: defaultdict(float))  # counter -> endpoint -> value
+
+    def record(self, endpoint, stats, elapsed, duplicates, slow):
+        with self._lock:
+            values = self._values
+            values['requests_total'][endpoint] += 1
+            values['request_seconds_total'][endpoint] += elapsed
+            values['db_queries_total'][endpoint] += stats.queries
+            values['db_seconds_total'][endpoint] += stats.db_time
+            values['render_seconds_total'][endpoint] += stats.render_time
+            values['duplicate_queries_total'][endpoint] += duplicates
+            values['slow_requests_total'][endpoint] += slow
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for name, help_text in self.COUNTERS:
+                lines += [f'# HELP pm_{name} {help_text}', f'# TYPE pm_{name} counter']
+                for endpoint, value in sorted(self._values[name].items()):
+                    lines.append(f'pm_{name}{{endpoint="{endpoint}"}} {value:g}')
+
+        lines += ['# HELP pm_cache_lookups_total Page/fragment cache lookups.',
+                  '# TYPE pm_cache_lookups_total counter']
+        for namespace, counts in cache.stats().items():
+            for result, key in (('hit', 'hits'), ('miss', 'misses')):
+                lines.append(f'pm_cache_lookups_total{{namespace="{namespace}",result="{result}"}} {counts[key]}')
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+
+
+def _current():
+    return g.get('_request_stats') if has_request_context() else None
+
+
+# ---- SQLAlchemy hooks ---
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute; drop its start time
+    started = context.connection.info.get('query_started') if context.connection is not None else None
+    if started:
+        started.pop()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_started'].pop()
+    stats = _current()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_time += elapsed
+        entry = stats.statements[statement]
+        entry[0] += 1
+        entry[1] += elapsed
+
+
+# ---- Flask signal handlers ---
+
+def _request_started(sender, **extra):
+    g._request_stats = RequestStats()
+
+
+def _before_render(sender, template, context, **extra):
+    stats = _current()
+    if stats is not None:
+        stats.render_started.append(time.perf_counter())
+
+
+def _template_rendered(sender, template, context, **extra):
+    stats = _current()
+    if stats is not None and stats.render_started:
+        stats.render_time += time.perf_counter() - stats.render_started.pop()
+
+
+def _request_finished(sender, response, **extra):
+    stats = _current()
+    if stats is None:
+        return
+    config = sender.config
+    elapsed = time.perf_counter() - stats.started
+    endpoint = request.endpoint or 'unmatched'
+    duplicates = stats.duplicates(config['N_PLUS_ONE_THRESHOLD'])
+    slow = elapsed * 1000 >= config['SLOW_REQUEST_MS']
+
+    metrics.record(endpoint, stats, elapsed, sum(count - 1 for count, _ in duplicates), slow)
+
+    if config['SERVER_TIMING_HEADER']:
+        response.headers['Server-Timing'] = (
+            f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries", '
+            f'render;dur={stats.render_time * 1000:.1f}, total;dur={elapsed * 1000:.1f}'
+        )
+
+    if slow:
+        lines = [f'Slow request: {request.method} {request.full_path} ({endpoint}) took {elapsed * 1000:.0f} ms, '
+                 f'{stats.queries} queries in {stats.db_time * 1000:.0f} ms, render {stats.render_time * 1000:.0f} ms']
+        for seconds, count, sql in stats.slowest():
+            lines.append(f'  {seconds * 1000:7.1f} ms  x{count}  {" ".join(sql.split())}')
+        for count, sql in duplicates:
+            lines.append(f'  repeated x{count} (possible N+1): {" ".join(sql.split())}')
+        sender.logger.warning('\n'.join(lines))
+
+
+def init_app(app):
+    if not app.config['INSTRUMENTATION_ENABLED']:
+        return
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(engine, 'handle_error', _handle_error)
+
+    request_started.connect(_request_started, app)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_template_rendered, app)
+    request_finished.connect(_request_finished, app)
+
+    # Prometheus scrape target: behind a bearer token when METRICS_TOKEN is set, else operators only
+    # (the totals cover every tenant's requests)
+    def prometheus_metrics():
+        token = app.config['METRICS_TOKEN']
+        if token:
+            if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+                abort(401)
+        elif not current_user.is_authenticated:
+            abort(401)
+        elif not tenancy.is_operator(current_user):
+            abort(403)
+        return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+    app.add_url_rule('/metrics', 'metrics', prometheus_metrics)
@@ -0,0 +1,255 @@
+"""
+Background jobs with durable state in the job table (no broker needed).
+Routes enqueue work and return at once with the job id; a dispatcher thread
+in each process claims due jobs with a conditional UPDATE, so several
+workers can share the table, and runs them on a small thread pool. Failed
+attempts are retried with exponential backoff, and jobs left running by a
+dead process are picked up again. Handlers must therefore be idempotent.
+Finished jobs, results included, are deleted after JOB_RETENTION seconds.
+Periodic kinds (schedule()) are enqueued by whichever dispatcher first
+finds them due, tracked in job_schedule so that workers don't double up.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+import click
+from flask import current_app, flash, g, jsonify, redirect, request, url_for
+from sqlalchemy import bindparam, delete, select, text, update
+from app.extensions import db
+from app.models import Job, JobSchedule
+
+HANDLERS = {}
+SCHEDULES = {}
+SCHEDULE_CHECK_INTERVAL = 10  # seconds between looks at job_schedule, per process
+PRUNE_INTERVAL = 300  # seconds between deletes of expired finished jobs, per process
+
+_ADD_SCHEDULE = text(
+    "INSERT INTO job_schedule (kind, next_run_at) VALUES (:kind, :first_run) ON CONFLICT (kind) DO NOTHING"
+).bindparams(bindparam('first_run', type_=db.DateTime))
+_schedule_checked_at = 0
+_pruned_at = 0
+
+
+def handler(kind):
+    """Register a function as the handler of a job kind; it gets the payload as keyword arguments."""
+    def decorator(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return decorator
+
+
+def schedule(kind, setting):
+    """Run a job kind periodically, every app.config[setting] seconds (0 disables it)."""
+    SCHEDULES[kind] = setting
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def enqueue(kind, payload=None, user_id=None, max_attempts=None):
+    """Store a queued job, wake this process's dispatcher and return the Job."""
+    if kind not in HANDLERS:
+        raise ValueError(f'Unknown job kind {kind!r}')
+    now = _utcnow()
+    job = Job(kind=kind, payload=payload or {}, status='queued', attempts=0,
+              max_attempts=max_attempts or current_app.config['JOB_MAX_ATTEMPTS'],
+              created_by=user_id, created_at=now, run_after=now)
+    db.session.add(job)
+    db.session.commit()
+    runner = current_app.extensions.get('jobs')
+    if runner is not None:
+        runner.start()
+        runner.notify()
+    return job
+
+
+def accepted(job, message, redirect_to):
+    """Answer a request that queued `job`: 202 with the job for API clients, else flash and redirect."""
+    status_url = url_for('main.job_status', job_id=job.id)
+    if request.accept_mimetypes.accept_json and not request.accept_mimetypes.accept_html:
+        response = jsonify(dict(job.to_dict(), url=status_url))
+        response.status_code = 202
+        response.headers['Location'] = status_url
+        return response
+    flash(f'{message} (job #{job.id})', 'info')
+    return redirect(redirect_to)
+
+
+def heartbeat():
+    """Mark the running job as alive; long handlers call this between chunks."""
+    job_id = g.get('job_id')
+    if job_id is not None:
+        db.session.execute(update(Job).where(Job.id == job_id).values(started_at=_utcnow()))
+
+
+# ---- Claiming and running ---
+
+def enqueue_scheduled():
+    """Queue the periodic jobs that are due; a conditional UPDATE lets one process win each run."""
+    global _schedule_checked_at
+    if time.monotonic() - _schedule_checked_at < SCHEDULE_CHECK_INTERVAL:
+        return
+    _schedule_checked_at = time.monotonic()
+    now = _utcnow()
+    for kind, setting in SCHEDULES.items():
+        every = current_app.config[setting]
+        if not every:
+            continue
+        # The first run comes one interval after the schedule is first seen
+        db.session.execute(_ADD_SCHEDULE, {'kind': kind, 'first_run': now + timedelta(seconds=every)})
+        claimed = db.session.execute(
+            update(JobSchedule).where(JobSchedule.kind == kind, JobSchedule.next_run_at <= now)
+            .values(next_run_at=now + timedelta(seconds=every))
+        ).rowcount
+        if claimed:
+            db.session.add(Job(kind=kind, payload={}, status='queued', attempts=0,
+                               max_attempts=current_app.config['JOB_MAX_ATTEMPTS'], created_at=now, run_after=now))
+    db.session.commit()
+
+
+def _requeue_stale(stale_after):
+    # Jobs whose process died mid-run go back to the queue, or fail when out of attempts
+    cutoff = _utcnow() - timedelta(seconds=stale_after)
+    stale = select(Job.id).where(Job.status == 'running', Job.started_at < cutoff)
+    if db.session.execute(stale.limit(1)).first() is None:
+        return
+    error = 'Worker stopped while running the job'
+    db.session.execute(update(Job).where(Job.id.in_(stale), Job.attempts >= Job.max_attempts)
+                       .values(status='failed', error=error, finished_at=_utcnow()))
+    db.session.execute(update(Job).where(Job.id.in_(stale))
+                       .values(status='queued', error=error, run_after=_utcnow()))
+    db.session.commit()
+
+
+def _prune_finished():
+    # Results can be large (a report build's is the whole report), so finished jobs expire
+    global _pruned_at
+    if time.monotonic() - _pruned_at < PRUNE_INTERVAL:
+        return
+    _pruned_at = time.monotonic()
+    cutoff = _utcnow() - timedelta(seconds=current_app.config['JOB_RETENTION'])
+    db.session.execute(delete(Job).where(Job.status.in_(('succeeded', 'failed')), Job.finished_at < cutoff))
+    db.session.commit()
+
+
+def claim_next(stale_after=600):
+    """Atomically move the next due job to 'running' and return its id (None when idle)."""
+    _requeue_stale(stale_after)
+    _prune_finished()
+    enqueue_scheduled()
+    while True:
+        now = _utcnow()
+        job_id = db.session.execute(
+            select(Job.id).where(Job.status == 'queued', Job.run_after <= now)
+            .order_by(Job.run_after, Job.id).limit(1)
+        ).scalar()
+        if job_id is None:
+            db.session.commit()
+            return None
+        # Only one process wins the conditional update
+        claimed = db.session.execute(
+            update(Job).where(Job.id == job_id, Job.status == 'queued')
+            .values(status='running', attempts=Job.attempts + 1, started_at=now)
+        ).rowcount
+        db.session.commit()
+        if claimed:
+            return job_id
+
+
+def execute(job_id):
+    """Run a claimed job's handler and record the outcome (or schedule a retry)."""
+    job = db.session.get(Job, job_id)
+    g.job_id = job_id
+    try:
+        result = HANDLERS[job.kind](**job.payload)
+    except Exception as exc:
+        db.session.rollback()
+        job = db.session.get(Job, job_id)
+        current_app.logger.exception('Job %s (%s) failed on attempt %s of %s',
+                                     job.id, job.kind, job.attempts, job.max_attempts)
+        job.error = f'{exc.__class__.__name__}: {exc}'
+        if job.attempts < job.max_attempts:
+            delay = current_app.config['JOB_RETRY_DELAY'] * 2 ** (job.attempts - 1)
+            job.status, job.run_after = 'queued', _utcnow() + timedelta(seconds=delay)
+        else:
+            job.status, job.finished_at = 'failed', _utcnow()
+    else:
+        job = db.session.get(Job, job_id)
+        job.status, job.result, job.error, job.finished_at = 'succeeded', result, None, _utcnow()
+    db.session.commit()
+    return job.status
+
+
+class JobRunner:
+    """Per-process dispatcher thread feeding a bounded thread pool."""
+
+    def __init__(self, app):
+        self.app = app
+        self.workers = app.config['JOB_WORKERS']
+        self._slots = threading.Semaphore(self.workers)
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._executor = None
+        self._thread = None
+
+    def start(self):
+        # Started lazily (first request or enqueue) so CLI commands never spawn it
+        if self._thread is not None or not self.app.config['JOBS_RUN_IN_PROCESS']:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='job')
+                self._thread = threading.Thread(target=self._dispatch, name='job-dispatcher', daemon=True)
+                self._thread.start()
+
+    def notify(self):
+        self._wakeup.set()
+
+    def _dispatch(self):
+        while True:
+            self._slots.acquire()
+            try:
+                with self.app.app_context():
+                    job_id = claim_next(self.app.config['JOB_STALE_AFTER'])
+            except Exception:
+                self.app.logger.exception('Job dispatcher could not claim a job')
+                job_id = None
+            if job_id is None:
+                self._slots.release()
+                self._wakeup.wait(self.app.config['JOB_POLL_INTERVAL'])
+                self._wakeup.clear()
+                continue
+            self._executor.submit(self._run, job_id)
+
+    def _run(self, job_id):
+        try:
+            with self.app.app_context():
+                execute(job_id)
+        finally:
+            self._slots.release()
+
+
+def init_app(app):
+    runner = app.extensions['jobs'] = JobRunner(app)
+
+    # Pick up jobs queued before this process started
+    @app.before_request
+    def start_job_runner():
+        runner.start()
+
+    # CLI worker for deployments that keep jobs out of the web processes
+    @app.cli.command('run-jobs')
+    @click.option('--drain', is_flag=True, help='Exit once no job is due instead of polling forever.')
+    def run_jobs_command(drain):
+        """Run queued background jobs in the foreground."""
+        while True:
+            job_id = claim_next(app.config['JOB_STALE_AFTER'])
+            if job_id is None:
+                if drain:
+                    break
+                time.sleep(app.config['JOB_POLL_INTERVAL'])
+                continue
+            click.echo(f'job {job_id}: {execute(job_id)}')
@@ -5,11 +5,14 @@ Defines main app routes:
 """
 
 from app import db
-from flask import Blueprint, render_template , redirect, url_for, flash
+from app.extensions import cache
+from flask import Blueprint, render_template , redirect, url_for, flash, current_app, jsonify, abort, request
 from flask_login import login_required, current_user
-from app.models import Task
+from app.models import Job, Task, User
+from app.counters import status_counts as task_status_counts
+from app.directory import search_members
+from app import deadlines, realtime, tenancy
 from werkzeug.security import generate_password_hash
-from datetime import date, timedelta
 from app.forms import ProfileForm
 
 main = Blueprint('main', __name__)
@@ -25,38 +28,96 @@ def home():
 @main.route('/dashboard', methods=['GET', 'POST'])
 @login_required
 def user_dashboard():
-    tasks = Task.query.filter_by(assignee_id=current_user.id).all()
-
-    # Status summary
-    status_counts = {
-        'To Do': sum(1 for t in tasks if t.status == 'To Do'),
-        'In Progress': sum(1 for t in tasks if t.status == 'In Progress'),
-        'Completed': sum(1 for t in tasks if t.status == 'Completed'),
-    }
-
-    # Upcoming deadlines
-    upcoming_tasks = [t for t in tasks if t.due_date and t.due_date >= date.today() and t.due_date <= date.today() + timedelta(days=7)]
+    # current_user is a cached snapshot, so edit the actual User row
+    user = db.session.get(User, current_user.id)
 
     # Initialize the profile form
-    form = ProfileForm(obj=current_user)
+    form = ProfileForm(obj=user)
 
     if form.validate_on_submit():
         # Update user info
-        current_user.name = form.name.data
-        current_user.email = form.email.data
+        user.name = form.name.data
+        user.email = form.email.data
 
         # Only update password if a new one is provided
         if form.password.data:
-            current_user.set_password(form.password.data)
+            user.set_password(form.password.data)
 
         db.session.commit()
         flash('Your profile has been updated!', 'success')
         return redirect(url_for('main.user_dashboard'))
 
+    # Status summary from the precomputed counters
+    status_counts = task_status_counts(current_user.id)
+
+    # Deadlines: open tasks due in the next 7 days, overdue ones, and their counts
+    upcoming_tasks = deadlines.upcoming_tasks(current_user.id)
+    overdue_tasks = deadlines.overdue_tasks(current_user.id, current_app.config['DASHBOARD_TASKS_LIMIT'])
+    deadline_summary = deadlines.summary_for(current_user.id)
+
+    # Most recent assigned tasks, capped so power users don't load everything
+    tasks = (
+        Task.query
+        .filter_by(assignee_id=current_user.id)
+        .options(*Task.loading(project='joined'))
+        .order_by(Task.id.desc())
+        .limit(current_app.config['DASHBOARD_TASKS_LIMIT'])
+        .all()
+    )
+
     return render_template(
         'dashboard.html', 
         tasks=tasks, 
+        total_tasks=sum(status_counts.values()),
         status_counts=status_counts, 
         upcoming_tasks=upcoming_tasks, 
+        overdue_tasks=overdue_tasks,
+        deadline_summary=deadline_summary,
         form=form
     )
+
+
+# Live updates of the current user's tasks (Server-Sent Events)
+@main.route('/events')
+@login_required
+def user_events():
+    return realtime.stream([f'user:{current_user.id}'], request.headers.get('Last-Event-ID', type=int))
+
+
+# Typeahead for the assignee field when the member directory is too big for a <select>
+@main.route('/members/search')
+@login_required
+def member_search():
+    matches = search_members(request.args.get('q', ''), current_app.config['MEMBER_SEARCH_LIMIT'])
+    return jsonify([{'id': user_id, 'username': username} for user_id, username in matches])
+
+
+# Background job status, for polling (owner, or an admin of the owner's tenant)
+@main.route('/jobs/<int:job_id>')
+@login_required
+def job_status(job_id):
+    job = db.get_or_404(Job, job_id)
+    # Jobs have no tenant column: a job belongs to its creator's tenant
+    shared = (current_user.role == 'admin' and job.created_by is not None
+              and tenancy.user_tenant(job.created_by) == current_user.tenant_id)
+    if job.created_by != current_user.id and not shared:
+        abort(404)
+    return jsonify(job.to_dict())
+
+
+# The current user's recent jobs
+@main.route('/jobs')
+@login_required
+def job_list():
+    recent = (Job.query.filter_by(created_by=current_user.id)
+              .order_by(Job.id.desc()).limit(20).all())
+    return jsonify([job.to_dict() for job in recent])
+
+
+# Cache hit/miss counters per namespace, for every tenant (operators only)
+@main.route('/cache/stats')
+@login_required
+def cache_stats():
+    if not tenancy.is_operator(current_user):
+        abort(403)
+    return jsonify(cache.stats())
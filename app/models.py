@@ -1,27 +1,73 @@
 """
-Defines the SQLAlchemy models for User, Project and Task entities.
+Defines the SQLAlchemy models for User, Project and Task entities and
+the tenants (workspaces) they belong to, plus the per-user task counters
+and deadline summaries derived from them, the append-only task history and
+its snapshots, background jobs and their schedules, the live-update event
+log and shared rate limit counters.
 Includes password hashing and user-role support for authentication.
 """
 
+from datetime import date, datetime, timezone
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy.orm import declared_attr, joinedload, lazyload, raiseload, selectinload
 from app.extensions import db
+from app.pagination import nulls_last_key
+from app.passwords import hash_password, verify_password
+
+
+# Relationships default to lazy loading; call sites that walk a relationship
+# for every row pick a strategy per query instead, e.g.
+#   Task.query.options(*Task.loading(assignee='joined'))
+class LoadingMixin:
+    LOADERS = {'joined': joinedload, 'selectin': selectinload, 'lazy': lazyload, 'raise': raiseload}
+
+    @classmethod
+    def loading(cls, **strategies):
+        """Loader options mapping relationship names to 'joined', 'selectin', 'lazy' or 'raise'."""
+        return [cls.LOADERS[strategy](getattr(cls, name)) for name, strategy in strategies.items()]
+
+
+# Rows that belong to one tenant. Sessions working for a tenant only see
+# and write that tenant's rows (app/tenancy.py); tasks take their project's.
+class TenantMixin:
+    @declared_attr
+    def tenant_id(cls):
+        return db.Column(db.Integer, db.ForeignKey('tenant.id'), nullable=False)
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+# A workspace, e.g. a department, sharing the instance with others
+class Tenant(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(140), unique=True, nullable=False)
+
+    def __repr__(self):
+        return f'<Tenant {self.name}>'
+
 
 # User model for storing registered users and roles
-class User(UserMixin, db.Model):
+class User(UserMixin, TenantMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(64), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=False)
-    password_hash = db.Column(db.String(128), nullable=False)
+    password_hash = db.Column(db.String(255), nullable=False)
     role = db.Column(db.String(20), nullable=False)  # 'admin', 'manager', 'member'
 
+    __table_args__ = (
+        db.Index('ix_user_tenant_role_username', 'tenant_id', 'role', 'username'),  # member directory
+        db.Index('ix_user_tenant_id', 'tenant_id', 'id'),  # API member pages
+    )
+
     def set_password(self, password):
-        # Hash the password before storing
-        self.password_hash = generate_password_hash(password)
+        # Hash the password before storing (PASSWORD_HASH_METHOD, on this thread)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
         # Check password hash for login verification
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
 
     def __repr__(self):
         return f'<User {self.username} ({self.role})>'
@@ -30,25 +76,45 @@ class User(UserMixin, db.Model):
 # Many-to-many association table between Project and User
 project_members = db.Table('project_members',
     db.Column('user_id', db.Integer, db.ForeignKey('user.id')),
-    db.Column('project_id', db.Integer, db.ForeignKey('project.id'))
+    db.Column('project_id', db.Integer, db.ForeignKey('project.id')),
+    db.Index('ix_project_members_project_user', 'project_id', 'user_id', unique=True),
+    db.Index('ix_project_members_user', 'user_id'),
 )
 
 
 # Project model for storing project details
-class Project(db.Model):
+class Project(LoadingMixin, TenantMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(140), nullable=False)
     description = db.Column(db.Text, nullable=True)
     deadline = db.Column(db.Date, nullable=True)
     status = db.Column(db.String(50), default='Active')  # Active, Completed, On Hold, etc.
     manager_id = db.Column(db.Integer, db.ForeignKey('user.id'))  # Assigned manager
+    # Bumped by every UPDATE, ORM or Core (ETags and Last-Modified in the API)
+    updated_at = db.Column(db.DateTime, nullable=False, default=_utcnow, onupdate=_utcnow)
+    version = db.Column(db.Integer, nullable=False, default=1, onupdate=db.literal_column('version') + 1)
 
     manager = db.relationship('User', backref='managed_projects')
     members = db.relationship('User', secondary=project_members, backref='projects')
 
+    # Lists sort NULL deadlines last, as this date
+    NO_DEADLINE = date.max
+
+    # Project lists are always one tenant's, so their indexes lead with it. Deadline
+    # pages order and seek on nulls_last_key(deadline), so the indexes hold that key.
+    __table_args__ = (
+        db.Index('ix_project_tenant_status_deadline_key', 'tenant_id', 'status',
+                 nulls_last_key(deadline, NO_DEADLINE), 'id'),  # status filter + counts
+        db.Index('ix_project_tenant_deadline_key', 'tenant_id', nulls_last_key(deadline, NO_DEADLINE),
+                 'id'),  # keyset pages by deadline
+        db.Index('ix_project_tenant_name_id', 'tenant_id', 'name', 'id'),  # keyset pages by name
+        db.Index('ix_project_tenant_id', 'tenant_id', 'id'),  # API pages, search hits
+        db.Index('ix_project_manager_id', 'manager_id'),
+    )
+
 
 # Task model for storing project details
-class Task(db.Model):
+class Task(LoadingMixin, TenantMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(140), nullable=False)
     description = db.Column(db.Text, nullable=True)
@@ -57,12 +123,154 @@ class Task(db.Model):
     priority = db.Column(db.String(20), default='Medium')  # Low, Medium, High
     project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)  # Associated project
     assignee_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)  # Assigned user
+    updated_at = db.Column(db.DateTime, nullable=False, default=_utcnow, onupdate=_utcnow)
+    version = db.Column(db.Integer, nullable=False, default=1, onupdate=db.literal_column('version') + 1)
 
     # Relationships
     project = db.relationship('Project', backref=db.backref('tasks', lazy=True))
     assignee = db.relationship('User', backref=db.backref('tasks_assigned', lazy=True))
 
+    __table_args__ = (
+        # project detail + progress counts; tenant_id last keeps the scoped counts index-only
+        db.Index('ix_task_project_status', 'project_id', 'status', 'tenant_id'),
+        db.Index('ix_task_assignee_due', 'assignee_id', 'due_date'),  # dashboard upcoming deadlines
+        db.Index('ix_task_assignee_id', 'assignee_id', 'id'),  # dashboard recent tasks
+        db.Index('ix_task_due_status', 'due_date', 'status'),  # due-soon/overdue scans across users
+        db.Index('ix_task_tenant_id', 'tenant_id', 'id'),  # API pages, reports, search hits
+        db.Index('ix_task_tenant_status', 'tenant_id', 'status', 'id'),  # API pages by status
+    )
+
     def __repr__(self):
         return f'<Task {self.title}>'
 
 
+# Denormalized count of tasks per assignee and status (kept in sync by app/counters.py)
+class UserTaskCounter(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    status = db.Column(db.String(50), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<UserTaskCounter user={self.user_id} {self.status}={self.count}>'
+
+
+
+
+# Precomputed "overdue / due this week" counts per user (kept by app/deadlines.py)
+class DeadlineSummary(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    overdue = db.Column(db.Integer, nullable=False, default=0)
+    due_this_week = db.Column(db.Integer, nullable=False, default=0)
+    computed_on = db.Column(db.Date, nullable=False)  # rows from an earlier day are recomputed
+
+    def __repr__(self):
+        return f'<DeadlineSummary user={self.user_id} overdue={self.overdue} week={self.due_this_week}>'
+
+
+# Append-only task history (app/history.py): the task's state after each insert, change or delete.
+# No foreign keys, so events outlive their tasks and projects.
+class TaskEvent(db.Model):
+    __tablename__ = 'task_event'
+
+    id = db.Column(db.Integer, primary_key=True)  # log order
+    task_id = db.Column(db.Integer, nullable=False)
+    project_id = db.Column(db.Integer, nullable=False)
+    kind = db.Column(db.String(10), nullable=False)  # 'created', 'updated', 'deleted'
+    status = db.Column(db.String(50), nullable=True)
+    priority = db.Column(db.String(20), nullable=True)
+    assignee_id = db.Column(db.Integer, nullable=True)
+    due_date = db.Column(db.Date, nullable=True)
+    occurred_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_task_event_task', 'task_id', 'id'),  # one task's history
+        db.Index('ix_task_event_project', 'project_id', 'id'),  # a project's events after a snapshot
+    )
+
+    def __repr__(self):
+        return f'<TaskEvent {self.id} task={self.task_id} {self.kind} {self.status}>'
+
+
+# Every live task's state as of a point in the event log (app/history.py)
+class TaskSnapshot(db.Model):
+    __tablename__ = 'task_snapshot'
+
+    id = db.Column(db.Integer, primary_key=True)
+    taken_at = db.Column(db.DateTime, nullable=False, index=True)
+    last_event_id = db.Column(db.Integer, nullable=False)  # events up to this one are included
+    tasks = db.Column(db.Integer, nullable=False, default=0)
+
+
+class TaskSnapshotRow(db.Model):
+    __tablename__ = 'task_snapshot_row'
+
+    snapshot_id = db.Column(db.Integer, db.ForeignKey('task_snapshot.id'), primary_key=True)
+    task_id = db.Column(db.Integer, primary_key=True)
+    project_id = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(50), nullable=True)
+    priority = db.Column(db.String(20), nullable=True)
+    assignee_id = db.Column(db.Integer, nullable=True)
+    due_date = db.Column(db.Date, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_task_snapshot_row_project', 'snapshot_id', 'project_id'),
+    )
+
+
+# Durable state of a background job (run by app/jobs.py)
+class Job(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)  # handler name, e.g. 'delete-project'
+    payload = db.Column(db.JSON, nullable=False, default=dict)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, succeeded, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    result = db.Column(db.JSON, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False)
+    run_after = db.Column(db.DateTime, nullable=False)  # pushed back between retries
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_job_status_run_after', 'status', 'run_after'),  # dispatcher: next due job
+        db.Index('ix_job_created_by', 'created_by', 'id'),  # a user's recent jobs
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id, 'kind': self.kind, 'status': self.status, 'attempts': self.attempts,
+            'max_attempts': self.max_attempts, 'result': self.result, 'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+    def __repr__(self):
+        return f'<Job {self.id} {self.kind} {self.status}>'
+
+
+# Next run of each periodic job kind, shared by all processes (app/jobs.py)
+class JobSchedule(db.Model):
+    kind = db.Column(db.String(50), primary_key=True)
+    next_run_at = db.Column(db.DateTime, nullable=False)
+
+
+# Published task deltas, tailed by every worker when REALTIME_BROKER = 'database' (app/realtime.py)
+class RealtimeEvent(db.Model):
+    __tablename__ = 'realtime_event'
+
+    id = db.Column(db.Integer, primary_key=True)
+    channel = db.Column(db.String(64), nullable=False)  # 'project:<id>' or 'user:<id>'
+    payload = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, index=True)
+
+
+# Sliding-window rate limit counts shared by all workers (RATE_LIMIT_STORE='database')
+class RateLimitCounter(db.Model):
+    __tablename__ = 'rate_limit_counter'
+
+    bucket = db.Column(db.String(160), primary_key=True)  # e.g. 'login:ip:<address>'
+    window_start = db.Column(db.Integer, primary_key=True, index=True)  # epoch seconds
+    count = db.Column(db.Integer, nullable=False, default=0)
@@ -0,0 +1,138 @@
+"""
+Keyset (seek) pagination helpers.
+A page is addressed by an opaque cursor holding the sort value and id of its
+boundary row, so deep pages cost the same as the first one (no OFFSET scans).
+"""
+
+import base64
+import json
+from datetime import date
+from sqlalchemy import and_, func, literal, tuple_
+from werkzeug.exceptions import BadRequest
+
+MAX_ID = 2 ** 63 - 1
+
+
+def encode_cursor(value, row_id):
+    """Pack a (sort value, id) pair into a URL-safe cursor string."""
+    if isinstance(value, date):
+        value = value.isoformat()
+    raw = json.dumps([value, row_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool) and -MAX_ID <= value <= MAX_ID
+
+
+def decode_cursor(cursor, parse=None, expected_type=None, nullable=False):
+    """
+    Unpack a cursor into (sort value, id); returns None for malformed input,
+    including a value that isn't an `expected_type` (or None, when `nullable`).
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        value, row_id = json.loads(raw)
+        if value is not None and parse:
+            value = parse(value)
+    except (ValueError, TypeError):
+        return None
+    if value is None:
+        valid = nullable
+    elif expected_type is int:
+        valid = _is_int(value)
+    else:
+        valid = expected_type is None or isinstance(value, expected_type)
+    return (value, row_id) if valid and _is_int(row_id) else None
+
+
+def nulls_last_key(column, last):
+    """
+    Sort key of a nullable column with its NULLs after every value: COALESCE(column, last),
+    where `last` is above anything the column holds. The literal is rendered into the SQL,
+    so an index on the same expression serves pages sorted by it.
+    """
+    return func.coalesce(column, literal(last, column.type, literal_execute=True))
+
+
+# Rows strictly after (value, row_id) in ascending order. The lone range term on the
+# sort key lets the database seek into the index; the row value breaks ties on id.
+def _after(key, id_column, value, row_id):
+    return and_(key >= value, tuple_(key, id_column) > tuple_(value, row_id))
+
+
+# Rows strictly before (value, row_id) in ascending order
+def _before(key, id_column, value, row_id):
+    return and_(key <= value, tuple_(key, id_column) < tuple_(value, row_id))
+
+
+def _ordering(key, id_column, backwards):
+    keys = [key, id_column]
+    return [key.desc() for key in keys] if backwards else keys
+
+
+class KeysetPage:
+    """One page of results plus the cursors needed to move either way."""
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def keyset_paginate(query, column, id_column, per_page, cursor=None, direction='next',
+                    descending=False, nulls_last=None, parse=None):
+    """
+    Fetch one page of `query` ordered by (column, id_column).
+    `cursor` comes from a previous page's next/prev cursor and `direction`
+    says which way to move from it; `parse` turns the cursor's JSON value
+    back into the column's Python type. A nullable column passes the value
+    its NULLs sort as in `nulls_last`, and is ordered by nulls_last_key(column, value).
+    A cursor that doesn't decode to a value of the column's type is a BadRequest.
+    """
+    position = None
+    if cursor:
+        position = decode_cursor(cursor, parse, column.type.python_type, nullable=nulls_last is not None)
+        if position is None:
+            raise BadRequest('Invalid cursor')
+    going_back = position is not None and direction == 'prev'
+    backwards = descending != going_back
+    key = column if nulls_last is None else nulls_last_key(column, nulls_last)
+
+    if position is not None and position[0] is None and nulls_last is not None:
+        position = (nulls_last, position[1])  # cursors from before NULLs sorted as a value
+    if position is not None:
+        seek = _before if backwards else _after
+        query = query.filter(seek(key, id_column, *position))
+
+    rows = query.order_by(*_ordering(key, id_column, backwards)).limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if going_back:
+        rows.reverse()
+
+    def cursor_for(row):
+        value = getattr(row, column.key)
+        return encode_cursor(nulls_last if value is None else value, getattr(row, id_column.key))
+
+    has_next = has_more if not going_back else True
+    has_prev = has_more if going_back else position is not None
+    return KeysetPage(
+        rows,
+        next_cursor=cursor_for(rows[-1]) if rows and has_next else None,
+        prev_cursor=cursor_for(rows[0]) if rows and has_prev else None,
+    )
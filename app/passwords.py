@@ -0,0 +1,109 @@
+"""
+Password hashing policy for logins and password changes.
+Hashes use PASSWORD_HASH_METHOD (werkzeug's method string, e.g.
+'scrypt:32768:8:1' or 'pbkdf2:sha256:600000'); stored hashes made with
+other parameters are replaced on the next successful login. Hash work runs
+on a small bounded pool, so a burst of login attempts can't occupy every
+request thread or CPU; when the pool is saturated callers get HashPoolBusy.
+Password writes (registration, profile changes, the CLI) come from signed-in
+users or operators and hash on the calling thread, so a login flood can't
+make them fail.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HashPoolBusy(Exception):
+    """Too many hash computations are already queued or running."""
+
+
+class HashPool:
+    """At most `workers` hashes run at once and at most `max_pending` wait or run."""
+
+    def __init__(self, workers, max_pending, wait_timeout):
+        self.wait_timeout = wait_timeout
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix='pwhash')
+        self._pending = threading.BoundedSemaphore(max_pending)
+
+    def run(self, fn, *args):
+        if not self._pending.acquire(blocking=False):
+            raise HashPoolBusy()
+        future = self._executor.submit(fn, *args)
+        # Free the slot when the work is actually done, even if we stop waiting for it
+        future.add_done_callback(lambda _: self._pending.release())
+        try:
+            return future.result(timeout=self.wait_timeout)
+        except TimeoutError:
+            raise HashPoolBusy() from None
+
+
+class PasswordHasher:
+    """Flask extension holding the hash policy, the pool and a dummy hash for unknown users."""
+
+    def __init__(self, app):
+        self.method = app.config['PASSWORD_HASH_METHOD']
+        self.salt_length = app.config['PASSWORD_SALT_LENGTH']
+        self.pool = HashPool(app.config['PASSWORD_HASH_WORKERS'], app.config['PASSWORD_HASH_MAX_PENDING'],
+                             app.config['PASSWORD_HASH_TIMEOUT'])
+        self._prefix = None
+        self._dummy_hash = None
+        self._lock = threading.Lock()
+
+    def _generate(self, password):
+        return generate_password_hash(password, self.method, self.salt_length)
+
+    def _init_policy(self):
+        # Werkzeug records the full parameters in front of the first '$'; computed once, lazily
+        if self._dummy_hash is None:
+            with self._lock:
+                if self._dummy_hash is None:
+                    dummy = self._generate('not a real password')
+                    self._prefix = dummy.split('$', 1)[0]
+                    self._dummy_hash = dummy
+
+    def hash(self, password, pooled=True):
+        return self.pool.run(self._generate, password) if pooled else self._generate(password)
+
+    def verify(self, stored_hash, password):
+        """Check a password; with no stored hash, spend the same time on a dummy and fail."""
+        self._init_policy()
+        if stored_hash is None:
+            self.pool.run(check_password_hash, self._dummy_hash, password)
+            return False
+        return self.pool.run(check_password_hash, stored_hash, password)
+
+    def needs_rehash(self, stored_hash):
+        self._init_policy()
+        return stored_hash.split('$', 1)[0] != self._prefix
+
+
+def _hasher():
+    return current_app.extensions['passwords']
+
+
+def hash_password(password):
+    """Hash a new password on the calling thread, outside the login pool."""
+    return _hasher().hash(password, pooled=False)
+
+
+def verify_password(stored_hash, password):
+    return _hasher().verify(stored_hash, password)
+
+
+def rehash_if_needed(user, password):
+    """After a successful login, upgrade a hash made with outdated parameters; returns True if changed."""
+    hasher = _hasher()
+    if not hasher.needs_rehash(user.password_hash):
+        return False
+    try:
+        user.password_hash = hasher.hash(password)
+    except HashPoolBusy:
+        return False  # not now; the next login tries again
+    return True
+
+
+def init_app(app):
+    app.extensions['passwords'] = PasswordHasher(app)
@@ -0,0 +1,58 @@
+"""
+Aggregate progress statistics for projects.
+Counts total and completed tasks per project with a single grouped query,
+so pages never load Task rows just to count them.
+"""
+
+from collections import namedtuple
+from sqlalchemy import func, case
+from app.extensions import db
+from app.models import Project, Task
+
+
+# Task totals for one project, with the completion percentage derived from them
+class ProgressStats(namedtuple('ProgressStats', ['total', 'completed'])):
+    __slots__ = ()
+
+    @property
+    def percent(self):
+        return (self.completed / self.total) * 100 if self.total else 0
+
+
+def progress_for(project_ids):
+    """Return a {project_id: ProgressStats} map for the given project ids."""
+    project_ids = list(project_ids)
+    stats = {project_id: ProgressStats(0, 0) for project_id in project_ids}
+    if not project_ids:
+        return stats
+
+    rows = (
+        db.session.query(
+            Task.project_id,
+            func.count(Task.id),
+            func.sum(case((Task.status == 'Completed', 1), else_=0)),
+        )
+        .filter(Task.project_id.in_(project_ids))
+        .group_by(Task.project_id)
+    )
+    for project_id, total, completed in rows:
+        stats[project_id] = ProgressStats(total, completed or 0)
+    return stats
+
+
+def progress_for_project(project_id):
+    """Return the ProgressStats of a single project."""
+    return progress_for([project_id])[project_id]
+
+
+def project_status_counts(statuses=('Active', 'Completed')):
+    """Return a {status: project count} map for the given statuses in one query."""
+    counts = {status: 0 for status in statuses}
+    rows = (
+        db.session.query(Project.status, func.count(Project.id))
+        .filter(Project.status.in_(statuses))
+        .group_by(Project.status)
+    )
+    for status, count in rows:
+        counts[status] = count
+    return counts
@@ -2,65 +2,163 @@
 Handles CRUD operations for Projects:
 - View, Create, Edit, and Delete projects
 - Access controlled by user role (Admin or assigned Manager)
+- Queries see only the user's tenant's projects and tasks (app/tenancy.py)
 """
 
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+import io
+from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, jsonify, abort, Response, stream_with_context
 from flask_login import login_required, current_user
+from sqlalchemy.orm import joinedload
 from app import db
-from app.models import User, Task, Project
+from app.models import User, Task, Project, Job
+from app.progress import progress_for, progress_for_project, project_status_counts
+from app.pagination import keyset_paginate
+from app import search as fulltext
+from app.cache import cached_response
+from app import bulk, deadlines, jobs, realtime, reports
+from app.directory import assignee_choices
 from app.forms import ProjectForm, TaskForm, TeamAssignmentForm
 from app.models import User
 
 project = Blueprint('project', __name__)
 
 # View all projects
-from datetime import datetime, timedelta
+from datetime import date
+
+# Sort options for the project list: column, cursor value parser, value NULLs sort as
+PROJECT_SORTS = {
+    'deadline': (Project.deadline, date.fromisoformat, Project.NO_DEADLINE),
+    'name': (Project.name, None, None),
+}
 
 # View all projects
 @project.route('/projects', methods=['GET'])
 @login_required
+@cached_response(('projects',), ('members',))  # cards show manager usernames
 def view_projects():
     search = request.args.get('search', '')
     status_filter = request.args.get('status', '')
     deadline_filter = request.args.get('deadline', '')
+    sort = request.args.get('sort', 'deadline')
+    cursor = request.args.get('cursor')
+    direction = request.args.get('dir', 'next')
+
+    descending = sort.startswith('-')
+    if sort.lstrip('-') not in PROJECT_SORTS:
+        sort, descending = 'deadline', False
+    sort_column, parse_cursor, nulls_last = PROJECT_SORTS[sort.lstrip('-')]
+
+    per_page = request.args.get('per_page', current_app.config['PROJECTS_PER_PAGE'], type=int)
+    per_page = max(1, min(per_page, current_app.config['MAX_PER_PAGE']))
 
     projects = Project.query
 
     if search:
-        projects = projects.filter(Project.name.ilike(f'%{search}%'))
+        projects = projects.filter(Project.id.in_(fulltext.matching_ids('project', search)))
 
     if status_filter:
         projects = projects.filter(Project.status == status_filter)
 
-    # Filter by deadline
+    # Filter by deadline: indexed date ranges (this_week, this_month, 1_year, overdue)
     if deadline_filter:
-        today = datetime.today()
-        
-        if deadline_filter == 'this_week':
-            start_date = today - timedelta(days=today.weekday())  # Start of the current week
-            end_date = start_date + timedelta(days=7)  # End of the current week
-            projects = projects.filter(Project.deadline >= start_date, Project.deadline <= end_date)
-        
-        elif deadline_filter == 'this_month':
-            start_date = today.replace(day=1)  # Start of the current month
-            end_date = (today.replace(day=1) + timedelta(days=32)).replace(day=1)  # Start of next month
-            projects = projects.filter(Project.deadline >= start_date, Project.deadline < end_date)
-        
-        elif deadline_filter == '1_year':
-            end_date = today + timedelta(days=365)  # 1 year from today
-            projects = projects.filter(Project.deadline <= end_date)
-
-    # Calculate ongoing and completed project counts
-    ongoing_count = Project.query.filter_by(status='Active').count()
-    completed_count = Project.query.filter_by(status='Completed').count()
-
-    # Calculate task progress for each project
-    for project in projects:
-        tasks = Task.query.filter_by(project_id=project.id).all()
-        completed_tasks = [task for task in tasks if task.status == 'Completed']
-        project.task_progress = (len(completed_tasks) / len(tasks)) * 100 if tasks else 0
-
-    return render_template('projects/view_projects.html', projects=projects, ongoing_count=ongoing_count, completed_count=completed_count)
+        projects = deadlines.filter_projects(projects, deadline_filter)
+
+    # Calculate the tenant's ongoing and completed project counts
+    status_counts = project_status_counts(('Active', 'Completed'))
+    ongoing_count = status_counts['Active']
+    completed_count = status_counts['Completed']
+
+    # Fetch one keyset page, loading managers with the projects
+    page = keyset_paginate(
+        projects.options(joinedload(Project.manager)),
+        sort_column, Project.id, per_page,
+        cursor=cursor, direction=direction,
+        descending=descending, nulls_last=nulls_last, parse=parse_cursor,
+    )
+
+    # Aggregate task progress for the page in one query
+    stats = progress_for(project.id for project in page)
+    for project in page:
+        project.task_progress = stats[project.id].percent
+
+    # Query args that next/prev links must carry over
+    filters = {key: value for key, value in request.args.items()
+               if key in ('search', 'status', 'deadline', 'sort', 'per_page') and value}
+
+    return render_template('projects/view_projects.html', projects=page.items, page=page, filters=filters,
+                           ongoing_count=ongoing_count, completed_count=completed_count)
+
+
+
+# Full-text search across projects and tasks
+@project.route('/search', methods=['GET'])
+@login_required
+def search():
+    term = request.args.get('q', '').strip()
+    kind = request.args.get('kind', '')
+    kinds = (kind,) if kind in fulltext.KINDS else tuple(fulltext.KINDS)
+
+    hits = fulltext.search(term, kinds=kinds, limit=current_app.config['SEARCH_RESULTS_LIMIT'])
+    results = fulltext.load_hits(hits)
+
+    return render_template('search.html', term=term, kind=kind, results=results)
+
+
+
+# Task reports across projects, or for one (?project_id=); admins and managers only.
+# A report missing from the cache is built by a job that the page polls (?job=)
+@project.route('/reports', methods=['GET'])
+@login_required
+def view_reports():
+    data, pending = _requested_report()
+    if pending is not None:
+        return pending
+    project = db.session.get(Project, data['project_id']) if data['project_id'] is not None else None
+    return render_template('reports.html', report=data, project=project,
+                           rows=current_app.config['REPORT_TABLE_ROWS'])
+
+
+# The same report as a JSON download
+@project.route('/reports/export.json', methods=['GET'])
+@login_required
+def export_report():
+    data, pending = _requested_report()
+    if pending is not None:
+        return pending
+    response = jsonify(data)
+    scope = f"project-{data['project_id']}" if data['project_id'] is not None else 'all-projects'
+    response.headers['Content-Disposition'] = f"attachment; filename=report-{scope}-{data['as_of']}.json"
+    return response
+
+
+def _requested_report():
+    """(report, None) from the cache or a finished build job, else (None, a response about the build)."""
+    if current_user.role not in ['admin', 'manager']:
+        abort(403)
+    project_id = request.args.get('project_id', type=int)
+    if project_id is not None:
+        db.get_or_404(Project, project_id)
+
+    job_id = request.args.get('job', type=int)
+    if job_id is None:
+        data = reports.cached_report(project_id)
+        if data is not None:
+            return data, None
+        job = reports.request_build(project_id, current_user.id)
+        return None, jobs.accepted(job, 'Building the report.',
+                                   url_for(request.endpoint, project_id=project_id, job=job.id))
+
+    job = db.session.get(Job, job_id)
+    if (job is None or job.kind != 'build-report' or job.created_by != current_user.id
+            or job.payload.get('project_id') != project_id):
+        abort(404)
+    if job.status == 'succeeded':
+        return job.result, None
+    if request.accept_mimetypes.accept_json and not request.accept_mimetypes.accept_html:
+        return None, (jsonify(job.to_dict()), 202)
+    if job.status == 'failed':
+        return None, (render_template('report_pending.html', job=job, project_id=project_id), 500)
+    return None, (render_template('report_pending.html', job=job, project_id=project_id), 202, {'Refresh': '2'})
 
 
 
@@ -69,12 +167,15 @@ def view_projects():
 @login_required
 def view_project_detail(project_id):
     project = Project.query.get_or_404(project_id)
-    tasks = Task.query.filter_by(project_id=project.id).all()
-    completed_tasks = [task for task in tasks if task.status == 'Completed']
+    # Assignees come in with the tasks, one query however many rows there are
+    tasks = Task.query.filter_by(project_id=project.id).options(*Task.loading(assignee='joined')).all()
+    progress = progress_for_project(project.id)
 
     form = TaskForm()
  
-    form.assignee_id.choices = [(user.id, user.username) for user in User.query.filter_by(role='member').all()]
+    # Cached (id, username) pairs; huge directories switch to the typeahead
+    form.assignee_id.choices, assignee_typeahead = assignee_choices(
+        project.id, request.form.get('assignee_id', type=int))
 
     if form.validate_on_submit():
         new_task = Task(
@@ -91,21 +192,30 @@ def view_project_detail(project_id):
         flash('Task created successfully!', 'success')
         return redirect(url_for('project.view_project_detail', project_id=project.id))
 
-    # Get all assignees from tasks 
-    assigned_user_ids = set(task.assignee_id for task in tasks if task.assignee_id)
-    team_members = User.query.filter(User.id.in_(assigned_user_ids)).all()
+    # Team members are the assignees already loaded with the tasks
+    team_members = sorted({task.assignee for task in tasks if task.assignee}, key=lambda user: user.username)
 
     return render_template(
         'projects/project_detail.html',
         project=project,
         tasks=tasks,
-        completed_tasks_count=len(completed_tasks),
+        completed_tasks_count=progress.completed,
+        progress=progress,
         form=form,
+        assignee_typeahead=assignee_typeahead,
         team_members=team_members
     )
 
 
 
+# Live task updates for the project page (Server-Sent Events)
+@project.route('/projects/<int:project_id>/events')
+@login_required
+def project_events(project_id):
+    db.get_or_404(Project, project_id)
+    return realtime.stream([f'project:{project_id}'], request.headers.get('Last-Event-ID', type=int))
+
+
 # Create a new project
 @project.route('/projects/create', methods=['GET', 'POST'])
 @login_required
@@ -164,14 +274,82 @@ def delete_project(project_id):
         flash('Unauthorized access.', 'danger')
         return redirect(url_for('project.view_projects'))
 
-    db.session.delete(project)
-    db.session.commit()
-    flash('Project deleted.', 'info')
-    return redirect(url_for('project.view_projects'))
+    # Large task cascades take a while: delete in the background
+    job = jobs.enqueue('delete-project', {'project_id': project.id}, user_id=current_user.id)
+    return jobs.accepted(job, 'Project deletion started.', url_for('project.view_projects'))
 
 
 # ---- Tasks ---
 
+# Change status/priority of many tasks at once, in the background
+@project.route('/projects/<int:project_id>/tasks/bulk-update', methods=['POST'])
+@login_required
+def bulk_update_tasks(project_id):
+    project = Project.query.get_or_404(project_id)
+    if current_user.role not in ['admin', 'manager'] and current_user.id != project.manager_id:
+        abort(403)
+
+    changes = {field: request.form[field] for field, allowed in bulk.BULK_UPDATE_FIELDS.items()
+               if request.form.get(field) in allowed}
+    where_status = request.form.get('where_status') or None
+    if not changes or (where_status and where_status not in bulk.BULK_UPDATE_FIELDS['status']):
+        flash('Choose a new status or priority.', 'warning')
+        return redirect(url_for('project.view_project_detail', project_id=project.id))
+
+    job = jobs.enqueue('update-tasks', {'project_id': project.id, 'changes': changes, 'where_status': where_status},
+                       user_id=current_user.id)
+    return jobs.accepted(job, 'Task update started.', url_for('project.view_project_detail', project_id=project.id))
+
+
+# Bulk import tasks from an uploaded (or raw-body) CSV / JSON-lines file
+@project.route('/projects/<int:project_id>/tasks/import', methods=['POST'])
+@login_required
+def import_project_tasks(project_id):
+    project = Project.query.get_or_404(project_id)
+    wants_json = request.accept_mimetypes.best_match(['text/html', 'application/json']) == 'application/json'
+
+    if current_user.role not in ['admin', 'manager'] and current_user.id != project.manager_id:
+        if wants_json:
+            abort(403)
+        flash('You do not have permission to import tasks.', 'danger')
+        return redirect(url_for('project.view_project_detail', project_id=project.id))
+
+    upload = request.files.get('file')
+    if upload:
+        stream = io.TextIOWrapper(upload.stream, encoding='utf-8', newline='')
+        fmt = request.form.get('format') or bulk.guess_format(upload.filename)
+    else:
+        stream = io.TextIOWrapper(io.BufferedReader(request.stream), encoding='utf-8', newline='')
+        default = 'ndjson' if request.mimetype in ('application/x-ndjson', 'application/jsonl') else 'csv'
+        fmt = request.args.get('format', default)
+    if fmt not in bulk.FORMATS:
+        abort(400)
+
+    result = bulk.import_tasks(project.id, bulk.read_rows(stream, fmt), current_app.config['BULK_IMPORT_BATCH_SIZE'])
+
+    if wants_json:
+        return jsonify(result.to_dict()), 200 if not result.errors else 207
+    flash(f'Imported {result.imported} tasks.', 'success')
+    for error in result.errors[:5]:
+        flash(f"Row {error['row']}: {error['errors']}", 'warning')
+    if len(result.errors) > 5:
+        flash(f'{len(result.errors) - 5} more rows were rejected.', 'warning')
+    return redirect(url_for('project.view_project_detail', project_id=project.id))
+
+# Stream a project's tasks as CSV or NDJSON
+@project.route('/projects/<int:project_id>/tasks/export', methods=['GET'])
+@login_required
+def export_project_tasks(project_id):
+    project = Project.query.get_or_404(project_id)
+    fmt = request.args.get('format', 'csv')
+    if fmt not in bulk.FORMATS:
+        abort(400)
+
+    chunks = bulk.export_tasks(project.id, fmt, current_app.config['BULK_EXPORT_CHUNK_SIZE'])
+    response = Response(stream_with_context(chunks), mimetype='text/csv' if fmt == 'csv' else 'application/x-ndjson')
+    response.headers['Content-Disposition'] = f'attachment; filename=project-{project.id}-tasks.{fmt}'
+    return response
+
 # Route for Task Creation
 @project.route('/projects/<int:project_id>/task/create', methods=['POST'])
 @login_required
@@ -0,0 +1,180 @@
+"""
+Sliding-window rate limiting, used to throttle logins.
+Each limit is N hits per window; the count is estimated from the current
+and previous fixed windows (the previous one weighted by how much of it
+still overlaps), so it needs two counters per key instead of a log of
+timestamps. Counters live in process memory, or in the rate_limit_counter
+table when RATE_LIMIT_STORE='database' so that all workers share them.
+Counting a hit and checking the limit is one atomic step (take()), so
+concurrent requests can't all slip in under the same count.
+"""
+
+import math
+import threading
+import time
+from flask import current_app, request
+from sqlalchemy import delete, select, text
+from werkzeug.middleware.proxy_fix import ProxyFix
+from app.extensions import db
+from app.models import RateLimitCounter
+
+
+class MemoryStore:
+    """Per-process counters: {(key, window_start): count}."""
+
+    def __init__(self, app):
+        self._counts = {}
+        self._lock = threading.Lock()
+        self._next_prune = 0
+
+    def counts(self, key, window, now, hit=False):
+        start = int(now // window) * window
+        with self._lock:
+            if hit:
+                self._counts[key, start] = self._counts.get((key, start), 0) + 1
+            if now >= self._next_prune:
+                self._prune(now)
+            return self._counts.get((key, start), 0), self._counts.get((key, start - window), 0)
+
+    def take(self, key, window, now, limit, overlap):
+        """Count a hit unless it would go over `limit`: (taken, current, previous), the counts before it."""
+        start = int(now // window) * window
+        with self._lock:
+            current, previous = self._counts.get((key, start), 0), self._counts.get((key, start - window), 0)
+            taken = previous * overlap + current < limit
+            if taken:
+                self._counts[key, start] = current + 1
+            if now >= self._next_prune:
+                self._prune(now)
+        return taken, current, previous
+
+    def _prune(self, now, keep=3600):
+        for entry in [entry for entry in self._counts if entry[1] < now - keep]:
+            del self._counts[entry]
+        self._next_prune = now + 60
+
+
+class DatabaseStore:
+    """Counters shared by every worker through the rate_limit_counter table."""
+
+    _HIT = text(
+        "INSERT INTO rate_limit_counter (bucket, window_start, count) VALUES (:bucket, :window_start, 1) "
+        "ON CONFLICT (bucket, window_start) DO UPDATE SET count = rate_limit_counter.count + 1"
+    )
+    # The same, only while the window's count plus the previous window's share stays under the limit
+    _TAKE = text(
+        "INSERT INTO rate_limit_counter (bucket, window_start, count) VALUES (:bucket, :window_start, 1) "
+        "ON CONFLICT (bucket, window_start) DO UPDATE SET count = rate_limit_counter.count + 1 "
+        "WHERE rate_limit_counter.count + :carried < :limit"
+    )
+
+    def __init__(self, app):
+        self._next_prune = 0
+
+    def _count(self, connection, key, window_start):
+        return connection.execute(
+            select(RateLimitCounter.count)
+            .where(RateLimitCounter.bucket == key, RateLimitCounter.window_start == window_start)
+        ).scalar() or 0
+
+    def _prune(self, connection, now):
+        if now >= self._next_prune:
+            connection.execute(delete(RateLimitCounter).where(RateLimitCounter.window_start < now - 3600))
+            self._next_prune = now + 60
+
+    def counts(self, key, window, now, hit=False):
+        start = int(now // window) * window
+        # A connection of our own: the counts must stick even if the request rolls back
+        with db.engine.begin() as connection:
+            if hit:
+                connection.execute(self._HIT, {'bucket': key, 'window_start': start})
+            self._prune(connection, now)
+            rows = dict(connection.execute(
+                select(RateLimitCounter.window_start, RateLimitCounter.count)
+                .where(RateLimitCounter.bucket == key, RateLimitCounter.window_start.in_((start, start - window)))
+            ).all())
+        return rows.get(start, 0), rows.get(start - window, 0)
+
+    def take(self, key, window, now, limit, overlap):
+        start = int(now // window) * window
+        with db.engine.begin() as connection:
+            # The previous window is closed, so its count no longer moves
+            previous = self._count(connection, key, start - window)
+            carried = previous * overlap
+            # One conditional upsert: the check and the increment can't be split by another worker
+            taken = carried < limit and connection.execute(
+                self._TAKE, {'bucket': key, 'window_start': start, 'carried': carried, 'limit': limit}
+            ).rowcount == 1
+            self._prune(connection, now)
+            current = self._count(connection, key, start) - taken
+        return taken, current, previous
+
+
+STORES = {'memory': MemoryStore, 'database': DatabaseStore}
+
+
+class RateLimiter:
+    """Flask extension answering "may this key go ahead, and if not, for how long?"."""
+
+    def __init__(self, app):
+        kind = app.config['RATE_LIMIT_STORE']
+        if kind not in STORES:
+            raise ValueError(f'Unknown RATE_LIMIT_STORE {kind!r}')
+        self.store = STORES[kind](app)
+
+    def retry_after(self, key, limit, window, hit=False):
+        """Seconds until `key` is under `limit` hits per `window` again (0: allowed now).
+
+        With hit=True an allowed request is also counted; refused ones are not.
+        """
+        now = time.time()
+        overlap = 1 - (now % window) / window
+        if hit:
+            allowed, current, previous = self.store.take(key, window, now, limit, overlap)
+        else:
+            current, previous = self.store.counts(key, window, now)
+            allowed = previous * overlap + current < limit
+        if allowed:
+            return 0
+        # Wait for the previous window's share to decay enough, or for the next window
+        if current < limit and previous:
+            return max(1, math.ceil((1 - (limit - current) / previous - (1 - overlap)) * window))
+        return max(1, math.ceil(overlap * window))
+
+    def hit(self, key, window):
+        self.store.counts(key, window, time.time(), hit=True)
+
+
+# ---- Login throttling ---
+
+def _login_keys(username):
+    return f'login:ip:{request.remote_addr}', f'login:user:{username.strip().lower()[:64]}'
+
+
+def check_login(username):
+    """Count a login attempt from this client; seconds it must wait first (0: go ahead).
+
+    Every attempt counts against the client IP; only failures count against
+    the username (see login_failed), so a user's own logins never use it up.
+    """
+    limiter = current_app.extensions.get('ratelimit')
+    if limiter is None:
+        return 0
+    ip_key, user_key = _login_keys(username)
+    config = current_app.config
+    return (limiter.retry_after(user_key, *config['LOGIN_LIMIT_PER_USERNAME'])
+            or limiter.retry_after(ip_key, *config['LOGIN_LIMIT_PER_IP'], hit=True))
+
+
+def login_failed(username):
+    limiter = current_app.extensions.get('ratelimit')
+    if limiter is not None:
+        limiter.hit(_login_keys(username)[1], current_app.config['LOGIN_LIMIT_PER_USERNAME'][1])
+
+
+def init_app(app):
+    # Behind a reverse proxy every request comes from the proxy; trust its X-Forwarded-For
+    if app.config['TRUSTED_PROXIES']:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['TRUSTED_PROXIES'])
+    if app.config['LOGIN_RATE_LIMIT_ENABLED']:
+        app.extensions['ratelimit'] = RateLimiter(app)
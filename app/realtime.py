@@ -0,0 +1,376 @@
+"""
+Live task updates over Server-Sent Events.
+Committed task changes become small deltas (created/updated/deleted, with
+the changed fields) published on 'project:<id>' and 'user:<id>' channels.
+A per-process hub fans them out to open streams. With several workers the
+'database' broker stands in for a message broker: events are appended to
+realtime_event and one thread per process tails the table.
+"""
+
+import itertools
+import json
+import queue
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timedelta, timezone
+from flask import Response, current_app
+from sqlalchemy import delete, event, func, inspect, insert, select
+from sqlalchemy.orm import Session
+from app.extensions import db
+from app.models import RealtimeEvent, Task, User
+
+PUBLISHED_FIELDS = ('title', 'status', 'priority', 'due_date', 'project_id', 'assignee_id')
+REFRESH = {'type': 'refresh'}
+
+
+class StreamLimitReached(Exception):
+    """Raised by subscribe() when this process already serves REALTIME_MAX_STREAMS streams."""
+
+
+class Subscription:
+    """One open stream's bounded inbox; on overflow the client is told to refresh."""
+
+    def __init__(self, hub, channels, size):
+        self.hub = hub
+        self.channels = frozenset(channels)
+        self.overflowed = False
+        self._queue = queue.Queue(maxsize=size)
+
+    def put(self, item):
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.overflowed = True
+
+    def get(self, timeout):
+        if self.overflowed:
+            self.overflowed = False
+            return None, REFRESH
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class Hub:
+    """In-process fan-out from channels to subscriptions, with a short replay history."""
+
+    def __init__(self, max_streams, queue_size, history=256):
+        self.max_streams = max_streams
+        self.queue_size = queue_size
+        self._subscribers = defaultdict(set)
+        self._history = deque(maxlen=history)
+        self._streams = 0
+        self._lock = threading.Lock()
+
+    def subscribe(self, channels):
+        subscription = Subscription(self, channels, self.queue_size)
+        with self._lock:
+            if self._streams >= self.max_streams:
+                raise StreamLimitReached()
+            self._streams += 1
+            for channel in subscription.channels:
+                self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._streams -= 1
+            for channel in subscription.channels:
+                self._subscribers[channel].discard(subscription)
+                if not self._subscribers[channel]:
+                    del self._subscribers[channel]
+
+    def has_subscribers(self):
+        return bool(self._subscribers)
+
+    def dispatch(self, event_id, channel, payload):
+        with self._lock:
+            self._history.append((event_id, channel, payload))
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.put((event_id, payload))
+
+    def forget(self):
+        """Drop the history, for events published while nobody was listening."""
+        with self._lock:
+            self._history.clear()
+
+    def replay(self, channels, after_id, newest_id):
+        """Events after `after_id` on the channels, and whether the history reached back that far."""
+        with self._lock:
+            history = list(self._history)
+        if history:
+            complete = history[0][0] <= after_id + 1 <= history[-1][0] + 1
+        else:
+            complete = after_id == newest_id
+        return [(event_id, payload) for event_id, channel, payload in history
+                if event_id > after_id and channel in channels], complete
+
+
+# ---- Brokers ---
+
+class LocalBroker:
+    """Single-process broker: publishing dispatches straight to the hub."""
+
+    def __init__(self, app, hub):
+        self.hub = hub
+        # Ids count up from the boot time in microseconds: an id from before a
+        # restart is older than the new process's history, so replay asks for a refresh
+        self._ids = itertools.count(time.time_ns() // 1000)
+        self._newest = next(self._ids)
+        self._lock = threading.Lock()
+
+    def publish(self, messages):
+        with self._lock:
+            event_ids = [next(self._ids) for _ in messages]
+            self._newest = event_ids[-1]
+        if not self.hub.has_subscribers():
+            self.hub.forget()  # nobody saw these, so nobody can replay past them
+            return
+        for event_id, (channel, payload) in zip(event_ids, messages):
+            self.hub.dispatch(event_id, channel, payload)
+
+    def start(self):
+        pass
+
+    def replay(self, channels, after_id):
+        return self.hub.replay(channels, after_id, self._newest)
+
+
+class DatabaseBroker:
+    """Cross-worker broker stand-in: events are rows in realtime_event, tailed by one thread per process."""
+
+    def __init__(self, app, hub):
+        self.app = app
+        self.hub = hub
+        self._thread = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._prune_lock = threading.Lock()
+        self._next_prune = 0.0
+
+    def publish(self, messages):
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        # after_commit: the session's transaction is over, so use a connection of our own
+        with db.engine.begin() as connection:
+            connection.execute(insert(RealtimeEvent), [
+                {'channel': channel, 'payload': payload, 'created_at': now} for channel, payload in messages
+            ])
+            # Publishers prune too: processes without viewers never start a tail
+            if self._prune_due():
+                self._prune(connection, now)
+        self._wakeup.set()
+
+    def _prune_due(self):
+        # Each process prunes at most once per REALTIME_PRUNE_INTERVAL
+        with self._prune_lock:
+            if time.monotonic() < self._next_prune:
+                return False
+            self._next_prune = time.monotonic() + self.app.config['REALTIME_PRUNE_INTERVAL']
+            return True
+
+    def _prune(self, connection, now):
+        cutoff = now - timedelta(seconds=self.app.config['REALTIME_RETENTION'])
+        connection.execute(delete(RealtimeEvent).where(RealtimeEvent.created_at < cutoff))
+
+    def start(self):
+        # Tail only in processes that serve streams
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    with self.app.app_context():
+                        last_id = db.session.execute(select(func.max(RealtimeEvent.id))).scalar() or 0
+                    self._thread = threading.Thread(target=self._tail, args=(last_id,),
+                                                    name='realtime-tail', daemon=True)
+                    self._thread.start()
+
+    def replay(self, channels, after_id, limit=500):
+        rows = db.session.execute(
+            select(RealtimeEvent.id, RealtimeEvent.channel, RealtimeEvent.payload)
+            .where(RealtimeEvent.id > after_id, RealtimeEvent.channel.in_(channels))
+            .order_by(RealtimeEvent.id).limit(limit)
+        ).all()
+        # An id past the newest comes from before the table was emptied or recreated
+        newest_id = db.session.execute(select(func.max(RealtimeEvent.id))).scalar() or 0
+        db.session.close()
+        return [(row.id, row.payload) for row in rows], len(rows) < limit and after_id <= newest_id
+
+    def _tail(self, last_id):
+        config = self.app.config
+        while True:
+            self._wakeup.wait(config['REALTIME_POLL_INTERVAL'])
+            self._wakeup.clear()
+            try:
+                with self.app.app_context():
+                    rows = db.session.execute(
+                        select(RealtimeEvent.id, RealtimeEvent.channel, RealtimeEvent.payload)
+                        .where(RealtimeEvent.id > last_id).order_by(RealtimeEvent.id).limit(1000)
+                    ).all()
+                    if self._prune_due():
+                        with db.engine.begin() as connection:
+                            self._prune(connection, datetime.now(timezone.utc).replace(tzinfo=None))
+            except Exception:
+                self.app.logger.exception('Realtime tail failed to read events')
+                continue
+            for row in rows:
+                self.hub.dispatch(row.id, row.channel, row.payload)
+                last_id = row.id
+            if len(rows) == 1000:
+                self._wakeup.set()  # more waiting
+
+
+BROKERS = {'memory': LocalBroker, 'database': DatabaseBroker}
+
+
+def max_streams(config):
+    """REALTIME_MAX_STREAMS, or by default all but REALTIME_RESERVED_THREADS of the WEB_THREADS request threads."""
+    if config['REALTIME_MAX_STREAMS'] is not None:
+        return config['REALTIME_MAX_STREAMS']
+    return max(0, config['WEB_THREADS'] - config['REALTIME_RESERVED_THREADS'])
+
+
+class Realtime:
+    """Flask extension tying a hub to a broker."""
+
+    def __init__(self, app):
+        self.hub = Hub(max_streams(app.config), app.config['REALTIME_QUEUE_SIZE'])
+        kind = app.config['REALTIME_BROKER']
+        if kind not in BROKERS:
+            raise ValueError(f'Unknown REALTIME_BROKER {kind!r}')
+        self.broker = BROKERS[kind](app, self.hub)
+
+    def subscribe(self, channels):
+        self.broker.start()
+        return self.hub.subscribe(channels)
+
+    def publish(self, messages):
+        if messages:
+            self.broker.publish(messages)
+
+
+def publish_refresh(*channels):
+    """Tell the channels' pages to reload, for changes made without the ORM (bulk Core writes)."""
+    realtime = current_app.extensions.get('realtime')
+    if realtime is not None:
+        realtime.publish([(channel, REFRESH) for channel in channels])
+
+
+def _format(event_id, payload):
+    lines = [f'id: {event_id}'] if event_id is not None else []
+    lines += [f"event: {payload['type']}", f'data: {json.dumps(payload, default=str)}']
+    return '\n'.join(lines) + '\n\n'
+
+
+def stream(channels, last_event_id=None):
+    """An SSE response for the channels, replaying what a reconnecting client missed."""
+    realtime = current_app.extensions['realtime']
+    config = current_app.config
+    try:
+        subscription = realtime.subscribe(channels)
+    except StreamLimitReached:
+        return Response('Too many open streams', status=503, headers={'Retry-After': '30'})
+    backlog, complete = realtime.broker.replay(channels, last_event_id) if last_event_id is not None else ([], True)
+
+    def generate():
+        try:
+            yield f"retry: {config['REALTIME_RETRY_MS']}\n\n"
+            if not complete:
+                yield _format(None, REFRESH)
+            # After a refresh the client's id means nothing here (it may be from before a restart)
+            sent = last_event_id if complete and last_event_id is not None else 0
+            for event_id, payload in backlog:
+                yield _format(event_id, payload)
+                sent = event_id
+            # Streams end now and then so that worker threads are handed back; EventSource reconnects
+            deadline = time.monotonic() + config['REALTIME_STREAM_SECONDS']
+            while time.monotonic() < deadline:
+                item = subscription.get(timeout=config['REALTIME_KEEPALIVE'])
+                if item is None:
+                    yield ': keepalive\n\n'
+                elif item[0] is None or item[0] > sent:
+                    yield _format(*item)
+        finally:
+            subscription.close()
+
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+# ---- Collecting task deltas ---
+
+def _jsonable(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def _collect(session_):
+    messages = []
+    for kind, objects in (('task.created', session_.new), ('task.updated', session_.dirty),
+                          ('task.deleted', session_.deleted)):
+        for task in objects:
+            if not isinstance(task, Task):
+                continue
+            changes = {}
+            if kind == 'task.updated':
+                state = inspect(task)
+                for field in PUBLISHED_FIELDS:
+                    history = state.attrs[field].history
+                    if history.has_changes():
+                        old = history.deleted[0] if history.deleted else None
+                        changes[field] = [_jsonable(old), _jsonable(getattr(task, field))]
+                if not changes:
+                    continue
+            values = {field: _jsonable(getattr(task, field)) for field in PUBLISHED_FIELDS}
+            payload = {'type': kind, 'task': dict(values, id=task.id), 'changes': changes}
+
+            channels = {f'project:{task.project_id}'}
+            if task.assignee_id is not None:
+                channels.add(f'user:{task.assignee_id}')
+            for field, prefix in (('project_id', 'project'), ('assignee_id', 'user')):
+                old = changes.get(field, [None])[0]
+                if old is not None:
+                    channels.add(f'{prefix}:{old}')  # the old project/assignee sees it leave
+            messages.extend((channel, payload) for channel in sorted(channels))
+    return messages
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_task_events(session_, flush_context):
+    messages = _collect(session_)
+    if not messages:
+        return
+    # Resolve assignee names now, while the flush transaction is still usable
+    user_ids = {payload['task']['assignee_id'] for _, payload in messages} - {None}
+    names = dict(session_.connection().execute(
+        select(User.id, User.username).where(User.id.in_(user_ids))).all()) if user_ids else {}
+    for _, payload in messages:
+        payload['task']['assignee'] = names.get(payload['task']['assignee_id'])
+    session_.info.setdefault('realtime_pending', []).extend(messages)
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_task_events(session_):
+    messages = session_.info.pop('realtime_pending', None)
+    realtime = current_app.extensions.get('realtime') if current_app else None
+    if not messages or realtime is None:
+        return
+    # A commit touching many tasks (a bulk job chunk) becomes one refresh per channel
+    per_channel = defaultdict(list)
+    for channel, payload in messages:
+        per_channel[channel].append(payload)
+    limit = current_app.config['REALTIME_MAX_EVENTS_PER_COMMIT']
+    realtime.publish([(channel, payload) for channel, payloads in per_channel.items()
+                      for payload in (payloads if len(payloads) <= limit else [REFRESH])])
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _drop_task_events(session_, previous_transaction):
+    session_.info.pop('realtime_pending', None)
+
+
+def init_app(app):
+    app.extensions['realtime'] = Realtime(app)
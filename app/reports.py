@@ -0,0 +1,332 @@
+"""
+Portfolio reports for managers: status distribution, per-assignee workload,
+per-priority and per-project breakdowns, overdue ratios, weekly throughput
+and a projected burndown. Task rows are read once, in batches, into integer
+columns (category codes and day ordinals) and every figure is a bincount
+over them: NumPy kernels when it is installed, plain Python otherwise.
+NumPy is imported with the first report, not at startup.
+Built reports are cached per tenant under the 'projects' and 'members'
+data versions, which task, project and user writes bump, and the day.
+Requests never build one: on a cache miss they queue a 'build-report' job
+and poll it, so a large portfolio can't hold a request thread.
+"""
+
+import json
+import operator
+from array import array
+from collections import Counter
+from datetime import date, datetime, timedelta
+from itertools import compress, repeat
+import click
+from flask import current_app
+from sqlalchemy import select
+from app.extensions import db, cache
+from app.models import Job, Project, Task, User
+from app import jobs, tenancy
+
+numpy = None  # optional, and slower to import than the rest of the app: see load_numpy()
+_numpy_checked = False
+
+STATUSES = ('To Do', 'In Progress', 'Completed')
+PRIORITIES = ('Low', 'Medium', 'High')
+
+
+# ---- Kernels ---
+
+class PythonKernels:
+    """Column operations on array('q') columns and lists of bools."""
+    name = 'python'
+
+    def column(self, values, count):
+        return array('q', values)
+
+    def concat(self, parts):
+        column = array('q')
+        for part in parts:
+            column.extend(part)
+        return column
+
+    def compare(self, column, op, value):
+        return list(map(op, column, repeat(value)))
+
+    def both(self, mask, other):
+        return list(map(operator.and_, mask, other))
+
+    def total(self, mask):
+        return sum(mask)
+
+    def weeks(self, column, start, last):
+        """Week number of each day ordinal counted from `start`, clipped to [0, last]."""
+        return array('q', (min(max((day - start) // 7, 0), last) for day in column))
+
+    def unique(self, column):
+        values = sorted(set(column))
+        index = {value: code for code, value in enumerate(values)}
+        return values, array('q', map(index.__getitem__, column))
+
+    def count(self, codes, size, mask=None):
+        counts = [0] * size
+        for code, n in Counter(codes if mask is None else compress(codes, mask)).items():
+            counts[code] = n
+        return counts
+
+    def crosstab(self, rows, size, columns, width, mask=None):
+        table = [[0] * width for _ in range(size)]
+        pairs = zip(rows, columns)
+        for (row, column), n in Counter(pairs if mask is None else compress(pairs, mask)).items():
+            table[row][column] = n
+        return table
+
+
+class NumpyKernels:
+    """The same operations vectorized over int64 arrays."""
+    name = 'numpy'
+
+    def column(self, values, count):
+        return numpy.fromiter(values, dtype=numpy.int64, count=count)
+
+    def concat(self, parts):
+        return numpy.concatenate(parts) if parts else numpy.zeros(0, dtype=numpy.int64)
+
+    def compare(self, column, op, value):
+        return op(column, value)
+
+    def both(self, mask, other):
+        return mask & other
+
+    def total(self, mask):
+        return int(numpy.count_nonzero(mask))
+
+    def weeks(self, column, start, last):
+        return numpy.clip((column - start) // 7, 0, last)
+
+    def unique(self, column):
+        values, codes = numpy.unique(column, return_inverse=True)
+        return values.tolist(), codes.reshape(-1)
+
+    def count(self, codes, size, mask=None):
+        return numpy.bincount(codes if mask is None else codes[mask], minlength=size).tolist()
+
+    def crosstab(self, rows, size, columns, width, mask=None):
+        cells = rows * width + columns
+        counts = numpy.bincount(cells if mask is None else cells[mask], minlength=size * width)
+        return counts.reshape(size, width).tolist()
+
+
+def load_numpy():
+    """Import NumPy on first use; None when it isn't installed (the Python kernels give the same figures)."""
+    global numpy, _numpy_checked
+    if not _numpy_checked:
+        try:
+            import numpy as module
+        except ImportError:
+            module = None
+        numpy, _numpy_checked = module, True
+    return numpy
+
+
+def default_kernels():
+    return NumpyKernels() if load_numpy() is not None else PythonKernels()
+
+
+# ---- Columnar task data ---
+
+def _encoder(codes):
+    # Category code of a value, adding values not seen before (legacy statuses, None)
+    def encode(value):
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(codes)
+        return code
+    return encode
+
+
+def _ordinal(day):
+    return day.toordinal() if day is not None else 0
+
+
+class TaskFrame:
+    """Task columns as parallel integer arrays: ids, category codes and day ordinals (0: none)."""
+
+    def __init__(self, kernels, columns, statuses, priorities):
+        self.kernels = kernels
+        self.columns = columns
+        self.statuses = statuses  # category -> code
+        self.priorities = priorities
+        self.size = len(columns['status'])
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    @classmethod
+    def load(cls, kernels, project_id=None, chunk_size=None):
+        """Read the tasks (of one project, or all) batch by batch into columns."""
+        statuses = {status: code for code, status in enumerate(STATUSES)}
+        priorities = {priority: code for code, priority in enumerate(PRIORITIES)}
+        encode_status, encode_priority = _encoder(statuses), _encoder(priorities)
+
+        query = select(Task.project_id, Task.assignee_id, Task.status, Task.priority, Task.due_date,
+                       Task.updated_at)
+        if project_id is not None:
+            query = query.where(Task.project_id == project_id)
+        # The raw connection below is not scoped to the session's tenant
+        if tenancy.current() is not None:
+            query = query.where(Task.tenant_id == tenancy.current())
+        chunk_size = chunk_size or current_app.config['REPORT_CHUNK_SIZE']
+        parts = {name: [] for name in ('project', 'assignee', 'status', 'priority', 'due', 'updated')}
+        # Core rows: the ORM result layer would double the cost of the read
+        for batch in db.session.connection().execute(query.execution_options(yield_per=chunk_size)).partitions():
+            project_ids, assignee_ids, status, priority, due, updated = zip(*batch)
+            count = len(batch)
+            parts['project'].append(kernels.column(project_ids, count))
+            parts['assignee'].append(kernels.column((user_id or 0 for user_id in assignee_ids), count))
+            parts['status'].append(kernels.column(map(encode_status, status), count))
+            parts['priority'].append(kernels.column(map(encode_priority, priority), count))
+            parts['due'].append(kernels.column(map(_ordinal, due), count))
+            parts['updated'].append(kernels.column(map(_ordinal, updated), count))
+        columns = {name: kernels.concat(chunks) for name, chunks in parts.items()}
+        return cls(kernels, columns, statuses, priorities)
+
+
+# ---- Reports ---
+
+def _ratio(part, whole):
+    return round(part / whole, 4) if whole else 0.0
+
+
+def _names(id_column, name_column, ids, chunk_size=500):
+    names = {}
+    ids = [value for value in ids if value]
+    for start in range(0, len(ids), chunk_size):
+        names.update(db.session.execute(
+            select(id_column, name_column).where(id_column.in_(ids[start:start + chunk_size]))).all())
+    return names
+
+
+def _breakdown(frame, codes, keys, open_, overdue):
+    """(key, figures) for each group of tasks: totals by status, open and overdue counts."""
+    kernels, labels = frame.kernels, list(frame.statuses)
+    by_status = kernels.crosstab(codes, len(keys), frame['status'], len(labels))
+    open_counts = kernels.count(codes, len(keys), open_)
+    overdue_counts = kernels.count(codes, len(keys), overdue)
+    for code, key in enumerate(keys):
+        total = sum(by_status[code])
+        if total:
+            yield key, {'total': total, 'open': open_counts[code], 'overdue': overdue_counts[code],
+                        'overdue_ratio': _ratio(overdue_counts[code], open_counts[code]),
+                        'by_status': {label: n for label, n in zip(labels, by_status[code]) if n}}
+
+
+def build_report(project_id=None, today=None, kernels=None, weeks=None):
+    """Compute the report from the tasks (of one project, or all) as a JSON-ready dict."""
+    kernels = kernels or default_kernels()
+    today = today or date.today()
+    weeks = weeks or current_app.config['REPORT_WEEKS']
+    frame = TaskFrame.load(kernels, project_id)
+    completed = frame.statuses['Completed']
+
+    open_ = kernels.compare(frame['status'], operator.ne, completed)
+    dated_open = kernels.both(open_, kernels.compare(frame['due'], operator.gt, 0))
+    overdue = kernels.both(dated_open, kernels.compare(frame['due'], operator.lt, today.toordinal()))
+    open_total, overdue_total = kernels.total(open_), kernels.total(overdue)
+    status_counts = kernels.count(frame['status'], len(frame.statuses))
+
+    priorities = [dict(group, priority=priority) for priority, group in
+                  _breakdown(frame, frame['priority'], list(frame.priorities), open_, overdue)]
+
+    assignee_ids, assignee_codes = kernels.unique(frame['assignee'])
+    usernames = _names(User.id, User.username, assignee_ids)
+    assignees = [dict(group, assignee_id=assignee_id or None, username=usernames.get(assignee_id))
+                 for assignee_id, group in _breakdown(frame, assignee_codes, assignee_ids, open_, overdue)]
+    assignees.sort(key=lambda group: (-group['open'], -group['overdue'], group['assignee_id'] or 0))
+
+    project_ids, project_codes = kernels.unique(frame['project'])
+    project_names = _names(Project.id, Project.name, project_ids)
+    projects = [dict(group, project_id=project_id_, name=project_names.get(project_id_),
+                     percent_complete=round(group['by_status'].get('Completed', 0) * 100 / group['total'], 1))
+                for project_id_, group in _breakdown(frame, project_codes, project_ids, open_, overdue)]
+    projects.sort(key=lambda group: (-group['open'], group['project_id']))
+
+    # Weeks start on Monday; week 0 is the current one
+    monday = today - timedelta(days=today.weekday())
+    first = monday - timedelta(weeks=weeks - 1)
+
+    # Throughput: completed tasks by the week of their last change
+    done = kernels.both(kernels.compare(frame['status'], operator.eq, completed),
+                        kernels.compare(frame['updated'], operator.ge, first.toordinal()))
+    done_weeks = kernels.count(kernels.weeks(frame['updated'], first.toordinal(), weeks - 1), weeks, done)
+    throughput = [{'week': (first + timedelta(weeks=n)).isoformat(), 'completed': count}
+                  for n, count in enumerate(done_weeks)]
+
+    # Projected burndown: open tasks left after each coming week if each is done by its due date
+    # (overdue ones count against the current week, undated ones never burn down)
+    due_weeks = kernels.count(kernels.weeks(frame['due'], monday.toordinal(), weeks), weeks + 1, dated_open)
+    remaining, burndown = open_total, []
+    for n in range(weeks):
+        remaining -= due_weeks[n]
+        burndown.append({'week': (monday + timedelta(weeks=n)).isoformat(), 'remaining': remaining})
+
+    return {
+        'project_id': project_id,
+        'as_of': today.isoformat(),
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'engine': kernels.name,
+        'totals': {'tasks': frame.size, 'open': open_total, 'overdue': overdue_total,
+                   'overdue_ratio': _ratio(overdue_total, open_total),
+                   'completion_ratio': _ratio(status_counts[completed], frame.size)},
+        'status': {label: n for label, n in zip(frame.statuses, status_counts) if n},
+        'by_priority': priorities,
+        'by_assignee': assignees,
+        'by_project': projects,
+        'throughput': throughput,
+        'burndown': burndown,
+    }
+
+
+def _key(project_id, today):
+    # Versions are read before building, so a write during the build leaves a stale key behind, not a stale hit
+    return (f"report:{tenancy.current()}:{cache.version('projects')}:{cache.version('members')}:{today}:"
+            f"{project_id if project_id is not None else 'all'}")
+
+
+def report(project_id=None):
+    """The report, from the cache while no task, project or member has changed today."""
+    today = date.today()
+    return cache.get_or_render(_key(project_id, today), lambda: build_report(project_id, today),
+                               ttl=current_app.config['REPORT_CACHE_TTL'])
+
+
+def cached_report(project_id=None):
+    """The report if the cache has it, else None."""
+    return cache.get(_key(project_id, date.today()))
+
+
+@jobs.handler('build-report')
+def build_report_job(tenant_id, project_id=None):
+    """Build (and cache) a tenant's report; the report is also the job's result."""
+    tenancy.use(tenant_id)
+    return report(project_id)
+
+
+def request_build(project_id, user_id):
+    """The user's queued or running build of this report, or a newly queued one."""
+    payload = {'tenant_id': tenancy.current(), 'project_id': project_id}
+    pending = Job.query.filter(Job.created_by == user_id, Job.kind == 'build-report',
+                               Job.status.in_(('queued', 'running')))
+    for job in pending:
+        if job.payload == payload:
+            return job
+    return jobs.enqueue('build-report', payload, user_id=user_id)
+
+
+def init_app(app):
+    @app.cli.command('export-report')
+    @click.option('--project', 'project_id', type=int, help='Report on one project only.')
+    @click.option('--tenant', 'tenant_id', type=int, help="Report on one tenant's tasks (default: all tenants).")
+    @click.option('--output', type=click.File('w', encoding='utf-8'), default='-',
+                  help='File to write the JSON to (default stdout).')
+    def export_report_command(project_id, tenant_id, output):
+        """Write the task report as JSON."""
+        tenancy.use(tenant_id)
+        json.dump(build_report(project_id), output, indent=2)
+        output.write('\n')
@@ -0,0 +1,36 @@
+"""
+Keeps the database schema current through the Alembic migrations in
+/migrations. Nothing here runs on a normal app start: schema changes happen
+through `flask init-db` / `flask db upgrade`, the dev server in run.py, or
+at startup only when AUTO_MIGRATE is set. Databases created by the old
+db.create_all() startup are adopted by stamping them at the initial
+revision first.
+
+Importing this module pulls in Flask-Migrate and Alembic (~200ms), which
+is why create_app only loads it on demand.
+"""
+
+import os
+from flask_migrate import Migrate, stamp, upgrade
+from sqlalchemy import inspect
+from app.extensions import db
+
+# Revision matching the tables the original create_all() produced
+BASELINE_REVISION = 'aa3845aee1d3'
+
+migrate = Migrate()
+
+
+def init_app(app):
+    migrate.init_app(app, db, directory=os.path.join(os.path.dirname(app.root_path), 'migrations'),
+                     render_as_batch=True)
+
+
+def upgrade_database(app):
+    """Apply pending migrations to the app's database (needs an app context)."""
+    if 'migrate' not in app.extensions:
+        init_app(app)
+    inspector = inspect(db.engine)
+    if inspector.has_table('user') and not inspector.has_table('alembic_version'):
+        stamp(revision=BASELINE_REVISION)
+    upgrade()
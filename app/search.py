@@ -0,0 +1,237 @@
+"""
+Full-text search over projects and tasks.
+Keeps a search index (an FTS5 virtual table on SQLite, a tsvector table on
+PostgreSQL) in sync through SQLAlchemy model events and serves ranked
+results for the /search page and the project list search box. The index is
+shared by all tenants; searches keep only the session tenant's hits.
+"""
+
+import re
+from collections import namedtuple
+import click
+from sqlalchemy import event, inspect, text, bindparam, column, Integer
+from app.extensions import db
+from app.models import Project, Task
+from app import tenancy
+
+# Document kinds stored in the index; on SQLite the kind is folded into the
+# rowid (ref_id * 2 + kind) so updates and deletes are primary-key lookups
+KINDS = {'project': 0, 'task': 1}
+
+SearchHit = namedtuple('SearchHit', ['kind', 'ref_id', 'title', 'rank'])
+
+
+def _is_postgres(bind):
+    return bind.dialect.name == 'postgresql'
+
+
+# ---- Query building ---
+
+def _tokens(term):
+    return re.findall(r'\w+', term or '')
+
+
+def _match_expression(term, postgres):
+    """Turn free text into a prefix-matching query for the backend, or None."""
+    tokens = _tokens(term)
+    if not tokens:
+        return None
+    if postgres:
+        return ' & '.join(f'{token}:*' for token in tokens)
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def matching_ids(kind, term):
+    """
+    Return a SELECT of ids of the given kind that match `term`, for use in
+    `Model.id.in_(...)` filters. Matches nothing when the term has no words.
+    """
+    postgres = _is_postgres(db.session.get_bind())
+    query = _match_expression(term, postgres)
+    if query is None:
+        return text('SELECT NULL WHERE 1 = 0').columns(column('ref_id', Integer))
+    if postgres:
+        sql = ("SELECT ref_id FROM search_index WHERE kind = :kind "
+               "AND document @@ to_tsquery('english', :query)")
+        params = {'kind': kind, 'query': query}
+    else:
+        sql = ("SELECT rowid / 2 AS ref_id FROM search_index "
+               "WHERE search_index MATCH :query AND rowid % 2 = :kind")
+        params = {'kind': KINDS[kind], 'query': query}
+    return text(sql).bindparams(**params).columns(column('ref_id', Integer))
+
+
+def _tenant_filter(postgres):
+    """SQL keeping the hits on the :tenant tenant's rows, one primary-key lookup per hit."""
+    kind = "search_index.kind = '{name}'" if postgres else 'search_index.rowid % 2 = {code}'
+    ref_id = 'search_index.ref_id' if postgres else 'search_index.rowid / 2'
+    return ' AND (' + ' OR '.join(
+        f"({kind.format(name=name, code=code)} AND EXISTS (SELECT 1 FROM {name} "
+        f"WHERE {name}.id = {ref_id} AND {name}.tenant_id = :tenant))"
+        for name, code in KINDS.items()) + ')'
+
+
+def search(term, kinds=('project', 'task'), limit=50):
+    """Return SearchHits for `term`, best match first (titles weigh more)."""
+    postgres = _is_postgres(db.session.get_bind())
+    query = _match_expression(term, postgres)
+    if query is None or not kinds:
+        return []
+    tenant_id = tenancy.current()
+    scope = _tenant_filter(postgres) if tenant_id is not None else ''
+
+    if postgres:
+        sql = text(
+            "SELECT kind, ref_id, title, "
+            "ts_rank(document, to_tsquery('english', :query)) AS rank "
+            "FROM search_index WHERE document @@ to_tsquery('english', :query) "
+            "AND kind IN :kinds" + scope + " ORDER BY rank DESC LIMIT :limit"
+        ).bindparams(bindparam('kinds', expanding=True))
+        params = {'query': query, 'kinds': list(kinds), 'limit': limit, 'tenant': tenant_id}
+        rows = db.session.execute(sql, params)
+        return [SearchHit(kind, ref_id, title, rank) for kind, ref_id, title, rank in rows]
+
+    names = {code: name for name, code in KINDS.items()}
+    sql = text(
+        "SELECT rowid, title, bm25(search_index, 10.0, 1.0) AS rank "
+        "FROM search_index WHERE search_index MATCH :query AND rowid % 2 IN :kinds" + scope +
+        " ORDER BY rank LIMIT :limit"
+    ).bindparams(bindparam('kinds', expanding=True))
+    params = {'query': query, 'kinds': [KINDS[kind] for kind in kinds], 'limit': limit, 'tenant': tenant_id}
+    rows = db.session.execute(sql, params)
+    # bm25() is lower-is-better; flip it so rank is higher-is-better everywhere
+    return [SearchHit(names[rowid % 2], rowid // 2, title, -rank) for rowid, title, rank in rows]
+
+
+def load_hits(hits):
+    """Resolve SearchHits to (kind, model) pairs in rank order with two queries."""
+    ids = {'project': [], 'task': []}
+    for hit in hits:
+        ids[hit.kind].append(hit.ref_id)
+    objects = {}
+    if ids['project']:
+        objects.update((('project', p.id), p) for p in Project.query.filter(Project.id.in_(ids['project'])))
+    if ids['task']:
+        objects.update((('task', t.id), t) for t in Task.query.filter(Task.id.in_(ids['task'])))
+    return [(hit.kind, objects[(hit.kind, hit.ref_id)]) for hit in hits if (hit.kind, hit.ref_id) in objects]
+
+
+# ---- Index maintenance ---
+
+def index_documents(connection, kind, documents):
+    """Add or replace index entries from (ref_id, title, body) tuples in one executemany."""
+    params = [{'kind': kind, 'ref_id': ref_id, 'title': title or '', 'body': body or '',
+               'rowid': ref_id * 2 + KINDS[kind]} for ref_id, title, body in documents]
+    if not params:
+        return
+    if _is_postgres(connection):
+        connection.execute(text(
+            "INSERT INTO search_index (kind, ref_id, title, body, document) "
+            "VALUES (:kind, :ref_id, :title, :body, "
+            "setweight(to_tsvector('english', :title), 'A') || setweight(to_tsvector('english', :body), 'B')) "
+            "ON CONFLICT (kind, ref_id) DO UPDATE SET title = excluded.title, "
+            "body = excluded.body, document = excluded.document"
+        ), params)
+    else:
+        connection.execute(text("DELETE FROM search_index WHERE rowid = :rowid"), params)
+        connection.execute(text(
+            "INSERT INTO search_index (rowid, title, body) VALUES (:rowid, :title, :body)"
+        ), params)
+
+
+def remove_documents(connection, kind, ref_ids):
+    """Drop the index entries of the given ids in one executemany."""
+    params = [{'kind': kind, 'ref_id': ref_id, 'rowid': ref_id * 2 + KINDS[kind]} for ref_id in ref_ids]
+    if not params:
+        return
+    if _is_postgres(connection):
+        connection.execute(text("DELETE FROM search_index WHERE kind = :kind AND ref_id = :ref_id"), params)
+    else:
+        connection.execute(text("DELETE FROM search_index WHERE rowid = :rowid"), params)
+
+
+def _remove(connection, kind, ref_id):
+    remove_documents(connection, kind, [ref_id])
+
+
+def rebuild_index(connection):
+    """Repopulate the whole index from the project and task tables."""
+    connection.execute(text("DELETE FROM search_index"))
+    if _is_postgres(connection):
+        for kind, table, title in (('project', 'project', 'name'), ('task', 'task', 'title')):
+            connection.execute(text(
+                f"INSERT INTO search_index (kind, ref_id, title, body, document) "
+                f"SELECT '{kind}', id, {title}, coalesce(description, ''), "
+                f"setweight(to_tsvector('english', {title}), 'A') || "
+                f"setweight(to_tsvector('english', coalesce(description, '')), 'B') FROM {table}"
+            ))
+    else:
+        for kind, table, title in (('project', 'project', 'name'), ('task', 'task', 'title')):
+            connection.execute(text(
+                f"INSERT INTO search_index (rowid, title, body) "
+                f"SELECT id * 2 + {KINDS[kind]}, {title}, coalesce(description, '') FROM {table}"
+            ))
+
+
+def create_index(connection):
+    """Create the search index if it is missing and fill it; returns True if created."""
+    if inspect(connection).has_table('search_index'):
+        return False
+    if _is_postgres(connection):
+        connection.execute(text(
+            "CREATE TABLE search_index (kind VARCHAR(16) NOT NULL, ref_id INTEGER NOT NULL, "
+            "title TEXT NOT NULL, body TEXT NOT NULL, document TSVECTOR NOT NULL, "
+            "PRIMARY KEY (kind, ref_id))"
+        ))
+        connection.execute(text("CREATE INDEX ix_search_index_document ON search_index USING GIN (document)"))
+    else:
+        connection.execute(text(
+            "CREATE VIRTUAL TABLE search_index USING fts5(title, body, tokenize = 'porter unicode61')"
+        ))
+    rebuild_index(connection)
+    return True
+
+
+@event.listens_for(db.metadata, 'after_create')
+def _create_index_with_tables(target, connection, **kw):
+    create_index(connection)
+
+
+def _fields_changed(target, *fields):
+    state = inspect(target)
+    return any(state.attrs[field].history.has_changes() for field in fields)
+
+
+@event.listens_for(Project, 'after_insert')
+@event.listens_for(Project, 'after_update')
+def _index_project(mapper, connection, target):
+    if _fields_changed(target, 'name', 'description'):
+        index_documents(connection, 'project', [(target.id, target.name, target.description)])
+
+
+@event.listens_for(Task, 'after_insert')
+@event.listens_for(Task, 'after_update')
+def _index_task(mapper, connection, target):
+    if _fields_changed(target, 'title', 'description'):
+        index_documents(connection, 'task', [(target.id, target.title, target.description)])
+
+
+@event.listens_for(Project, 'after_delete')
+def _unindex_project(mapper, connection, target):
+    _remove(connection, 'project', target.id)
+
+
+@event.listens_for(Task, 'after_delete')
+def _unindex_task(mapper, connection, target):
+    _remove(connection, 'task', target.id)
+
+
+def init_app(app):
+    # CLI command to rebuild the index after bulk loads or manual SQL edits
+    @app.cli.command('reindex-search')
+    def reindex_search():
+        """Rebuild the full-text search index."""
+        with db.engine.begin() as connection:
+            if not create_index(connection):
+                rebuild_index(connection)
+        click.echo('Search index rebuilt.')
@@ -0,0 +1,122 @@
+"""
+Tenants (workspaces) sharing one instance, e.g. departments.
+Requests run with the logged-in user's tenant in the session, and every ORM
+statement on Project, Task or User in that session gets a tenant_id
+criterion (with_loader_criteria), so views, the API and helpers see only
+the tenant's rows without filtering for it themselves. Flushed rows are
+stamped with the session's tenant; tasks always take their project's.
+Sessions without a tenant (the login lookup, CLI commands, background jobs)
+are unscoped, as are statements run with all_tenants=True and Core
+statements on a raw connection, which filter on current() themselves.
+Process-wide figures (/metrics, /cache/stats) belong to operators: the
+admins of OPERATOR_TENANT_ID, the tenant that runs the instance.
+"""
+
+import click
+from flask import current_app, request
+from flask_login import current_user
+from sqlalchemy import event, inspect, insert, select
+from sqlalchemy.orm import Session, with_loader_criteria
+from app.extensions import db
+from app.models import Project, Task, Tenant, TenantMixin, User
+
+# Rows created outside any tenant (and every row from before tenants) belong here
+DEFAULT_TENANT_ID = 1
+DEFAULT_TENANT_NAME = 'Default'
+
+
+def current():
+    """The tenant id the session works for, or None when it is unscoped."""
+    return db.session.info.get('tenant_id')
+
+
+def use(tenant_id):
+    """Scope the current session to a tenant (None: unscoped)."""
+    db.session.info['tenant_id'] = tenant_id
+
+
+def project_tenant(project_id):
+    """The tenant id of a project, for Core inserts of its tasks."""
+    return db.session.execute(
+        select(Project.tenant_id).where(Project.id == project_id).execution_options(all_tenants=True)
+    ).scalar()
+
+
+# ---- Scoping ---
+
+@event.listens_for(Session, 'do_orm_execute')
+def _scope_statement(state):
+    tenant_id = state.session.info.get('tenant_id')
+    if (tenant_id is None or state.is_column_load or state.is_relationship_load
+            or not (state.is_select or state.is_update or state.is_delete)
+            or state.execution_options.get('all_tenants')):
+        return
+    # Relationship loads inherit the criteria from the statement that loaded their parents
+    state.statement = state.statement.options(
+        with_loader_criteria(TenantMixin, lambda cls: cls.tenant_id == tenant_id, include_aliases=True))
+
+
+@event.listens_for(Session, 'before_flush')
+def _stamp_tenant(session_, flush_context, instances):
+    tenant_id = session_.info.get('tenant_id') or DEFAULT_TENANT_ID
+    for obj in session_.new:
+        if isinstance(obj, TenantMixin) and not isinstance(obj, Task) and obj.tenant_id is None:
+            obj.tenant_id = tenant_id
+    # After projects, so that a task added with its new project finds the project's tenant
+    for task in list(session_.new) + list(session_.dirty):
+        if not isinstance(task, Task):
+            continue
+        state = inspect(task)
+        reassigned = state.attrs.project.history.has_changes()
+        if task in session_.dirty and not (reassigned or state.attrs.project_id.history.has_changes()):
+            continue
+        with session_.no_autoflush:
+            project = task.project if reassigned or task.project_id is None else session_.get(
+                Project, task.project_id, execution_options={'all_tenants': True})
+        if project is not None:
+            task.tenant_id = project.tenant_id
+
+
+def user_tenant(user_id):
+    """The tenant id of a user, whichever tenant the session works for."""
+    return db.session.execute(
+        select(User.tenant_id).where(User.id == user_id).execution_options(all_tenants=True)
+    ).scalar()
+
+
+def is_operator(user):
+    """Whether a user may see data that spans tenants: an admin of OPERATOR_TENANT_ID."""
+    return (user.is_authenticated and user.role == 'admin'
+            and user.tenant_id == current_app.config['OPERATOR_TENANT_ID'])
+
+
+@event.listens_for(Tenant.__table__, 'after_create')
+def _create_default_tenant(target, connection, **kw):
+    connection.execute(insert(Tenant), {'id': DEFAULT_TENANT_ID, 'name': DEFAULT_TENANT_NAME})
+
+
+def init_app(app):
+    # Scope each request to the logged-in user's tenant (the login itself runs unscoped)
+    @app.before_request
+    def _use_request_tenant():
+        if request.endpoint != 'static' and current_user.is_authenticated:
+            use(current_user.tenant_id)
+
+    @app.cli.command('create-tenant')
+    @click.argument('name')
+    @click.argument('admin_username')
+    @click.password_option(help="The admin's password.")
+    def create_tenant_command(name, admin_username, password):
+        """Create a tenant with its first admin, who can then register its other users."""
+        if Tenant.query.filter_by(name=name).first():
+            raise click.BadParameter(f'A tenant named {name!r} already exists.', param_hint='NAME')
+        if User.query.filter_by(username=admin_username).first():
+            raise click.BadParameter(f'Username {admin_username!r} is taken.', param_hint='ADMIN_USERNAME')
+        tenant = Tenant(name=name)
+        db.session.add(tenant)
+        db.session.flush()
+        admin = User(username=admin_username, role='admin', tenant_id=tenant.id)
+        admin.set_password(password)
+        db.session.add(admin)
+        db.session.commit()
+        click.echo(f'Created tenant {tenant.id} ({name}) with admin {admin_username}.')
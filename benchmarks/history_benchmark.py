@@ -0,0 +1,180 @@
+"""
+Task history at scale. Writes a synthetic log of millions of task events
+(creations, then status, priority and assignee changes and a few deletes,
+spread over --days days) to a throwaway SQLite database, then measures:
+- append throughput: batched executemany into task_event, and ORM task
+  updates with and without the history listener
+- point-in-time latency: state_at() for random projects and times and for
+  all tasks, replaying the log alone and again after weekly snapshots
+  (checking that both give the same states)
+- a daily burndown of one project with status_series()
+
+Usage: python benchmarks/history_benchmark.py [--events 2000000] [--tasks 20000]
+           [--projects 400] [--days 180] [--queries 50]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event, func, insert, select  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+from config import DevelopmentConfig  # noqa: E402
+from app import create_app, history  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models import Project, Task, TaskEvent, User  # noqa: E402
+
+BATCH = 10_000
+STATUSES = ('To Do', 'In Progress', 'Completed')
+PRIORITIES = ('Low', 'Medium', 'High')
+
+
+def synthetic_events(args, start, rng):
+    """Yield events in log order: every task's creation first, then changes to live tasks."""
+    step = timedelta(days=args.days) / args.events
+    live = {}
+    for n in range(args.events):
+        occurred_at = start + step * n
+        if n < args.tasks:
+            task_id = n + 1
+            live[task_id] = state = {'project_id': rng.randrange(1, args.projects + 1), 'status': 'To Do',
+                                     'priority': rng.choice(PRIORITIES), 'assignee_id': rng.randrange(1, 201),
+                                     'due_date': (start + timedelta(days=rng.randrange(args.days + 60))).date()}
+            yield dict(state, task_id=task_id, kind='created', occurred_at=occurred_at)
+            continue
+        task_id = rng.randrange(1, args.tasks + 1)
+        state = live.get(task_id)
+        if state is None:
+            continue
+        roll = rng.random()
+        if roll < 0.001:
+            del live[task_id]
+            yield dict(state, task_id=task_id, kind='deleted', occurred_at=occurred_at)
+            continue
+        if roll < 0.6:
+            state['status'] = rng.choice(STATUSES)
+        elif roll < 0.8:
+            state['priority'] = rng.choice(PRIORITIES)
+        else:
+            state['assignee_id'] = rng.randrange(1, 201)
+        yield dict(state, task_id=task_id, kind='updated', occurred_at=occurred_at)
+
+
+def append_log(args, start, rng):
+    batch, written, elapsed = [], 0, 0.0
+    for row in synthetic_events(args, start, rng):
+        batch.append(row)
+        if len(batch) == BATCH:
+            began = time.perf_counter()
+            db.session.execute(insert(TaskEvent), batch)
+            db.session.commit()
+            elapsed += time.perf_counter() - began
+            written += len(batch)
+            batch = []
+    if batch:
+        began = time.perf_counter()
+        db.session.execute(insert(TaskEvent), batch)
+        db.session.commit()
+        elapsed += time.perf_counter() - began
+        written += len(batch)
+    return written, elapsed
+
+
+def orm_updates(tasks, rounds, per_commit):
+    began = time.perf_counter()
+    for n in range(rounds):
+        for task in tasks[:per_commit]:
+            task.status = STATUSES[(STATUSES.index(task.status) + 1) % len(STATUSES)]
+        db.session.commit()
+        tasks = tasks[per_commit:] + tasks[:per_commit]
+    return rounds * per_commit / (time.perf_counter() - began)
+
+
+def latencies(calls):
+    samples, results = [], []
+    for call in calls:
+        began = time.perf_counter()
+        results.append(call())
+        samples.append((time.perf_counter() - began) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[max(0, int(len(samples) * 0.95) - 1)], results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--events', type=int, default=2_000_000)
+    parser.add_argument('--tasks', type=int, default=20_000)
+    parser.add_argument('--projects', type=int, default=400)
+    parser.add_argument('--days', type=int, default=180)
+    parser.add_argument('--queries', type=int, default=50)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='pm-history-bench-')
+
+    class BenchConfig(DevelopmentConfig):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+        JOBS_RUN_IN_PROCESS = False
+        INSTRUMENTATION_ENABLED = False
+        TASK_SNAPSHOT_KEEP = 1000
+
+    app = create_app(BenchConfig)
+    rng = random.Random(7)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    start = now - timedelta(days=args.days + 1)
+    with app.app_context():
+        db.create_all()
+
+        written, elapsed = append_log(args, start, rng)
+        print(f'appended {written} events in batches of {BATCH}: {written / elapsed:,.0f} events/s')
+
+        # ORM writes on real tasks, timestamped after the synthetic log and numbered past it
+        owner = User(username='bench', role='manager', password_hash='-')
+        project = Project(id=args.projects + 1, name='bench', status='Active', manager=owner)
+        db.session.add_all([owner, project])
+        db.session.commit()
+        tasks = [Task(id=args.tasks + n + 1, title=f'task {n}', project=project, status='To Do') for n in range(1000)]
+        db.session.add_all(tasks)
+        db.session.commit()
+        with_log = orm_updates(tasks, 20, 100)
+        event.remove(Session, 'after_flush', history._record_flushed)
+        without_log = orm_updates(tasks, 20, 100)
+        event.listen(Session, 'after_flush', history._record_flushed)
+        print(f'ORM status updates, 100 per commit: {with_log:,.0f}/s with history, '
+              f'{without_log:,.0f}/s without ({(without_log / with_log - 1) * 100:.0f}% overhead)')
+
+        total = db.session.execute(select(func.count()).select_from(TaskEvent)).scalar()
+        queries = [(rng.randrange(1, args.projects + 1), start + timedelta(seconds=rng.uniform(0, args.days * 86400)))
+                   for _ in range(args.queries)]
+        everything = [start + timedelta(days=args.days * fraction) for fraction in (0.3, 0.6, 0.9)]
+
+        def measure(label):
+            p50, p95, states = latencies([lambda q=q: history.state_at(q[1], q[0]) for q in queries])
+            all_p50, _, all_states = latencies([lambda t=t: history.state_at(t) for t in everything])
+            print(f'{label:>22}: project at T p50 {p50:7.1f} ms p95 {p95:7.1f} ms | all tasks at T p50 {all_p50:8.1f} ms')
+            return states, all_states
+
+        print(f'{total:,} events, {args.tasks} tasks in {args.projects} projects over {args.days} days')
+        replayed = measure('log only')
+
+        began = time.perf_counter()
+        snapshots = 0
+        for week in range(1, args.days // 7 + 1):
+            if history.take_snapshot(start + timedelta(weeks=week))['snapshot']:
+                snapshots += 1
+        print(f'took {snapshots} weekly snapshots in {time.perf_counter() - began:.1f}s')
+        print(f'states match: {measure("weekly snapshots") == replayed}')
+
+        days = [now - timedelta(days=n) for n in range(30, -1, -1)]
+        p50, _, _ = latencies([lambda: history.status_series(days, 1)] * 5)
+        print(f'30-day daily burndown of one project: {p50:.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
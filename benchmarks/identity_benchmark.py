@@ -0,0 +1,81 @@
+"""
+Measures per-request latency of an authenticated page with and without the
+identity cache in front of Flask-Login's user loader.
+
+Usage: python benchmarks/identity_benchmark.py [--requests 2000] [--users 1000]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event, insert
+from werkzeug.security import generate_password_hash
+from config import DevelopmentConfig
+from app import create_app, tenancy
+from app.extensions import db
+from app.models import User
+
+
+def run(cache_size, requests, users):
+    workdir = tempfile.mkdtemp(prefix='pm-identity-bench-')
+
+    class BenchConfig(DevelopmentConfig):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+        WTF_CSRF_ENABLED = False
+        IDENTITY_CACHE_SIZE = cache_size
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        password_hash = generate_password_hash('benchmark')
+        db.session.execute(insert(User), [
+            {'username': f'user{i}', 'role': 'member', 'password_hash': password_hash,
+             'tenant_id': tenancy.DEFAULT_TENANT_ID}
+            for i in range(users)
+        ])
+        db.session.commit()
+
+        queries = []
+        event.listen(db.engine, 'before_cursor_execute', lambda *args: queries.append(1))
+
+    client = app.test_client()
+    client.post('/login', data={'username': 'user0', 'password': 'benchmark'})
+    client.get('/home')  # warm up templates and the cache
+
+    samples = []
+    queries.clear()
+    for _ in range(requests):
+        start = time.perf_counter()
+        client.get('/home')
+        samples.append((time.perf_counter() - start) * 1e6)
+
+    samples.sort()
+    return {
+        'p50': statistics.median(samples),
+        'p95': samples[int(len(samples) * 0.95)],
+        'mean': statistics.fmean(samples),
+        'queries': len(queries) / requests,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--users', type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f'requests={args.requests} users={args.users}')
+    for label, size in (('no cache', 0), ('identity cache', 4096)):
+        result = run(size, args.requests, args.users)
+        print(f"{label:>15}: p50 {result['p50']:7.1f} us  p95 {result['p95']:7.1f} us  "
+              f"mean {result['mean']:7.1f} us  {result['queries']:.2f} queries/request")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+"""
+Load test: starts gunicorn (wsgi:app with gunicorn.conf.py) against a seeded
+SQLite database at several worker counts and reports requests per second
+and latency from concurrent logged-in HTTP clients.
+
+Usage: python benchmarks/load_test.py [--workers 1 2 4] [--threads 4]
+                                      [--clients 16] [--duration 10]
+"""
+
+import argparse
+import http.client
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PATHS = ['/projects', '/dashboard', '/projects/1/detail']
+
+
+def seed(database_url, projects=200, tasks_per_project=20):
+    from datetime import date, timedelta
+    from sqlalchemy import insert
+    from werkzeug.security import generate_password_hash
+    from config import DevelopmentConfig
+    from app import create_app
+    from app.extensions import db
+    from app.models import User, Project, Task
+
+    class SeedConfig(DevelopmentConfig):
+        SQLALCHEMY_DATABASE_URI = database_url
+
+    app = create_app(SeedConfig)
+    with app.app_context():
+        db.create_all()
+        user = User(username='loadtest', role='manager', password_hash=generate_password_hash('loadtest'))
+        db.session.add(user)
+        db.session.commit()
+        today = date.today()
+        db.session.execute(insert(Project), [
+            {'name': f'Project {i}', 'status': 'Active', 'manager_id': user.id, 'tenant_id': user.tenant_id,
+             'deadline': today + timedelta(days=i % 90)}
+            for i in range(projects)
+        ])
+        db.session.execute(insert(Task), [
+            {'title': f'Task {p}-{t}', 'project_id': p + 1, 'assignee_id': user.id,
+             'status': ('To Do', 'In Progress', 'Completed')[t % 3], 'due_date': today + timedelta(days=t),
+             'tenant_id': user.tenant_id}
+            for p in range(projects) for t in range(tasks_per_project)
+        ])
+        db.session.commit()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_until_up(port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('gunicorn did not start')
+
+
+class Client:
+    """One keep-alive HTTP connection with a logged-in session cookie."""
+
+    def __init__(self, port, headers=None):
+        self.conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        self.cookie = ''
+        self.response = None
+        self.headers = headers or {}  # sent with every request, e.g. X-Forwarded-For
+
+    def request(self, method, path, body=None):
+        headers = dict(self.headers, Cookie=self.cookie)
+        if body is not None:
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        self.conn.request(method, path, body=body, headers=headers)
+        response = self.response = self.conn.getresponse()
+        data = response.read()
+        cookie = response.getheader('Set-Cookie')
+        if cookie:
+            self.cookie = cookie.split(';', 1)[0]
+        return response.status, data
+
+    def login_body(self, username='loadtest', password='loadtest'):
+        """Form body for POST /login, with a fresh CSRF token from the login page."""
+        _, page = self.request('GET', '/login')
+        token = re.search(rb'name="csrf_token" type="hidden" value="([^"]+)"', page).group(1).decode()
+        return urllib.parse.urlencode({'csrf_token': token, 'username': username, 'password': password})
+
+    def login(self, username='loadtest', password='loadtest'):
+        self.request('POST', '/login', self.login_body(username, password))
+
+
+def drive(port, clients, duration):
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    # Log every client in up front so password hashing stays out of the numbers
+    sessions = [Client(port) for _ in range(clients)]
+    for client in sessions:
+        client.login()
+    stop_at = time.time() + duration
+
+    def worker(index):
+        client = sessions[index]
+        local, failed = [], 0
+        i = index
+        while time.time() < stop_at:
+            start = time.perf_counter()
+            status, _ = client.request('GET', PATHS[i % len(PATHS)])
+            local.append((time.perf_counter() - start) * 1000)
+            failed += status != 200
+            i += 1
+        with lock:
+            latencies.extend(local)
+            errors.append(failed)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(clients)]
+    started = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - started
+
+    latencies.sort()
+    return {
+        'rps': len(latencies) / elapsed,
+        'p50': statistics.median(latencies),
+        'p95': latencies[int(len(latencies) * 0.95)],
+        'errors': sum(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='pm-load-test-')
+    database_url = 'sqlite:///' + os.path.join(workdir, 'load.db')
+    seed(database_url)
+
+    print(f'threads/worker={args.threads} clients={args.clients} duration={args.duration}s paths={PATHS}')
+    for workers in args.workers:
+        port = free_port()
+        env = dict(os.environ, DATABASE_URL=database_url, APP_ENV='development', PORT=str(port),
+                   WEB_CONCURRENCY=str(workers), WEB_THREADS=str(args.threads))
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_until_up(port)
+            result = drive(port, args.clients, args.duration)
+        finally:
+            server.terminate()
+            server.wait()
+        print(f"workers={workers}: {result['rps']:8.1f} req/s  p50 {result['p50']:6.1f} ms  "
+              f"p95 {result['p95']:6.1f} ms  errors {result['errors']}")
+
+
+if __name__ == '__main__':
+    main()
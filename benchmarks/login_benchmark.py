@@ -0,0 +1,162 @@
+"""
+Login under attack: runs gunicorn against a seeded database while attacker
+threads post wrong passwords to /login, and measures what real users see
+(page latency and throughput, and how long their own logins take). Each
+scenario runs without an attack, with the old unthrottled path (no rate
+limit, hashing unbounded) and with the login protections on.
+Attack kinds: 'stuffing' spreads attempts over many IPs and usernames,
+'single' comes from one IP.
+
+Usage: python benchmarks/login_benchmark.py [--tasks 1000] [--db PATH]
+           [--attack stuffing|single] [--attackers 16] [--clients 4]
+           [--workers 2] [--threads 4] [--duration 10] [--output results.json]
+"""
+
+import argparse
+import collections
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import seed as seeder  # noqa: E402
+from load_test import Client, free_port, wait_until_up  # noqa: E402
+from route_benchmark import percentile  # noqa: E402
+
+# name -> (attack on?, extra environment for the server)
+SCENARIOS = {
+    'no attack': (False, {}),
+    'attack, unprotected': (True, {'LOGIN_RATE_LIMIT_ENABLED': '0', 'PASSWORD_HASH_WORKERS': '64',
+                                   'PASSWORD_HASH_MAX_PENDING': '100000'}),
+    'attack, protected': (True, {}),
+}
+PAGE = '/dashboard'
+LOGIN_EVERY = 50  # each real user logs in again (as if from another device) every this many page views
+
+
+def attacker(port, kind, users, stop, statuses, lock, seed_value):
+    rng = random.Random(seed_value)
+    address = f'203.0.113.{seed_value % 250 + 1}'
+    while not stop.is_set():
+        if kind == 'stuffing':
+            address = f'{rng.randrange(1, 224)}.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}'
+        # Seeded users other than the one real users log in as, and names that don't exist
+        username = f'user{rng.randrange(1, users)}' if rng.random() < 0.5 else f'guess{rng.randrange(10 ** 6)}'
+        client = Client(port, {'X-Forwarded-For': address})
+        try:
+            status, _ = client.request('POST', '/login', client.login_body(username, 'guess'))
+        except (OSError, AttributeError):
+            status = 'error'
+        with lock:
+            statuses[status] += 1
+
+
+def real_user(port, index, stop, pages, logins, lock):
+    client = Client(port, {'X-Forwarded-For': f'198.51.100.{index + 1}'})
+    client.login(seeder.LOGIN_USER, seeder.PASSWORD)
+    local_pages, local_logins, count = [], [], 0
+    while not stop.is_set():
+        count += 1
+        if count % LOGIN_EVERY == 0:
+            client.headers['X-Forwarded-For'] = f'198.51.{index % 256}.{count // LOGIN_EVERY % 254 + 1}'
+            body = client.login_body(seeder.LOGIN_USER, seeder.PASSWORD)
+            start = time.perf_counter()
+            status, _ = client.request('POST', '/login', body)
+            local_logins.append(((time.perf_counter() - start) * 1000, status))
+            continue
+        start = time.perf_counter()
+        status, _ = client.request('GET', PAGE)
+        local_pages.append(((time.perf_counter() - start) * 1000, status))
+    with lock:
+        pages.extend(local_pages)
+        logins.extend(local_logins)
+
+
+def summarize(samples, elapsed):
+    latencies = sorted(ms for ms, _ in samples)
+    if not latencies:
+        return {'requests': 0}
+    return {'requests': len(latencies), 'rps': round(len(latencies) / elapsed, 1),
+            'p50_ms': round(percentile(latencies, 50), 1), 'p95_ms': round(percentile(latencies, 95), 1),
+            'failed': sum(1 for _, status in samples if status >= 400),
+            'statuses': dict(collections.Counter(status for _, status in samples))}
+
+
+def run_scenario(database_url, attack, extra_env, args):
+    port = free_port()
+    env = dict(os.environ, DATABASE_URL=database_url, APP_ENV='development', PORT=str(port),
+               WEB_CONCURRENCY=str(args.workers), WEB_THREADS=str(args.threads), TRUSTED_PROXIES='1',
+               **extra_env)
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+                              cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_up(port)
+        stop = threading.Event()
+        lock = threading.Lock()
+        pages, logins, statuses = [], [], collections.Counter()
+        users = seeder.shape(args.tasks)['users']
+        threads = [threading.Thread(target=real_user, args=(port, n, stop, pages, logins, lock))
+                   for n in range(args.clients)]
+        if attack:
+            threads += [threading.Thread(target=attacker, args=(port, args.attack, users, stop, statuses, lock, n))
+                        for n in range(args.attackers)]
+        for thread in threads:
+            thread.start()
+        started = time.perf_counter()
+        time.sleep(args.duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait()
+    return {'pages': summarize(pages, elapsed), 'logins': summarize(logins, elapsed),
+            'attack_attempts_per_s': round(sum(statuses.values()) / elapsed, 1),
+            'attack_statuses': {str(status): count for status, count in sorted(statuses.items(), key=str)}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=seeder.SCALES['1k'])
+    parser.add_argument('--db', help='SQLite file to reuse; seeded first if it does not exist')
+    parser.add_argument('--attack', choices=('stuffing', 'single'), default='stuffing')
+    parser.add_argument('--attackers', type=int, default=16, help='concurrent attacking connections')
+    parser.add_argument('--clients', type=int, default=4, help='concurrent real users')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10, help='seconds per scenario')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(prefix='pm-login-bench-'), 'bench.db')
+    database_url = 'sqlite:///' + os.path.abspath(path)
+    if not os.path.exists(path):
+        seeder.seed(database_url, args.tasks)
+
+    print(f'attack={args.attack} attackers={args.attackers} clients={args.clients} '
+          f'workers={args.workers} threads={args.threads} cpus={os.cpu_count()}')
+    results = {}
+    for name, (attack, extra_env) in SCENARIOS.items():
+        result = results[name] = run_scenario(database_url, attack, extra_env, args)
+        pages, logins = result['pages'], result['logins']
+        print(f"{name:>20}: {PAGE} {pages.get('rps', 0):6.1f} req/s p50 {pages.get('p50_ms', '-')} "
+              f"p95 {pages.get('p95_ms', '-')} ms | login p50 {logins.get('p50_ms', '-')} "
+              f"p95 {logins.get('p95_ms', '-')} ms failed {logins.get('failed', 0)} | "
+              f"attack {result['attack_attempts_per_s']}/s {result['attack_statuses']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'args': vars(args), 'scenarios': results}, f, indent=2)
+        print(f'\nwrote {args.output}')
+
+
+if __name__ == '__main__':
+    main()
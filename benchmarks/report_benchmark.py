@@ -0,0 +1,114 @@
+"""
+Compares the reporting engine against a naive ORM loop (load every Task
+object, count in Python dicts) on a seeded database, checks that both
+produce the same figures, and times the cached report. The engine runs
+with the pure-Python kernels and, when NumPy is installed, the NumPy ones.
+
+Usage: python benchmarks/report_benchmark.py [--tasks 100000] [--db PATH] [--repeat 3]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import date
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import seed as seeder  # noqa: E402
+from config import DevelopmentConfig  # noqa: E402
+from app import create_app, reports  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models import Task  # noqa: E402
+
+
+def naive_report(today):
+    """The figures the engine computes, the way a view would loop over ORM objects."""
+    totals = {'tasks': 0, 'open': 0, 'overdue': 0}
+    status = defaultdict(int)
+    groups = {'priority': defaultdict(lambda: defaultdict(int)), 'assignee': defaultdict(lambda: defaultdict(int)),
+              'project': defaultdict(lambda: defaultdict(int))}
+    for task in Task.query.all():
+        is_open = task.status != 'Completed'
+        is_overdue = is_open and task.due_date is not None and task.due_date < today
+        totals['tasks'] += 1
+        totals['open'] += is_open
+        totals['overdue'] += is_overdue
+        status[task.status] += 1
+        for name, key in (('priority', task.priority), ('assignee', task.assignee_id), ('project', task.project_id)):
+            group = groups[name][key]
+            group['total'] += 1
+            group['open'] += is_open
+            group['overdue'] += is_overdue
+            group[task.status] += 1
+    return totals, dict(status), groups
+
+
+def same_figures(naive, built):
+    totals, status, groups = naive
+    if {key: built['totals'][key] for key in totals} != totals or built['status'] != status:
+        return False
+    for name, key in (('priority', 'priority'), ('assignee', 'assignee_id'), ('project', 'project_id')):
+        engine = {group[key]: dict(group['by_status'], total=group['total'], open=group['open'],
+                                   overdue=group['overdue'])
+                  for group in built[f'by_{name}']}
+        expected = {key_: {field: n for field, n in counts.items() if n or field in ('open', 'overdue')}
+                    for key_, counts in groups[name].items()}
+        if engine != expected:
+            return False
+    return True
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=seeder.SCALES['100k'])
+    parser.add_argument('--db', help='SQLite file to reuse; seeded first if it does not exist')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(prefix='pm-report-bench-'), 'bench.db')
+    database_url = 'sqlite:///' + os.path.abspath(path)
+    if not os.path.exists(path):
+        seeder.seed(database_url, args.tasks)
+
+    class BenchConfig(DevelopmentConfig):
+        SQLALCHEMY_DATABASE_URI = database_url
+        JOBS_RUN_IN_PROCESS = False
+        INSTRUMENTATION_ENABLED = False
+
+    app = create_app(BenchConfig)
+    today = date.today()
+    kernels = [reports.PythonKernels()] + ([reports.NumpyKernels()] if reports.load_numpy() is not None else [])
+    with app.app_context():
+        count = db.session.query(Task).count()
+        print(f'{count} tasks, repeat={args.repeat}')
+
+        naive_ms, naive = timed(lambda: naive_report(today), args.repeat)
+        db.session.expunge_all()
+        print(f'{"naive ORM loop":>24}: {naive_ms:8.1f} ms')
+
+        for kernel in kernels:
+            engine_ms, built = timed(lambda: reports.build_report(today=today, kernels=kernel), args.repeat)
+            print(f'{kernel.name + " kernels":>24}: {engine_ms:8.1f} ms  ({naive_ms / engine_ms:.1f}x) '
+                  f'figures match: {same_figures(naive, built)}')
+
+        reports.report()  # fill the cache
+        cached_ms, _ = timed(reports.report, args.repeat)
+        print(f'{"cached report":>24}: {cached_ms:8.3f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,288 @@
+"""
+Route benchmark: seeds a deterministic database (benchmarks/seed.py), then
+drives every main route through the Flask test client and through a local
+gunicorn server with concurrent HTTP clients. Reports p50/p95/p99 latency,
+SQL queries per request and peak memory, and writes them as JSON so runs
+can be compared across commits (--baseline prints the p95 change).
+
+Usage: python benchmarks/route_benchmark.py [--scale 1k|100k|1m | --tasks N]
+           [--db PATH] [--mode client|http|both] [--requests 100]
+           [--clients 8] [--workers 2] [--cache null] [--output results.json]
+           [--baseline previous.json]
+"""
+
+import argparse
+import datetime
+import json
+import math
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import seed as seeder  # noqa: E402
+from load_test import Client, free_port, wait_until_up  # noqa: E402
+
+# name -> (method, path); {project_id} is filled in from the seeded data
+ROUTES = {
+    'home': ('GET', '/home'),
+    'login': ('POST', '/login'),
+    'projects': ('GET', '/projects'),
+    'projects_by_name': ('GET', '/projects?sort=-name&status=Active'),
+    'projects_search': ('GET', '/projects?search=falcon'),
+    'project_detail': ('GET', '/projects/{project_id}/detail'),
+    'dashboard': ('GET', '/dashboard'),
+    'search': ('GET', '/search?q=harbor+summit'),
+}
+
+
+def percentile(sorted_samples, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, math.ceil(pct / 100 * len(sorted_samples)) - 1)
+    return sorted_samples[index]
+
+
+def summarize(latencies, errors, queries):
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'mean_ms': round(statistics.fmean(latencies), 3),
+        'queries_per_request': round(statistics.fmean(queries), 2) if queries else None,
+    }
+
+
+def git_revision():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                                    capture_output=True, text=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+# ---- In-process: Flask test client ---
+
+def run_client(database_url, paths, requests, cache_backend):
+    from sqlalchemy import event
+    from config import DevelopmentConfig
+    from app import create_app
+    from app.extensions import db
+
+    class BenchConfig(DevelopmentConfig):
+        SQLALCHEMY_DATABASE_URI = database_url
+        WTF_CSRF_ENABLED = False
+        CACHE_BACKEND = cache_backend
+        SLOW_REQUEST_MS = float('inf')
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        engine = db.engine
+    statements = []
+    event.listen(engine, 'after_cursor_execute', lambda *args: statements.append(None))
+
+    client = app.test_client()
+    credentials = {'username': seeder.LOGIN_USER, 'password': seeder.PASSWORD}
+    client.post('/login', data=credentials)
+
+    def call(method, path):
+        if method == 'POST':
+            return client.post(path, data=credentials)
+        return client.get(path)
+
+    results = {}
+    for name, (method, path) in paths.items():
+        for _ in range(3):  # warm up pools, template and identity caches
+            call(method, path)
+
+        latencies, queries, errors = [], [], 0
+        for _ in range(requests):
+            statements.clear()
+            start = time.perf_counter()
+            response = call(method, path)
+            latencies.append((time.perf_counter() - start) * 1000)
+            queries.append(len(statements))
+            errors += response.status_code >= 400
+
+        # One extra, untimed request under tracemalloc for the allocation peak
+        tracemalloc.start()
+        call(method, path)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        results[name] = dict(method=method, path=path, **summarize(latencies, errors, queries),
+                             peak_alloc_kb=peak // 1024)
+        print_row(name, results[name])
+    return {'routes': results, 'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}
+
+
+# ---- Over HTTP: gunicorn + concurrent keep-alive clients ---
+
+def server_peak_rss_kb(pid):
+    """Sum of peak RSS (VmHWM) of a process and its children, where /proc is available."""
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            pids = [pid] + [int(child) for child in f.read().split()]
+        total = 0
+        for each in pids:
+            with open(f'/proc/{each}/status') as f:
+                total += next(int(line.split()[1]) for line in f if line.startswith('VmHWM:'))
+        return total
+    except (OSError, StopIteration, ValueError):
+        return None
+
+
+def drive_route(port, method, path, clients, requests):
+    latencies, queries, errors = [], [], []
+    lock = threading.Lock()
+    sessions = [Client(port) for _ in range(clients)]
+    for client in sessions:
+        client.login(seeder.LOGIN_USER, seeder.PASSWORD)
+
+    def worker(client, count):
+        local, local_queries, failed = [], [], 0
+        for _ in range(count):
+            body = client.login_body(seeder.LOGIN_USER, seeder.PASSWORD) if method == 'POST' else None
+            start = time.perf_counter()
+            status, _ = client.request(method, path, body)
+            local.append((time.perf_counter() - start) * 1000)
+            failed += status >= 400
+            # Server-Timing carries the query count (SERVER_TIMING_HEADER is on in development)
+            timing = client.response.getheader('Server-Timing') or ''
+            if ' queries"' in timing:
+                local_queries.append(int(timing.split('desc="', 1)[1].split(' ', 1)[0]))
+        with lock:
+            latencies.extend(local)
+            queries.extend(local_queries)
+            errors.append(failed)
+
+    per_client = [requests // clients + (n < requests % clients) for n in range(clients)]
+    threads = [threading.Thread(target=worker, args=(client, count)) for client, count in zip(sessions, per_client)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    result = dict(method=method, path=path, **summarize(latencies, sum(errors), queries))
+    result['rps'] = round(len(latencies) / elapsed, 1)
+    return result
+
+
+def run_http(database_url, paths, requests, cache_backend, clients, workers, threads):
+    port = free_port()
+    env = dict(os.environ, DATABASE_URL=database_url, APP_ENV='development', PORT=str(port),
+               WEB_CONCURRENCY=str(workers), WEB_THREADS=str(threads), CACHE_BACKEND=cache_backend)
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+                              cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_up(port)
+        results = {}
+        for name, (method, path) in paths.items():
+            drive_route(port, method, path, clients, clients)  # warm up every worker
+            results[name] = drive_route(port, method, path, clients, requests)
+            print_row(name, results[name])
+        peak = server_peak_rss_kb(server.pid)
+    finally:
+        server.terminate()
+        server.wait()
+    return {'workers': workers, 'threads': threads, 'clients': clients, 'routes': results,
+            'server_peak_rss_kb': peak}
+
+
+# ---- Reporting ---
+
+def print_row(name, result):
+    line = (f"{name:>18}  p50 {result['p50_ms']:8.2f}  p95 {result['p95_ms']:8.2f}  "
+            f"p99 {result['p99_ms']:8.2f} ms  queries {result['queries_per_request']}")
+    if 'rps' in result:
+        line += f"  {result['rps']:.1f} req/s"
+    if 'peak_alloc_kb' in result:
+        line += f"  alloc {result['peak_alloc_kb']} KB"
+    if result['errors']:
+        line += f"  ERRORS {result['errors']}"
+    print(line)
+
+
+def compare(results, baseline):
+    print('\np95 change vs baseline (commit %s):' % (baseline['meta'].get('commit') or '?')[:10])
+    if baseline['meta'].get('tasks') != results['meta']['tasks']:
+        print(f"  (baseline ran at {baseline['meta'].get('tasks')} tasks, this run at {results['meta']['tasks']})")
+    for mode in ('client', 'http'):
+        for name, result in results.get(mode, {}).get('routes', {}).items():
+            before = baseline.get(mode, {}).get('routes', {}).get(name)
+            if before:
+                change = (result['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100
+                print(f'{mode:>6} {name:>18}: {before["p95_ms"]:8.2f} -> {result["p95_ms"]:8.2f} ms '
+                      f'({change:+.1f}%)  queries {before["queries_per_request"]} -> {result["queries_per_request"]}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--scale', choices=seeder.SCALES, default='1k')
+    group.add_argument('--tasks', type=int)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--db', help='SQLite file to reuse; seeded first if it does not exist')
+    parser.add_argument('--mode', choices=('client', 'http', 'both'), default='both')
+    parser.add_argument('--requests', type=int, default=100, help='timed requests per route')
+    parser.add_argument('--clients', type=int, default=8, help='concurrent HTTP clients')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--cache', default='null', help='CACHE_BACKEND to measure with (null: uncached)')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--baseline', help='earlier --output file to compare p95 against')
+    args = parser.parse_args()
+
+    tasks = args.tasks or seeder.SCALES[args.scale]
+    path = args.db or os.path.join(tempfile.mkdtemp(prefix='pm-route-bench-'), 'bench.db')
+    database_url = 'sqlite:///' + os.path.abspath(path)
+    if not os.path.exists(path):
+        seeder.seed(database_url, tasks, args.seed)
+    shape = seeder.shape(tasks)
+    paths = {name: (method, route.format(project_id=shape['projects'] // 2 + 1))
+             for name, (method, route) in ROUTES.items()}
+
+    commit, dirty = git_revision()
+    results = {'meta': {
+        'commit': commit, 'dirty': dirty, 'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count(),
+        'tasks': tasks, 'seed': args.seed, 'cache_backend': args.cache, 'requests_per_route': args.requests,
+        **shape,
+    }}
+    if args.mode in ('client', 'both'):
+        print('test client:')
+        results['client'] = run_client(database_url, paths, args.requests, args.cache)
+    if args.mode in ('http', 'both'):
+        print(f'http: workers={args.workers} threads={args.threads} clients={args.clients}')
+        results['http'] = run_http(database_url, paths, args.requests, args.cache,
+                                   args.clients, args.workers, args.threads)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'\nwrote {args.output}')
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(results, json.load(f))
+    sys.exit(1 if any(result['errors'] for mode in ('client', 'http')
+                      for result in results.get(mode, {}).get('routes', {}).values()) else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Compares the full-text search index against the old ILIKE '%term%' scan.
+Seeds a throwaway SQLite database (100k rows by default), then times both
+paths over the same set of search terms.
+
+Usage: python benchmarks/search_benchmark.py [--rows 100000] [--repeat 5]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert
+from config import DevelopmentConfig
+from app import create_app, search
+from app.extensions import db
+from app.models import User, Project, Task
+
+WORDS = ('apollo borealis cascade delta ember falcon granite harbor indigo juniper '
+         'kestrel lumen meridian nimbus onyx prairie quartz raven summit tundra '
+         'umbra vertex willow xenon yonder zephyr').split()
+
+
+def seed(rows, rng):
+    """Insert `rows` records split 1:9 between projects and tasks."""
+    def phrase(n):
+        return ' '.join(rng.choice(WORDS) + str(rng.randrange(500)) for _ in range(n))
+
+    manager = User(username='bench', role='manager', password_hash='-')
+    db.session.add(manager)
+    db.session.commit()
+
+    project_count = max(1, rows // 10)
+    db.session.execute(insert(Project), [
+        {'name': phrase(3), 'description': phrase(12), 'status': 'Active', 'manager_id': manager.id,
+         'tenant_id': manager.tenant_id}
+        for _ in range(project_count)
+    ])
+    db.session.execute(insert(Task), [
+        {'title': phrase(4), 'description': phrase(10), 'project_id': rng.randrange(1, project_count + 1),
+         'tenant_id': manager.tenant_id}
+        for _ in range(rows - project_count)
+    ])
+    db.session.commit()
+
+    # Core inserts bypass the model events, so build the index in one pass
+    with db.engine.begin() as connection:
+        search.rebuild_index(connection)
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='pm-search-bench-')
+
+    class BenchConfig(DevelopmentConfig):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+
+    app = create_app(BenchConfig)
+    rng = random.Random(42)
+    with app.app_context():
+        db.create_all()
+        seed(args.rows, rng)
+        terms = [rng.choice(WORDS) + str(rng.randrange(500)) for _ in range(20)]
+
+        def ilike_path():
+            for term in terms:
+                Project.query.filter(Project.name.ilike(f'%{term}%')).all()
+                Task.query.filter(Task.title.ilike(f'%{term}%')).all()
+
+        def fulltext_path():
+            for term in terms:
+                Project.query.filter(Project.id.in_(search.matching_ids('project', term))).all()
+                Task.query.filter(Task.id.in_(search.matching_ids('task', term))).all()
+
+        def ranked_path():
+            for term in terms:
+                search.search(term, limit=50)
+
+        print(f'rows={args.rows} terms={len(terms)} repeat={args.repeat}')
+        for label, fn in (('ilike', ilike_path), ('fulltext', fulltext_path), ('ranked', ranked_path)):
+            ms = timed(fn, args.repeat)
+            print(f'{label:>9}: {ms:9.1f} ms total, {ms / len(terms):7.2f} ms/term')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""
+Deterministic synthetic data for benchmarks: users, projects, project
+members and tasks at a given scale, generated from a fixed random seed so
+that every run (and every commit) sees the same database. Dates are laid
+out relative to the seeding day, so dashboards always have upcoming work.
+Everything goes into the default tenant. Scales: 1k, 100k, 1m tasks (or any --tasks count).
+
+Usage: python benchmarks/seed.py DATABASE_URL [--scale 100k | --tasks N] [--seed 0]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SCALES = {'1k': 1_000, '100k': 100_000, '1m': 1_000_000}
+BATCH = 20_000
+
+# Every seeded user has this password; user0 (a manager) is the one benchmarks log in as
+PASSWORD = 'bench'
+LOGIN_USER = 'user0'
+
+WORDS = ('apollo borealis cascade delta ember falcon granite harbor indigo juniper '
+         'kestrel lumen meridian nimbus onyx prairie quartz raven summit tundra '
+         'umbra vertex willow xenon yonder zephyr').split()
+PROJECT_STATUSES = ('Active',) * 6 + ('Completed',) * 3 + ('On Hold',)
+TASK_STATUSES = ('To Do', 'In Progress', 'Completed')
+PRIORITIES = ('Low', 'Medium', 'High')
+
+
+def shape(tasks):
+    """Row counts for a task count: ~50 tasks per project, ~200 per user."""
+    return {'users': max(10, tasks // 200), 'projects': max(1, tasks // 50), 'tasks': tasks}
+
+
+def _batches(rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def seed(database_url, tasks, seed_value=0, echo=print):
+    """Create the schema in `database_url` and fill it; returns the row counts."""
+    from sqlalchemy import insert
+    from werkzeug.security import generate_password_hash
+    from config import DevelopmentConfig
+    from app import create_app, counters, history, search, tenancy
+    from app.extensions import db
+    from app.models import User, Project, Task, project_members
+
+    class SeedConfig(DevelopmentConfig):
+        SQLALCHEMY_DATABASE_URI = database_url
+
+    rng = random.Random(seed_value)
+    counts = shape(tasks)
+    today = date.today()
+    tenant_id = tenancy.DEFAULT_TENANT_ID
+
+    def phrase(n):
+        return ' '.join(rng.choice(WORDS) for _ in range(n))
+
+    app = create_app(SeedConfig)
+    with app.app_context():
+        db.create_all()
+        started = time.perf_counter()
+
+        # One hash shared by every user keeps seeding fast; user0 is a manager, user1 an admin
+        password_hash = generate_password_hash(PASSWORD)
+        roles = ['manager', 'admin'] + [rng.choice(('member',) * 9 + ('manager',)) for _ in range(counts['users'] - 2)]
+        db.session.execute(insert(User), [
+            {'username': f'user{i}', 'email': f'user{i}@example.com', 'role': role, 'password_hash': password_hash,
+             'tenant_id': tenant_id}
+            for i, role in enumerate(roles)
+        ])
+        user_ids = list(range(1, counts['users'] + 1))
+        manager_ids = [user_id for user_id, role in zip(user_ids, roles) if role == 'manager']
+
+        db.session.execute(insert(Project), [
+            {'name': f'{phrase(2).title()} {i}', 'description': phrase(12),
+             'status': rng.choice(PROJECT_STATUSES), 'manager_id': rng.choice(manager_ids), 'tenant_id': tenant_id,
+             'deadline': None if rng.random() < 0.1 else today + timedelta(days=rng.randrange(-30, 180))}
+            for i in range(counts['projects'])
+        ])
+
+        # 3-8 members per project; tasks go to one of their project's members
+        members = {project_id: rng.sample(user_ids, min(len(user_ids), rng.randint(3, 8)))
+                   for project_id in range(1, counts['projects'] + 1)}
+        db.session.execute(project_members.insert(), [
+            {'project_id': project_id, 'user_id': user_id}
+            for project_id, user_ids_ in members.items() for user_id in user_ids_
+        ])
+
+        def task_rows():
+            for i in range(tasks):
+                project_id = rng.randrange(1, counts['projects'] + 1)
+                yield {'title': f'{phrase(3).capitalize()} {i}', 'description': phrase(10),
+                       'status': rng.choice(TASK_STATUSES), 'priority': rng.choice(PRIORITIES),
+                       'due_date': today + timedelta(days=rng.randrange(-30, 60)),
+                       'project_id': project_id, 'assignee_id': rng.choice(members[project_id]),
+                       'tenant_id': tenant_id}
+
+        for batch in _batches(task_rows()):
+            db.session.execute(insert(Task), batch)
+        db.session.commit()
+
+        # Core inserts bypass the model events, so derive the index, counters and history in one pass
+        with db.engine.begin() as connection:
+            search.rebuild_index(connection)
+            counters.rebuild_counters(connection)
+            history.backfill(connection)
+        echo(f"seeded {counts['users']} users, {counts['projects']} projects, {tasks} tasks "
+             f'in {time.perf_counter() - started:.1f}s')
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('database_url')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--scale', choices=SCALES, default='1k')
+    group.add_argument('--tasks', type=int)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    seed(args.database_url, args.tasks or SCALES[args.scale], args.seed)
+
+
+if __name__ == '__main__':
+    main()
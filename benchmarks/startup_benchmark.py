@@ -0,0 +1,148 @@
+"""
+Measures cold-start cost in fresh interpreters:
+- import time of the `app` package (python -X importtime), in all and
+  net of the frameworks it is built on (Flask, Flask-SQLAlchemy,
+  Flask-Login, Flask-WTF), whose share importtime reports separately
+- time to first request: import + create_app() + first GET /home, in all
+  and over a fresh interpreter importing only the frameworks
+- the slowest imports behind the first request, by package (self time)
+The budgets apply to what the app adds on top of the frameworks, so they
+hold on slow and fast machines alike; exits with status 1 when a median is
+over budget. tests/test_startup.py checks the import graph instead:
+DEFERRED_IMPORTS stay out of a process until they are used.
+
+Usage: python benchmarks/startup_benchmark.py [--runs 5] [--top 15]
+           [--import-budget-ms 100] [--first-request-budget-ms 400]
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Milliseconds the app may add to the frameworks' own import time
+IMPORT_BUDGET_MS = 100
+FIRST_REQUEST_BUDGET_MS = 400
+
+FRAMEWORKS = ('flask', 'flask_sqlalchemy', 'flask_login', 'flask_wtf')
+# Heavy modules loaded only by the features that use them (reports, migrations)
+DEFERRED_IMPORTS = ('numpy', 'alembic', 'flask_migrate')
+# What `import app` alone must not load: views, models and subsystems come with create_app()
+APP_INTERNALS = ('app.models', 'app.auth.routes', 'app.main.routes', 'app.project.routes', 'app.api.routes')
+
+TIMED = """
+import time
+start = time.perf_counter()
+{}
+print((time.perf_counter() - start) * 1000)
+"""
+
+IMPORT_FRAMEWORKS = TIMED.format('import ' + ', '.join(FRAMEWORKS))
+FIRST_REQUEST = TIMED.format("""
+from app import create_app
+app = create_app()
+response = app.test_client().get('/home')
+assert response.status_code == 200, response.status_code
+""")
+LOADED_MODULES = """
+import json, sys
+{}
+print(json.dumps(sorted(sys.modules)))
+"""
+
+# import time: self [us] | cumulative | imported package
+IMPORTTIME_LINE = re.compile(r'^import time:\s*(\d+) \|\s*(\d+) \| (\s*)(\S+)$', re.M)
+
+
+def environment():
+    workdir = tempfile.mkdtemp(prefix='pm-startup-bench-')
+    return dict(os.environ, APP_ENV='development', AUTO_MIGRATE='0', JOBS_RUN_IN_PROCESS='0',
+                DATABASE_URL='sqlite:///' + os.path.join(workdir, 'startup.db'))
+
+
+def python(args, env):
+    return subprocess.run([sys.executable, *args], cwd=ROOT, env=env,
+                          capture_output=True, text=True, check=True)
+
+
+def timed_ms(script, env):
+    return float(python(['-c', script], env).stdout.strip().splitlines()[-1])
+
+
+def import_times(script, env):
+    """(module, self µs, cumulative µs, nesting depth) for every module the script imports."""
+    stderr = python(['-X', 'importtime', '-c', script], env).stderr
+    return [(name, int(own), int(cumulative), len(indent) // 2)
+            for own, cumulative, indent, name in IMPORTTIME_LINE.findall(stderr)]
+
+
+def import_ms(env):
+    """Cumulative import time of `app`, and the part of it spent importing the frameworks."""
+    entries = import_times('import app', env)
+    total = next(cumulative for name, _, cumulative, depth in entries if name == 'app' and depth == 0)
+    frameworks = sum(cumulative for name, _, cumulative, _ in entries if name in FRAMEWORKS)
+    return total / 1000, frameworks / 1000
+
+
+def slowest_imports(env, top=15):
+    """[(package, self ms)] of the `top` packages costing the most to import before the first response."""
+    by_package = Counter()
+    for name, own, _, _ in import_times(FIRST_REQUEST, env):
+        by_package[name.split('.', 1)[0]] += own / 1000
+    return by_package.most_common(top)
+
+
+def loaded_modules(statements, env):
+    """The modules in sys.modules after running `statements` in a fresh interpreter."""
+    return set(json.loads(python(['-c', LOADED_MODULES.format(statements)], env).stdout.splitlines()[-1]))
+
+
+def measure(runs=5, env=None):
+    """Median (ms, ms over the frameworks) of the app's import and of its first request."""
+    env = env or environment()
+    # Interleaved, so that a busy moment on the machine hits every measurement alike
+    imports, frameworks, first_requests = [], [], []
+    for _ in range(runs):
+        imports.append(import_ms(env))
+        frameworks.append(timed_ms(IMPORT_FRAMEWORKS, env))
+        first_requests.append(timed_ms(FIRST_REQUEST, env))
+    first_request = statistics.median(first_requests)
+    return {
+        'import': (statistics.median(total for total, _ in imports),
+                   statistics.median(total - shared for total, shared in imports)),
+        'first request': (first_request, first_request - statistics.median(frameworks)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15, help='How many of the slowest imports to list.')
+    parser.add_argument('--import-budget-ms', type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument('--first-request-budget-ms', type=float, default=FIRST_REQUEST_BUDGET_MS)
+    args = parser.parse_args()
+
+    env = environment()
+    budgets = {'import': args.import_budget_ms, 'first request': args.first_request_budget_ms}
+    over_budget = False
+    for label, (ms, added) in measure(args.runs, env).items():
+        verdict = 'ok' if added <= budgets[label] else 'OVER BUDGET'
+        over_budget |= added > budgets[label]
+        print(f'{label:>14}: {ms:8.1f} ms, {added:+7.1f} ms over the frameworks '
+              f'(budget {budgets[label]:.0f} ms) {verdict}')
+
+    print('\nSlowest imports up to the first response (self time by package, one run):')
+    for package, ms in slowest_imports(env, args.top):
+        print(f'{package:>24}: {ms:8.1f} ms')
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+"""
+Tenant scoping at scale. Seeds a throwaway SQLite database with many
+tenants whose sizes follow a Zipf law (one huge tenant, a long tail of
+small ones), then times the queries behind the project list, its status
+counts, the member directory and an API task page for the largest, median
+and smallest tenant, each run through a session scoped to that tenant.
+The same queries are timed again after swapping the tenant indexes for the
+global ones they replaced, to show what a small tenant pays for sharing
+tables with a large one.
+
+Usage: python benchmarks/tenant_benchmark.py [--tenants 200] [--tasks 500000] [--skew 1.1] [--repeat 20]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, insert, select, text  # noqa: E402
+from sqlalchemy.orm import joinedload  # noqa: E402
+from config import DevelopmentConfig  # noqa: E402
+from app import create_app, tenancy  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models import Project, Task, Tenant, User  # noqa: E402
+from app.pagination import keyset_paginate  # noqa: E402
+from app.progress import progress_for, project_status_counts  # noqa: E402
+
+BATCH = 20_000
+PROJECT_STATUSES = ('Active',) * 6 + ('Completed',) * 3 + ('On Hold',)
+TASK_STATUSES = ('To Do', 'In Progress', 'Completed')
+
+# The indexes from before tenants
+GLOBAL_INDEXES = (
+    'CREATE INDEX ix_project_status_deadline ON project (status, deadline)',
+    'CREATE INDEX ix_project_deadline_id ON project (deadline, id)',
+    'CREATE INDEX ix_project_name_id ON project (name, id)',
+    'CREATE INDEX ix_task_project_status ON task (project_id, status)',
+)
+
+
+def tenant_sizes(tenants, tasks, skew):
+    weights = [1 / rank ** skew for rank in range(1, tenants + 1)]
+    scale = tasks / sum(weights)
+    return [max(20, round(weight * scale)) for weight in weights]
+
+
+def seed(sizes, rng):
+    """Users, projects and tasks per tenant (~200 tasks per user, ~50 per project); returns their counts."""
+    today = date.today()
+    shapes = [{'tasks': size, 'users': max(5, size // 200), 'projects': max(2, size // 50)} for size in sizes]
+    db.session.execute(insert(Tenant), [{'id': tenant_id, 'name': f'Tenant {tenant_id}'}
+                                        for tenant_id in range(2, len(sizes) + 2)])
+    user_id = project_id = 0
+    users, projects, tasks = [], [], []
+    for tenant_id, shape in enumerate(shapes, start=2):
+        first_user, first_project = user_id + 1, project_id + 1
+        for _ in range(shape['users']):
+            user_id += 1
+            users.append({'id': user_id, 'tenant_id': tenant_id, 'username': f'user{user_id}', 'password_hash': '-',
+                          'role': 'member' if rng.random() < 0.9 else 'manager'})
+        for _ in range(shape['projects']):
+            project_id += 1
+            projects.append({'id': project_id, 'tenant_id': tenant_id, 'name': f'Project {project_id}',
+                             'status': rng.choice(PROJECT_STATUSES), 'manager_id': first_user,
+                             'deadline': None if rng.random() < 0.1 else today + timedelta(days=rng.randrange(-30, 180))})
+        for n in range(shape['tasks']):
+            tasks.append({'tenant_id': tenant_id, 'title': f'Task {n}', 'status': rng.choice(TASK_STATUSES),
+                          'project_id': rng.randrange(first_project, project_id + 1),
+                          'assignee_id': rng.randrange(first_user, user_id + 1),
+                          'due_date': today + timedelta(days=rng.randrange(-30, 60))})
+    for model, rows in ((User, users), (Project, projects), (Task, tasks)):
+        for start in range(0, len(rows), BATCH):
+            db.session.execute(insert(model), rows[start:start + BATCH])
+    db.session.commit()
+    return shapes
+
+
+# The queries behind /projects (first page, progress and status counts), the assignee
+# directory and /api/v1/tasks?status=, as the scoped session runs them
+def project_page():
+    page = keyset_paginate(Project.query.options(joinedload(Project.manager)), Project.deadline, Project.id, 20,
+                           nulls_last=Project.NO_DEADLINE)
+    return [project.id for project in page], progress_for(project.id for project in page)
+
+
+def member_directory():
+    return db.session.query(User.id, User.username).filter_by(role='member').order_by(User.username).all()
+
+
+def task_page():
+    return (db.session.query(Task.id, Task.title, Task.status).filter(Task.status == 'In Progress')
+            .order_by(Task.id).limit(50).all())
+
+
+WORKLOADS = (('project page', project_page), ('status counts', project_status_counts),
+             ('member directory', member_directory), ('API task page', task_page))
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - began) * 1000)
+    return statistics.median(samples)
+
+
+def measure(label, picks, repeat):
+    print(f'{label}:')
+    results = {}
+    for name, (tenant_id, shape) in picks.items():
+        tenancy.use(tenant_id)
+        timings = [timed(fn, repeat) for _, fn in WORKLOADS]
+        results[name] = [fn() for _, fn in WORKLOADS]
+        print(f"  {name:>8} tenant ({shape['tasks']:>7} tasks, {shape['projects']:>5} projects, "
+              f"{shape['users']:>4} users): " + '  '.join(f'{workload} {ms:6.2f} ms'
+                                                        for (workload, _), ms in zip(WORKLOADS, timings)))
+        db.session.expunge_all()
+    tenancy.use(None)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tenants', type=int, default=200)
+    parser.add_argument('--tasks', type=int, default=500_000)
+    parser.add_argument('--skew', type=float, default=1.1, help='Zipf exponent of tenant sizes')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='pm-tenant-bench-')
+
+    class BenchConfig(DevelopmentConfig):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+        JOBS_RUN_IN_PROCESS = False
+        INSTRUMENTATION_ENABLED = False
+
+    app = create_app(BenchConfig)
+    rng = random.Random(11)
+    with app.app_context():
+        db.create_all()
+        began = time.perf_counter()
+        shapes = seed(tenant_sizes(args.tenants, args.tasks, args.skew), rng)
+        db.session.execute(text('ANALYZE'))
+        total = sum(shape['tasks'] for shape in shapes)
+        print(f'{args.tenants} tenants, {total} tasks in {time.perf_counter() - began:.1f}s; tasks per tenant: '
+              f"largest {shapes[0]['tasks']}, median {shapes[len(shapes) // 2]['tasks']}, smallest {shapes[-1]['tasks']}")
+
+        # Tenant ids start at 2, after the default tenant
+        picks = {'largest': (2, shapes[0]), 'median': (2 + len(shapes) // 2, shapes[len(shapes) // 2]),
+                 'smallest': (1 + len(shapes), shapes[-1])}
+
+        # Scoping check: every scoped count matches an explicit filter on the tenant
+        for tenant_id, shape in picks.values():
+            tenancy.use(tenant_id)
+            scoped = db.session.execute(select(func.count(Task.id))).scalar()
+            tenancy.use(None)
+            explicit = db.session.execute(select(func.count(Task.id)).where(Task.tenant_id == tenant_id)).scalar()
+            assert scoped == explicit == shape['tasks'], (tenant_id, scoped, explicit)
+
+        tenant_leading = measure('tenant-leading indexes', picks, args.repeat)
+
+        connection = db.session.connection()
+        for table in (User.__table__, Project.__table__, Task.__table__):
+            for index in table.indexes:
+                if 'tenant_id' in index.columns:
+                    index.drop(connection)
+        for statement in GLOBAL_INDEXES:
+            connection.execute(text(statement))
+        connection.execute(text('ANALYZE'))
+        db.session.commit()
+        global_only = measure('global indexes only', picks, args.repeat)
+        print(f'same results: {tenant_leading == global_only}')
+
+
+if __name__ == '__main__':
+    main()
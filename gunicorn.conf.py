@@ -0,0 +1,26 @@
+"""
+Gunicorn settings for wsgi:app, overridable through the environment.
+Each worker builds its own app and database pool (no preload), so pooled
+connections are never shared across forked processes. Live-update streams
+hold a request thread each, so the worker must be threaded (gthread) or
+async; with async workers set REALTIME_MAX_STREAMS as well.
+"""
+
+import multiprocessing
+import os
+from config import Config
+
+bind = os.environ.get('BIND', f"0.0.0.0:{os.environ.get('PORT', 8000)}")
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = Config.WEB_THREADS
+worker_class = os.environ.get('WEB_WORKER_CLASS', 'gthread')
+if worker_class == 'sync':
+    raise RuntimeError('WEB_WORKER_CLASS=sync would let one live-update stream block a whole worker; '
+                       'use gthread or an async worker')
+timeout = int(os.environ.get('WEB_TIMEOUT', 30))
+keepalive = 5
+preload_app = False
+
+# Recycle workers now and then to cap slow memory growth
+max_requests = int(os.environ.get('WEB_MAX_REQUESTS', 2000))
+max_requests_jitter = max_requests // 10
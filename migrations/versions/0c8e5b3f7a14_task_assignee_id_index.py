@@ -0,0 +1,24 @@
+"""task assignee id index
+
+Revision ID: 0c8e5b3f7a14
+Revises: 6a2d9e41b7c3
+Create Date: 2026-10-17 14:48:52.604117
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0c8e5b3f7a14'
+down_revision = '6a2d9e41b7c3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The dashboard's most recent tasks of a user, without sorting all of them
+    op.create_index('ix_task_assignee_id', 'task', ['assignee_id', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_task_assignee_id', table_name='task')
@@ -0,0 +1,69 @@
+"""task history and snapshots
+
+Revision ID: 51d0f8aba83c
+Revises: e2b8f4a61c37
+Create Date: 2026-10-17 15:10:52.331906
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '51d0f8aba83c'
+down_revision = 'e2b8f4a61c37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('task_event',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('task_id', sa.Integer(), nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=10), nullable=False),
+    sa.Column('status', sa.String(length=50), nullable=True),
+    sa.Column('priority', sa.String(length=20), nullable=True),
+    sa.Column('assignee_id', sa.Integer(), nullable=True),
+    sa.Column('due_date', sa.Date(), nullable=True),
+    sa.Column('occurred_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_task_event_project', 'task_event', ['project_id', 'id'], unique=False)
+    op.create_index('ix_task_event_task', 'task_event', ['task_id', 'id'], unique=False)
+    op.create_table('task_snapshot',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('taken_at', sa.DateTime(), nullable=False),
+    sa.Column('last_event_id', sa.Integer(), nullable=False),
+    sa.Column('tasks', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_task_snapshot_taken_at'), 'task_snapshot', ['taken_at'], unique=False)
+    op.create_table('task_snapshot_row',
+    sa.Column('snapshot_id', sa.Integer(), nullable=False),
+    sa.Column('task_id', sa.Integer(), nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=50), nullable=True),
+    sa.Column('priority', sa.String(length=20), nullable=True),
+    sa.Column('assignee_id', sa.Integer(), nullable=True),
+    sa.Column('due_date', sa.Date(), nullable=True),
+    sa.ForeignKeyConstraint(['snapshot_id'], ['task_snapshot.id'], ),
+    sa.PrimaryKeyConstraint('snapshot_id', 'task_id')
+    )
+    op.create_index('ix_task_snapshot_row_project', 'task_snapshot_row', ['snapshot_id', 'project_id'], unique=False)
+    # Existing tasks start their history with a 'created' event at their last change
+    op.execute(
+        "INSERT INTO task_event (task_id, project_id, kind, status, priority, assignee_id, due_date, occurred_at) "
+        "SELECT id, project_id, 'created', status, priority, assignee_id, due_date, updated_at "
+        "FROM task ORDER BY updated_at, id"
+    )
+
+
+def downgrade():
+    op.drop_index('ix_task_snapshot_row_project', table_name='task_snapshot_row')
+    op.drop_table('task_snapshot_row')
+    op.drop_index(op.f('ix_task_snapshot_taken_at'), table_name='task_snapshot')
+    op.drop_table('task_snapshot')
+    op.drop_index('ix_task_event_task', table_name='task_event')
+    op.drop_index('ix_task_event_project', table_name='task_event')
+    op.drop_table('task_event')
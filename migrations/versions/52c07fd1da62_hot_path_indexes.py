@@ -0,0 +1,39 @@
+"""hot path indexes
+
+Revision ID: 52c07fd1da62
+Revises: 95324d3c0f80
+Create Date: 2026-10-17 09:20:37.904551
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '52c07fd1da62'
+down_revision = '95324d3c0f80'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # if_not_exists: databases adopted from create_all may already have them
+    op.create_index('ix_project_status_deadline', 'project', ['status', 'deadline'], if_not_exists=True)
+    op.create_index('ix_project_deadline_id', 'project', ['deadline', 'id'], if_not_exists=True)
+    op.create_index('ix_project_name_id', 'project', ['name', 'id'], if_not_exists=True)
+    op.create_index('ix_project_manager_id', 'project', ['manager_id'], if_not_exists=True)
+    op.create_index('ix_project_members_project_user', 'project_members', ['project_id', 'user_id'],
+                    unique=True, if_not_exists=True)
+    op.create_index('ix_project_members_user', 'project_members', ['user_id'], if_not_exists=True)
+    op.create_index('ix_task_project_status', 'task', ['project_id', 'status'], if_not_exists=True)
+    op.create_index('ix_task_assignee_due', 'task', ['assignee_id', 'due_date'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_task_assignee_due', table_name='task')
+    op.drop_index('ix_task_project_status', table_name='task')
+    op.drop_index('ix_project_members_user', table_name='project_members')
+    op.drop_index('ix_project_members_project_user', table_name='project_members')
+    op.drop_index('ix_project_manager_id', table_name='project')
+    op.drop_index('ix_project_name_id', table_name='project')
+    op.drop_index('ix_project_deadline_id', table_name='project')
+    op.drop_index('ix_project_status_deadline', table_name='project')
@@ -0,0 +1,36 @@
+"""project and task versions
+
+Revision ID: 5d7a0c3e9b18
+Revises: c4e19a7d2f60
+Create Date: 2026-10-17 13:20:41.602317
+
+"""
+from datetime import datetime, timezone
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d7a0c3e9b18'
+down_revision = 'c4e19a7d2f60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing rows start at version 1, last modified now
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    for table in ('project', 'task'):
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(), nullable=True))
+        op.add_column(table, sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+        op.execute(sa.table(table, sa.column('updated_at', sa.DateTime())).update().values(updated_at=now))
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column('updated_at', existing_type=sa.DateTime(), nullable=False)
+            batch_op.alter_column('version', existing_type=sa.Integer(), server_default=None)
+
+
+def downgrade():
+    for table in ('task', 'project'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('version')
+            batch_op.drop_column('updated_at')
@@ -0,0 +1,34 @@
+"""project deadline sort key indexes
+
+Revision ID: 6a2d9e41b7c3
+Revises: f79857d53234
+Create Date: 2026-10-17 14:02:11.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6a2d9e41b7c3'
+down_revision = 'f79857d53234'
+branch_labels = None
+depends_on = None
+
+# Project lists order and seek on this (NULL deadlines last), so the indexes hold it too.
+# Not in a batch: SQLite table rebuilds don't carry expression indexes over.
+DEADLINE_KEY = sa.text("coalesce(deadline, '9999-12-31')")
+
+
+def upgrade():
+    op.drop_index('ix_project_tenant_deadline_id', table_name='project')
+    op.drop_index('ix_project_tenant_status_deadline', table_name='project')
+    op.create_index('ix_project_tenant_deadline_key', 'project', ['tenant_id', DEADLINE_KEY, 'id'])
+    op.create_index('ix_project_tenant_status_deadline_key', 'project', ['tenant_id', 'status', DEADLINE_KEY, 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_project_tenant_status_deadline_key', table_name='project')
+    op.drop_index('ix_project_tenant_deadline_key', table_name='project')
+    op.create_index('ix_project_tenant_status_deadline', 'project', ['tenant_id', 'status', 'deadline'])
+    op.create_index('ix_project_tenant_deadline_id', 'project', ['tenant_id', 'deadline', 'id'])
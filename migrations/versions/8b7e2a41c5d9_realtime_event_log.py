@@ -0,0 +1,32 @@
+"""realtime event log
+
+Revision ID: 8b7e2a41c5d9
+Revises: 3f1c9d2b7e41
+Create Date: 2026-10-17 11:12:48.530227
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b7e2a41c5d9'
+down_revision = '3f1c9d2b7e41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('realtime_event',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('channel', sa.String(length=64), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_realtime_event_created_at'), 'realtime_event', ['created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_realtime_event_created_at'), table_name='realtime_event')
+    op.drop_table('realtime_event')
@@ -0,0 +1,39 @@
+"""search index and task counters
+
+Revision ID: 95324d3c0f80
+Revises: aa3845aee1d3
+Create Date: 2026-10-17 09:14:02.118604
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app import counters, search
+
+
+# revision identifiers, used by Alembic.
+revision = '95324d3c0f80'
+down_revision = 'aa3845aee1d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    # Databases adopted from create_all may already have both tables
+    if not sa.inspect(bind).has_table('user_task_counter'):
+        op.create_table('user_task_counter',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=50), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('user_id', 'status')
+        )
+        # Backfill from tasks that existed before this revision
+        counters.rebuild_counters(bind)
+    search.create_index(bind)
+
+
+def downgrade():
+    op.execute('DROP TABLE IF EXISTS search_index')
+    op.drop_table('user_task_counter')
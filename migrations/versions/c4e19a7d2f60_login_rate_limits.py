@@ -0,0 +1,42 @@
+"""login rate limits and longer password hashes
+
+Revision ID: c4e19a7d2f60
+Revises: 8b7e2a41c5d9
+Create Date: 2026-10-17 12:03:27.118406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e19a7d2f60'
+down_revision = '8b7e2a41c5d9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('rate_limit_counter',
+    sa.Column('bucket', sa.String(length=160), nullable=False),
+    sa.Column('window_start', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('bucket', 'window_start')
+    )
+    op.create_index(op.f('ix_rate_limit_counter_window_start'), 'rate_limit_counter', ['window_start'], unique=False)
+    # scrypt hashes with werkzeug's defaults are ~160 characters
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.alter_column('password_hash',
+               existing_type=sa.String(length=128),
+               type_=sa.String(length=255),
+               existing_nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.alter_column('password_hash',
+               existing_type=sa.String(length=255),
+               type_=sa.String(length=128),
+               existing_nullable=False)
+    op.drop_index(op.f('ix_rate_limit_counter_window_start'), table_name='rate_limit_counter')
+    op.drop_table('rate_limit_counter')
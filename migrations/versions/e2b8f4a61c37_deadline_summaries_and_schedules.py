@@ -0,0 +1,41 @@
+"""deadline summaries and job schedules
+
+Revision ID: e2b8f4a61c37
+Revises: 5d7a0c3e9b18
+Create Date: 2026-10-17 14:02:15.774120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b8f4a61c37'
+down_revision = '5d7a0c3e9b18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('deadline_summary',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('overdue', sa.Integer(), nullable=False),
+    sa.Column('due_this_week', sa.Integer(), nullable=False),
+    sa.Column('computed_on', sa.Date(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_table('job_schedule',
+    sa.Column('kind', sa.String(length=50), nullable=False),
+    sa.Column('next_run_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('kind')
+    )
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.create_index('ix_task_due_status', ['due_date', 'status'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.drop_index('ix_task_due_status')
+    op.drop_table('job_schedule')
+    op.drop_table('deadline_summary')
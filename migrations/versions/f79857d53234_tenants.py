@@ -0,0 +1,73 @@
+"""tenants and tenant-leading indexes
+
+Revision ID: f79857d53234
+Revises: 51d0f8aba83c
+Create Date: 2026-10-17 06:41:26.586499
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f79857d53234'
+down_revision = '51d0f8aba83c'
+branch_labels = None
+depends_on = None
+
+# Indexes per table: one tenant's rows are found without touching the others'
+TENANT_INDEXES = {
+    'user': [('ix_user_tenant_role_username', ['tenant_id', 'role', 'username']),
+             ('ix_user_tenant_id', ['tenant_id', 'id'])],
+    'project': [('ix_project_tenant_status_deadline', ['tenant_id', 'status', 'deadline']),
+                ('ix_project_tenant_deadline_id', ['tenant_id', 'deadline', 'id']),
+                ('ix_project_tenant_name_id', ['tenant_id', 'name', 'id']),
+                ('ix_project_tenant_id', ['tenant_id', 'id'])],
+    'task': [('ix_task_tenant_id', ['tenant_id', 'id']),
+             ('ix_task_tenant_status', ['tenant_id', 'status', 'id'])],
+}
+# Project list indexes they replace
+GLOBAL_PROJECT_INDEXES = [('ix_project_status_deadline', ['status', 'deadline']),
+                          ('ix_project_deadline_id', ['deadline', 'id']),
+                          ('ix_project_name_id', ['name', 'id'])]
+
+
+def upgrade():
+    op.create_table('tenant',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=140), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    # Existing users, projects and tasks all join the default tenant
+    op.execute("INSERT INTO tenant (id, name) VALUES (1, 'Default')")
+    for table, indexes in TENANT_INDEXES.items():
+        op.add_column(table, sa.Column('tenant_id', sa.Integer(), nullable=False, server_default='1'))
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column('tenant_id', existing_type=sa.Integer(), server_default=None)
+            batch_op.create_foreign_key(f'fk_{table}_tenant_id_tenant', 'tenant', ['tenant_id'], ['id'])
+            if table == 'project':
+                for name, _ in GLOBAL_PROJECT_INDEXES:
+                    batch_op.drop_index(name)
+            if table == 'task':
+                # Scoped progress counts filter on the tenant too; with it they stay index-only
+                batch_op.drop_index('ix_task_project_status')
+                batch_op.create_index('ix_task_project_status', ['project_id', 'status', 'tenant_id'], unique=False)
+            for name, columns in indexes:
+                batch_op.create_index(name, columns, unique=False)
+
+
+def downgrade():
+    for table, indexes in TENANT_INDEXES.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for name, _ in indexes:
+                batch_op.drop_index(name)
+            if table == 'project':
+                for name, columns in GLOBAL_PROJECT_INDEXES:
+                    batch_op.create_index(name, columns, unique=False)
+            if table == 'task':
+                batch_op.drop_index('ix_task_project_status')
+                batch_op.create_index('ix_task_project_status', ['project_id', 'status'], unique=False)
+            batch_op.drop_constraint(f'fk_{table}_tenant_id_tenant', type_='foreignkey')
+            batch_op.drop_column('tenant_id')
+    op.drop_table('tenant')
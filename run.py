@@ -3,4 +3,8 @@ from app import create_app
 app = create_app()
 
 if __name__ == '__main__':
+    # The single-process dev server brings the schema up to date itself
+    from app.schema import upgrade_database
+    with app.app_context():
+        upgrade_database(app)
     app.run(debug=True, port=5002)
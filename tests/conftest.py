@@ -0,0 +1,73 @@
+"""
+Shared fixtures: an app on a throwaway SQLite database (page cache, CSRF,
+login throttling and in-process jobs off, cheap password hashes), a test
+client and a logged-in manager.
+"""
+
+import pytest
+from sqlalchemy import event
+from config import DevelopmentConfig
+from app import create_app
+from app.extensions import db
+from app.models import User
+
+
+class TestConfig(DevelopmentConfig):
+    TESTING = True
+    WTF_CSRF_ENABLED = False
+    CACHE_BACKEND = 'null'
+    JOBS_RUN_IN_PROCESS = False  # no scheduled jobs racing the requests under test
+    LOGIN_RATE_LIMIT_ENABLED = False
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+    SERVER_TIMING_HEADER = False
+
+
+@pytest.fixture
+def app(tmp_path):
+    class Config(TestConfig):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'test.db')
+
+    app = create_app(Config)
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def manager(app):
+    """A manager of the default tenant; returns its id."""
+    with app.app_context():
+        user = User(username='manager', role='manager')
+        user.set_password('manager')
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+
+@pytest.fixture
+def logged_in(client, manager):
+    """The client, logged in as the manager."""
+    response = client.post('/login', data={'username': 'manager', 'password': 'manager'})
+    assert response.status_code == 302, response.status_code
+    return client
+
+
+@pytest.fixture
+def statements(app):
+    """SQL statements run against the app's engine, cleared by the test as needed."""
+    with app.app_context():
+        engine = db.engine
+    executed = []
+
+    def record(conn, cursor, statement, *args):
+        executed.append(statement)
+    event.listen(engine, 'after_cursor_execute', record)
+    yield executed
+    event.remove(engine, 'after_cursor_execute', record)
@@ -0,0 +1,76 @@
+"""
+Conditional GETs on API lists see deletes: a page is validated by its ETag
+alone, since deleting a row leaves the newest updated_at as it was. A
+task's history counts the time spent in its current status up to now.
+"""
+
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, update
+from app.extensions import db
+from app.models import Project, Task, TaskEvent
+
+
+def test_list_revalidation_sees_deletes(app, logged_in):
+    with app.app_context():
+        projects = [Project(name=name, manager_id=1) for name in ('Apollo', 'Gemini')]
+        db.session.add_all(projects)
+        db.session.commit()
+        first_id = projects[0].id
+
+    response = logged_in.get('/api/v1/projects')
+    etag = response.headers['ETag']
+    assert 'Last-Modified' not in response.headers
+    assert logged_in.get('/api/v1/projects', headers={'If-None-Match': etag}).status_code == 304
+
+    with app.app_context():
+        db.session.delete(db.session.get(Project, first_id))
+        db.session.commit()
+
+    assert logged_in.get('/api/v1/projects', headers={'If-None-Match': etag}).status_code == 200
+    response = logged_in.get('/api/v1/projects', headers={'If-Modified-Since': 'Fri, 01 Jan 2100 00:00:00 GMT'})
+    assert response.status_code == 200
+    assert [project['name'] for project in response.get_json()['data']] == ['Gemini']
+
+
+def test_single_resource_keeps_last_modified(app, logged_in):
+    with app.app_context():
+        project = Project(name='Apollo', manager_id=1)
+        db.session.add(project)
+        db.session.commit()
+        project_id = project.id
+
+    response = logged_in.get(f'/api/v1/projects/{project_id}')
+    assert 'Last-Modified' in response.headers
+    revalidated = logged_in.get(f'/api/v1/projects/{project_id}',
+                                headers={'If-Modified-Since': response.headers['Last-Modified']})
+    assert revalidated.status_code == 304
+
+
+def test_task_history_counts_time_in_the_current_status(app, logged_in):
+    with app.app_context():
+        project = Project(name='Apollo', manager_id=1)
+        db.session.add(project)
+        db.session.flush()
+        task = Task(title='Launch', project_id=project.id)
+        db.session.add(task)
+        db.session.commit()
+        task.status = 'In Progress'
+        db.session.commit()
+        task_id = task.id
+        # Created three hours ago, started one hour ago
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        first, second = db.session.execute(select(TaskEvent.id).where(TaskEvent.task_id == task_id)
+                                           .order_by(TaskEvent.id)).scalars()
+        for event_id, hours in ((first, 3), (second, 1)):
+            db.session.execute(update(TaskEvent).where(TaskEvent.id == event_id)
+                               .values(occurred_at=now - timedelta(hours=hours)))
+        db.session.commit()
+
+    response = logged_in.get(f'/api/v1/tasks/{task_id}/history')
+    body = response.get_json()
+    assert body['current']['status'] == 'In Progress'
+    assert body['time_in_status']['To Do'] == 7200
+    assert 3600 <= body['time_in_status']['In Progress'] < 3660
+    # The running figure isn't part of the ETag: nothing new happened to the task
+    assert logged_in.get(f'/api/v1/tasks/{task_id}/history',
+                         headers={'If-None-Match': response.headers['ETag']}).status_code == 304
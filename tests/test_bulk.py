@@ -0,0 +1,76 @@
+"""
+Task imports report unreadable files and unknown assignees as row errors
+instead of failing the request, and take assignees by the task form's
+rules (a project's members, when it has any).
+"""
+
+import io
+import pytest
+from app.extensions import db
+from app.models import Project, Task, User
+
+
+@pytest.fixture
+def project_id(app, manager):
+    with app.app_context():
+        db.session.add(User(username='alice', role='member', password_hash='-', tenant_id=1))
+        project = Project(name='Apollo', manager_id=manager)
+        db.session.add(project)
+        db.session.commit()
+        return project.id
+
+
+def upload(client, project_id, content, filename='tasks.csv'):
+    response = client.post(f'/projects/{project_id}/tasks/import', headers={'Accept': 'application/json'},
+                           data={'file': (io.BytesIO(content), filename)}, content_type='multipart/form-data')
+    return response.status_code, response.get_json()
+
+
+def task_titles(app):
+    with app.app_context():
+        return [title for (title,) in db.session.query(Task.title).order_by(Task.id)]
+
+
+def test_import_rows_by_assignee_name(app, logged_in, project_id):
+    status, result = upload(logged_in, project_id, b'title,assignee\nFirst,alice\nSecond,bob\n')
+    assert status == 207
+    assert result['imported'] == 1
+    assert result['errors'] == [{'row': 2, 'errors': {'assignee': ["Unknown assignee 'bob'"]}}]
+    assert task_titles(app) == ['First']
+
+
+def test_import_non_utf8_file(app, logged_in, project_id):
+    status, result = upload(logged_in, project_id, 'title\nCaf\xe9\n'.encode('latin-1'))
+    assert status == 207
+    assert result['imported'] == 0
+    assert result['errors'] == [{'row': 1, 'errors': {'row': ['File is not UTF-8 text']}}]
+
+
+def test_import_malformed_csv(app, logged_in, project_id):
+    oversized = b'"' + b'x' * 200_000 + b'"'  # beyond the csv module's field size limit
+    status, result = upload(logged_in, project_id, b'title,assignee\n' + oversized + b',alice\nNext,alice\n')
+    assert status == 207
+    assert result['imported'] == 1
+    assert result['errors'][0]['errors']['row'][0].startswith('Invalid CSV')
+
+
+def test_import_malformed_json_lines(app, logged_in, project_id):
+    status, result = upload(logged_in, project_id, b'{"title": "Good", "assignee": "alice"}\n{"title": \n[1]\n', 'tasks.ndjson')
+    assert status == 207
+    assert [error['row'] for error in result['errors']] == [2, 3]
+    assert task_titles(app) == ['Good']
+
+
+def test_import_assignees_follow_the_project_members(app, logged_in, project_id):
+    with app.app_context():
+        project = db.session.get(Project, project_id)
+        project.members.append(User.query.filter_by(username='alice').one())
+        db.session.add(User(username='bob', role='member', password_hash='-', tenant_id=1))
+        db.session.commit()
+        bob_id = User.query.filter_by(username='bob').one().id
+
+    csv_rows = f'title,assignee,assignee_id\nFirst,alice,\nSecond,bob,\nThird,,{bob_id}\n'.encode()
+    status, result = upload(logged_in, project_id, csv_rows)
+    assert status == 207
+    assert [error['row'] for error in result['errors']] == [2, 3]
+    assert task_titles(app) == ['First']
@@ -0,0 +1,38 @@
+"""
+Cached pages and fragments that show usernames are refreshed when a user
+is renamed.
+"""
+
+import pytest
+from app.cache import MemoryCache
+from app.extensions import cache, db
+from app.models import Project, Task, User
+
+
+@pytest.fixture
+def memory_cache(monkeypatch):
+    monkeypatch.setattr(cache, 'backend', MemoryCache())
+
+
+def test_rename_refreshes_cached_usernames(app, logged_in, memory_cache):
+    with app.app_context():
+        member = User(username='alice', role='member', password_hash='-', tenant_id=1)
+        project = Project(name='Apollo', manager_id=1)
+        db.session.add_all([member, project])
+        db.session.flush()
+        db.session.add(Task(title='Launch', project_id=project.id, assignee_id=member.id))
+        db.session.commit()
+        project_id, member_id = project.id, member.id
+
+    for path in ('/projects', f'/projects/{project_id}/detail'):
+        assert b'manager' in logged_in.get(path).data
+    assert b'alice' in logged_in.get(f'/projects/{project_id}/detail').data
+
+    with app.app_context():
+        db.session.get(User, 1).username = 'boss'
+        db.session.get(User, member_id).username = 'alicia'
+        db.session.commit()
+
+    assert b'boss' in logged_in.get('/projects').data
+    detail = logged_in.get(f'/projects/{project_id}/detail').data
+    assert b'alicia' in detail and b'alice<' not in detail
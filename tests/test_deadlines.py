@@ -0,0 +1,60 @@
+"""
+The digest job commits as it goes: its heartbeats reach other workers, so a
+second worker checking for stale jobs leaves a long run alone rather than
+requeueing it (and sending the digests twice).
+"""
+
+import threading
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy import update
+from app import deadlines, jobs
+from app.extensions import db
+from app.models import Job, Project, Task, User
+
+
+def test_long_digest_run_is_not_requeued(app, manager, tmp_path, monkeypatch):
+    app.config.update(DIGEST_OUTBOX=str(tmp_path / 'outbox'), JOB_CHUNK_SIZE=1)
+    today = date.today()
+    with app.app_context():
+        project = Project(name='Apollo', manager_id=manager)
+        users = [User(username=name, role='member', password_hash='-', email=f'{name}@example.com')
+                 for name in ('alice', 'bob')]
+        db.session.add_all([project, *users])
+        db.session.flush()
+        db.session.add_all([Task(title=f'Task for {user.username}', project_id=project.id, assignee_id=user.id,
+                                 due_date=today) for user in users])
+        db.session.commit()
+        last_user_id = users[-1].id
+
+        job_id = jobs.enqueue('send-digests', {'day': today.isoformat()}).id
+        assert jobs.claim_next() == job_id
+        # Long enough ago that only a fresh heartbeat keeps the job from looking stale
+        long_ago = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(hours=1)
+        db.session.execute(update(Job).where(Job.id == job_id).values(started_at=long_ago))
+        db.session.commit()
+
+    errors = []
+
+    def second_worker():
+        try:
+            with app.app_context():
+                jobs._requeue_stale(stale_after=60)
+        except Exception as exc:
+            errors.append(exc)
+
+    send = deadlines.FileOutbox.send
+
+    def send_then_check(outbox, name, message):
+        # Halfway through the run, after the first chunk's commit
+        if name.endswith(f'user{last_user_id}'):
+            worker = threading.Thread(target=second_worker)
+            worker.start()
+            worker.join()
+        return send(outbox, name, message)
+    monkeypatch.setattr(deadlines.FileOutbox, 'send', send_then_check)
+
+    with app.app_context():
+        assert jobs.execute(job_id) == 'succeeded'
+        job = db.session.get(Job, job_id)
+        assert (job.attempts, job.result['digests']) == (1, 2)
+    assert errors == []
@@ -0,0 +1,30 @@
+"""
+A user's cached identity is dropped when a change to the row is committed,
+so a request reading the row between flush and commit can't keep the old
+role cached.
+"""
+
+from app.extensions import db
+from app.identity import load_user
+from app.models import User
+
+
+def test_role_change_is_seen_after_commit(app, manager):
+    with app.app_context():
+        assert load_user(manager).role == 'manager'
+        db.session.get(User, manager).role = 'member'
+        db.session.flush()
+        # Another request, on its own session, reads the row before the commit
+        with app.app_context():
+            assert load_user(manager).role == 'manager'
+        db.session.commit()
+        assert load_user(manager).role == 'member'
+
+
+def test_rolled_back_change_keeps_the_snapshot(app, manager):
+    with app.app_context():
+        snapshot = load_user(manager)
+        db.session.get(User, manager).role = 'member'
+        db.session.flush()
+        db.session.rollback()
+        assert load_user(manager) is snapshot
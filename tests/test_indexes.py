@@ -0,0 +1,104 @@
+"""
+The hot pages' queries are served by indexes: EXPLAIN QUERY PLAN of every
+statement behind the project list (first and deep pages, each sort and
+filter), the dashboard and the project detail page shows no full table
+scan and no temporary B-tree for ORDER BY/GROUP BY.
+"""
+
+import random
+from datetime import date, timedelta
+import pytest
+from sqlalchemy import event, insert, text
+from app.extensions import db
+from app.models import Project, Task, Tenant, User
+from app.pagination import encode_cursor
+
+PROJECTS = 2000
+TASKS = 10000
+
+# Sorts that may use a temporary B-tree, because their input is small by construction
+BOUNDED_SORTS = (
+    'JOIN project_members',  # one project's members, by username
+)
+
+
+@pytest.fixture
+def seeded(app, manager):
+    """Two tenants' users, projects (a fifth without a deadline) and tasks, with statistics."""
+    rng = random.Random(5)
+    today = date.today()
+    with app.app_context():
+        db.session.execute(insert(Tenant), [{'id': 2, 'name': 'Other'}])
+        db.session.execute(insert(User), [
+            {'username': f'user{i}', 'role': 'member', 'password_hash': '-', 'tenant_id': 1 + i % 2}
+            for i in range(200)
+        ])
+        db.session.execute(insert(Project), [
+            {'name': f'Project {i}', 'status': rng.choice(('Active', 'Completed', 'On Hold')),
+             'manager_id': rng.randrange(1, 201), 'tenant_id': 1 + i % 2,
+             'deadline': None if rng.random() < 0.2 else today + timedelta(days=rng.randrange(-60, 300))}
+            for i in range(PROJECTS)
+        ])
+        db.session.execute(insert(Task), [
+            {'title': f'Task {i}', 'status': rng.choice(('To Do', 'In Progress', 'Completed')),
+             'project_id': project_id, 'tenant_id': 1 + (project_id - 1) % 2,
+             'assignee_id': manager if i % 10 == 0 else rng.randrange(2, 202),
+             'due_date': today + timedelta(days=rng.randrange(-30, 30))}
+            for i, project_id in enumerate(rng.randrange(1, PROJECTS + 1) for _ in range(TASKS))
+        ])
+        db.session.commit()
+        db.session.execute(text('ANALYZE'))
+        db.session.commit()
+    return app
+
+
+def plans_for(app, client, path):
+    """(statement, plan lines) for each SELECT the request runs."""
+    with app.app_context():
+        engine = db.engine
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            executed.append((statement, parameters))
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        response = client.get(path)
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    assert response.status_code == 200, (path, response.status_code)
+
+    with engine.connect() as connection:
+        return [(statement, [row[3] for row in connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement,
+                                                                           parameters)])
+                for statement, parameters in executed]
+
+
+DEEP = encode_cursor((date.today() + timedelta(days=200)).isoformat(), PROJECTS // 2)
+NO_DEADLINE = encode_cursor(Project.NO_DEADLINE.isoformat(), PROJECTS // 2)
+
+PATHS = [
+    '/projects',
+    f'/projects?cursor={DEEP}',
+    f'/projects?cursor={DEEP}&dir=prev',
+    f'/projects?cursor={NO_DEADLINE}',
+    f'/projects?sort=-deadline&cursor={DEEP}',
+    '/projects?sort=name',
+    f"/projects?sort=name&cursor={encode_cursor('Project 1500', 1500)}",
+    '/projects?status=Active',
+    f'/projects?status=Active&cursor={DEEP}',
+    '/projects?deadline=this_month',
+    '/dashboard',
+    '/projects/1/detail',
+]
+
+
+@pytest.mark.parametrize('path', PATHS)
+def test_hot_queries_use_indexes(seeded, logged_in, path):
+    plans = plans_for(seeded, logged_in, path)
+    assert plans
+    for statement, plan in plans:
+        if any(marker in statement for marker in BOUNDED_SORTS):
+            plan = [line for line in plan if 'TEMP B-TREE' not in line]
+        for line in plan:
+            assert not line.startswith('SCAN') and 'TEMP B-TREE' not in line, (line, ' '.join(statement.split()))
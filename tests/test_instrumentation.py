@@ -0,0 +1,41 @@
+"""
+/metrics is for admins or scrapers holding METRICS_TOKEN, and failed
+statements don't leave timing state behind on their connection.
+"""
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from app.extensions import db
+from app.models import User
+
+
+def test_metrics_need_an_admin(app, logged_in):
+    assert app.test_client().get('/metrics').status_code == 401
+    assert logged_in.get('/metrics').status_code == 403
+
+    with app.app_context():
+        admin = User(username='root', role='admin')
+        admin.set_password('rootpw')
+        db.session.add(admin)
+        db.session.commit()
+    client = app.test_client()
+    client.post('/login', data={'username': 'root', 'password': 'rootpw'})
+    assert client.get('/metrics').status_code == 200
+
+
+def test_metrics_token(app, client):
+    app.config['METRICS_TOKEN'] = 'secret'
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    response = client.get('/metrics', headers={'Authorization': 'Bearer secret'})
+    assert response.status_code == 200 and b'pm_requests_total' in response.data
+
+
+def test_failed_statement_releases_its_timer(app):
+    with app.app_context(), db.engine.connect() as connection:
+        with pytest.raises(OperationalError):
+            connection.execute(text('SELECT * FROM no_such_table'))
+        assert connection.info.get('query_started') == []
+        connection.execute(text('SELECT 1'))
+        assert connection.info.get('query_started') == []
@@ -0,0 +1,24 @@
+"""
+Finished jobs and their results are deleted once older than JOB_RETENTION;
+queued, running and recent jobs stay.
+"""
+
+from datetime import datetime, timedelta, timezone
+from app import jobs
+from app.extensions import db
+from app.models import Job
+
+
+def test_expired_finished_jobs_are_pruned(app, monkeypatch):
+    monkeypatch.setattr(jobs, '_pruned_at', 0)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    expired = now - timedelta(seconds=app.config['JOB_RETENTION'] + 60)
+    with app.app_context():
+        for status, finished_at in (('succeeded', expired), ('failed', expired), ('succeeded', now),
+                                    ('running', None)):
+            db.session.add(Job(kind='build-report', payload={}, status=status, result={'totals': {}},
+                               created_at=expired, run_after=expired, started_at=expired, finished_at=finished_at))
+        db.session.commit()
+
+        assert jobs.claim_next(stale_after=10 ** 9) is None
+        assert sorted((job.status, job.finished_at) for job in Job.query) == [('running', None), ('succeeded', now)]
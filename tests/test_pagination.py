@@ -0,0 +1,44 @@
+"""
+Cursors that don't hold a value of the sort column's type are rejected
+with 400, like malformed ones, instead of reaching the SQL.
+"""
+
+import base64
+import json
+import pytest
+from app.extensions import db
+from app.models import Project
+
+
+def cursor(value, row_id=1):
+    return base64.urlsafe_b64encode(json.dumps([value, row_id]).encode()).decode().rstrip('=')
+
+
+@pytest.fixture
+def projects(app, manager):
+    with app.app_context():
+        db.session.add_all([Project(name=f'Project {n}', manager_id=manager) for n in range(3)])
+        db.session.commit()
+
+
+@pytest.mark.parametrize('path, value, row_id, status', [
+    ('/projects?sort=name', 'Project 1', 1, 200),
+    ('/projects?sort=name', ['Project 1'], 1, 400),
+    ('/projects?sort=name', {'a': 1}, 1, 400),
+    ('/projects?sort=name', 7, 1, 400),
+    ('/projects?sort=name', None, 1, 400),
+    ('/projects?sort=name', 'Project 1', [1], 400),
+    ('/projects?sort=deadline', '2026-01-31', 1, 200),
+    ('/projects?sort=deadline', None, 1, 200),  # cursors from before NULLs sorted as a value
+    ('/projects?sort=deadline', [2026, 1, 31], 1, 400),
+    ('/api/v1/projects?limit=1', 1, 1, 200),
+    ('/api/v1/projects?limit=1', '1', 1, 400),
+    ('/api/v1/projects?limit=1', 2 ** 70, 1, 400),
+])
+def test_cursor_values_must_match_the_sort(logged_in, projects, path, value, row_id, status):
+    assert logged_in.get(f'{path}&cursor={cursor(value, row_id)}').status_code == status
+
+
+def test_malformed_cursor(logged_in, projects):
+    assert logged_in.get('/projects?cursor=not-a-cursor').status_code == 400
+    assert logged_in.get('/api/v1/projects?cursor=not-a-cursor').status_code == 400
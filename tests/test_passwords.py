@@ -0,0 +1,47 @@
+"""
+A saturated login hashing pool turns logins away with 503, while password
+writes by signed-in users hash outside it and still succeed.
+"""
+
+import pytest
+from app.extensions import db
+from app.models import User
+from app.passwords import HashPoolBusy
+
+
+@pytest.fixture
+def admin(app, client):
+    with app.app_context():
+        user = User(username='admin', role='admin')
+        user.set_password('admin-password')
+        db.session.add(user)
+        db.session.commit()
+    response = client.post('/login', data={'username': 'admin', 'password': 'admin-password'})
+    assert response.status_code == 302, response.status_code
+    return client
+
+
+@pytest.fixture
+def busy_pool(app, monkeypatch):
+    def run(fn, *args):
+        raise HashPoolBusy()
+    monkeypatch.setattr(app.extensions['passwords'].pool, 'run', run)
+
+
+def test_busy_pool_refuses_logins(app, client, admin, busy_pool):
+    response = app.test_client().post('/login', data={'username': 'admin', 'password': 'admin-password'})
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+
+
+def test_busy_pool_does_not_block_password_writes(app, admin, busy_pool):
+    response = admin.post('/register', data={'username': 'newcomer', 'password': 'secret-1',
+                                             'confirm_password': 'secret-1', 'role': 'member'})
+    assert response.status_code == 302, response.status_code
+    response = admin.post('/dashboard', data={'username': 'admin', 'role': 'admin', 'name': 'Admin',
+                                              'email': 'admin@example.com', 'password': 'changed-password',
+                                              'confirm_password': 'changed-password'})
+    assert response.status_code == 302, response.status_code
+
+    with app.app_context():
+        assert User.query.filter_by(username='newcomer').one().password_hash
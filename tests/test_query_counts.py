@@ -0,0 +1,104 @@
+"""
+The project list, the project detail page and the dashboard run a fixed
+number of SQL statements however many projects or tasks they show.
+"""
+
+from datetime import date, timedelta
+import pytest
+from sqlalchemy import insert
+from app.extensions import db
+from app.models import Project, Task, User
+
+
+def seed_projects(app, count, prefix):
+    """`count` projects, each with its own manager and two tasks."""
+    with app.app_context():
+        tenant_id = db.session.get(User, 1).tenant_id
+        db.session.execute(insert(User), [
+            {'username': f'{prefix}{i}', 'role': 'manager', 'password_hash': '-', 'tenant_id': tenant_id}
+            for i in range(count)
+        ])
+        manager_ids = [user_id for (user_id,) in
+                       db.session.query(User.id).filter(User.username.like(f'{prefix}%')).order_by(User.id)]
+        today = date.today()
+        db.session.execute(insert(Project), [
+            {'name': f'{prefix} project {i}', 'status': 'Active', 'manager_id': manager_ids[i],
+             'tenant_id': tenant_id, 'deadline': None if i % 5 == 0 else today + timedelta(days=i)}
+            for i in range(count)
+        ])
+        project_ids = [project_id for (project_id,) in
+                       db.session.query(Project.id).filter(Project.manager_id.in_(manager_ids))]
+        db.session.execute(insert(Task), [
+            {'title': f'Task {n}', 'project_id': project_id, 'status': status, 'tenant_id': tenant_id}
+            for project_id in project_ids for n, status in enumerate(('To Do', 'Completed'))
+        ])
+        db.session.commit()
+
+
+def page_queries(client, statements, path):
+    statements.clear()
+    response = client.get(path)
+    assert response.status_code == 200
+    return len(statements)
+
+
+@pytest.mark.parametrize('path', ['/projects', '/projects?sort=name', '/projects?status=Active&sort=-deadline'])
+def test_project_list_query_count_is_constant(app, logged_in, statements, path):
+    logged_in.get('/projects')  # the first request also loads the user into the identity cache
+    seed_projects(app, 3, 'few')
+    few = page_queries(logged_in, statements, path)
+    seed_projects(app, 60, 'many')
+    many = page_queries(logged_in, statements, path)
+    assert few == many
+
+
+def seed_tasks(app, project_id, count, prefix):
+    """
+    `count` tasks in the project, each with its own assignee (half of them
+    outside the member list the task form preloads), and `count` tasks of the
+    manager's, each in a project of its own, so that nothing is already in
+    the identity map when the templates walk the relationships.
+    """
+    with app.app_context():
+        manager = db.session.get(User, 1)
+        db.session.execute(insert(User), [
+            {'username': f'{prefix}{i}', 'role': ('member', 'manager')[i % 2], 'password_hash': '-',
+             'tenant_id': manager.tenant_id}
+            for i in range(count)
+        ])
+        user_ids = [user_id for (user_id,) in
+                    db.session.query(User.id).filter(User.username.like(f'{prefix}%')).order_by(User.id)]
+        db.session.execute(insert(Project), [
+            {'name': f'{prefix} project {i}', 'status': 'Active', 'manager_id': manager.id,
+             'tenant_id': manager.tenant_id}
+            for i in range(count)
+        ])
+        other_ids = [project_id for (project_id,) in
+                     db.session.query(Project.id).filter(Project.name.like(f'{prefix} project %'))]
+        due = date.today() + timedelta(days=1)
+        db.session.execute(insert(Task), [
+            {'title': f'{prefix} task {i}', 'project_id': project_id, 'assignee_id': user_ids[i],
+             'status': 'To Do', 'due_date': due, 'tenant_id': manager.tenant_id}
+            for i in range(count)
+        ] + [
+            {'title': f'{prefix} mine {i}', 'project_id': other_ids[i], 'assignee_id': manager.id,
+             'status': 'To Do', 'due_date': due, 'tenant_id': manager.tenant_id}
+            for i in range(count)
+        ])
+        db.session.commit()
+
+
+@pytest.mark.parametrize('page', ['detail', 'dashboard'])
+def test_task_pages_query_count_is_constant(app, logged_in, statements, page):
+    with app.app_context():
+        project = Project(name='Apollo', manager_id=1)
+        db.session.add(project)
+        db.session.commit()
+        path = f'/projects/{project.id}/detail' if page == 'detail' else '/dashboard'
+        project_id = project.id
+    logged_in.get(path)
+    seed_tasks(app, project_id, 5, 'few')
+    few = page_queries(logged_in, statements, path)
+    seed_tasks(app, project_id, 200, 'many')
+    many = page_queries(logged_in, statements, path)
+    assert few == many
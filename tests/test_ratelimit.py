@@ -0,0 +1,37 @@
+"""
+Concurrent hits on one key can't overshoot the limit: the check and the
+count are one atomic step, in memory and in the database store.
+"""
+
+import threading
+import time
+import pytest
+from app.ratelimit import RateLimiter
+
+LIMIT = 5
+THREADS = 24
+
+
+@pytest.mark.parametrize('store', ['memory', 'database'])
+def test_concurrent_hits_stay_within_the_limit(app, store):
+    app.config['RATE_LIMIT_STORE'] = store
+    limiter = RateLimiter(app)
+    start = threading.Barrier(THREADS)
+    allowed = []
+
+    def attempt():
+        with app.app_context():
+            start.wait()
+            allowed.append(limiter.retry_after('login:ip:203.0.113.7', LIMIT, 3600, hit=True) == 0)
+
+    threads = [threading.Thread(target=attempt) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert allowed.count(True) == LIMIT
+    with app.app_context():
+        # Refused attempts aren't counted: the window holds exactly the allowed ones
+        assert limiter.store.counts('login:ip:203.0.113.7', 3600, time.time())[0] == LIMIT
+        assert limiter.retry_after('login:ip:203.0.113.7', LIMIT, 3600) > 0
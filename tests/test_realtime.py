@@ -0,0 +1,55 @@
+"""
+Live-update streams are capped by the request threads they would hold, the
+database broker's event log is pruned even by processes without viewers,
+and a client reconnecting to a restarted worker is told to refresh.
+"""
+
+from datetime import datetime, timedelta, timezone
+import pytest
+from app import create_app
+from app.extensions import db
+from app.models import RealtimeEvent
+from app.realtime import Realtime, max_streams, stream
+from tests.conftest import TestConfig
+
+
+@pytest.mark.parametrize('threads, explicit, expected', [(16, None, 12), (2, None, 0), (16, 100, 100)])
+def test_stream_cap_follows_web_threads(threads, explicit, expected):
+    config = {'WEB_THREADS': threads, 'REALTIME_RESERVED_THREADS': 4, 'REALTIME_MAX_STREAMS': explicit}
+    assert max_streams(config) == expected
+
+
+def test_publish_prunes_old_events_without_viewers(tmp_path):
+    class Config(TestConfig):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'test.db')
+        REALTIME_BROKER = 'database'
+
+    app = create_app(Config)
+    with app.app_context():
+        db.create_all()
+        stale = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=app.config['REALTIME_RETENTION'] + 60)
+        db.session.add(RealtimeEvent(channel='project:1', payload={'type': 'refresh'}, created_at=stale))
+        db.session.commit()
+
+        app.extensions['realtime'].broker.publish([('project:1', {'type': 'refresh'})])
+
+        assert [event.created_at > stale for event in RealtimeEvent.query] == [True]
+        db.engine.dispose()
+
+
+def test_reconnect_after_restart_refreshes_and_resumes(app):
+    app.config['REALTIME_KEEPALIVE'] = 0.05
+    before = Realtime(app)
+    before.subscribe(['project:1'])
+    before.publish([('project:1', {'type': 'task.created'})] * 3)
+    (*_, (last_id, _)), _ = before.broker.replay(['project:1'], 0)
+
+    # The worker restarts; the browser reconnects with the id it saw last
+    app.extensions['realtime'] = after = Realtime(app)
+    with app.test_request_context():
+        chunks = iter(stream(['project:1'], last_id).response)
+        assert next(chunks).startswith('retry:')
+        assert 'event: refresh' in next(chunks)
+        after.publish([('project:1', {'type': 'task.updated'})])
+        assert 'event: task.updated' in next(chunks)
+        chunks.close()
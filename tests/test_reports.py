@@ -0,0 +1,87 @@
+"""
+Reports missing from the cache are built by a background job, never on the
+request thread: pages poll the job, JSON clients get its id, and once built
+the report is served from the cache.
+"""
+
+import pytest
+from flask import g
+from app import jobs, reports
+from app.cache import MemoryCache
+from app.extensions import cache, db
+from app.models import Job, Project, Task
+
+JSON = {'Accept': 'application/json'}
+
+
+@pytest.fixture
+def project_id(app, manager):
+    with app.app_context():
+        project = Project(name='Apollo', manager_id=manager)
+        db.session.add(project)
+        db.session.flush()
+        db.session.add_all([Task(title='Launch', project_id=project.id, status='Completed'),
+                            Task(title='Land', project_id=project.id)])
+        db.session.commit()
+        return project.id
+
+
+@pytest.fixture
+def no_inline_builds(monkeypatch):
+    """Fail any report built outside a job."""
+    build = reports.build_report
+
+    def build_in_job_only(*args, **kwargs):
+        assert g.get('job_id') is not None, 'report built on the request thread'
+        return build(*args, **kwargs)
+    monkeypatch.setattr(reports, 'build_report', build_in_job_only)
+
+
+def run_jobs(app):
+    with app.app_context():
+        while (job_id := jobs.claim_next()) is not None:
+            assert jobs.execute(job_id) == 'succeeded'
+
+
+def test_page_polls_the_build_job(app, logged_in, project_id, no_inline_builds):
+    response = logged_in.get('/reports')
+    assert response.status_code == 302
+    pending_url = response.headers['Location']
+    assert 'job=' in pending_url
+    # Asking again while the build is queued doesn't queue another
+    assert logged_in.get('/reports').headers['Location'] == pending_url
+
+    response = logged_in.get(pending_url)
+    assert response.status_code == 202
+    assert response.headers['Refresh'] == '2'
+
+    run_jobs(app)
+    response = logged_in.get(pending_url)
+    assert response.status_code == 200
+    assert b'Apollo' in response.data
+    with app.app_context():
+        assert Job.query.count() == 1
+
+
+def test_json_clients_get_the_job_to_poll(app, logged_in, project_id, no_inline_builds):
+    response = logged_in.get(f'/reports/export.json?project_id={project_id}', headers=JSON)
+    assert response.status_code == 202
+    status_url = response.headers['Location']
+    assert response.get_json()['status'] == 'queued'
+
+    run_jobs(app)
+    report = logged_in.get(status_url).get_json()['result']
+    assert report['project_id'] == project_id
+    assert report['totals']['tasks'] == 2
+
+
+def test_built_reports_are_served_from_the_cache(app, logged_in, project_id, no_inline_builds, monkeypatch):
+    monkeypatch.setattr(cache, 'backend', MemoryCache())
+    logged_in.get('/reports/export.json', headers=JSON)
+    run_jobs(app)
+
+    response = logged_in.get('/reports/export.json')
+    assert response.status_code == 200
+    assert response.get_json()['totals']['tasks'] == 2
+    with app.app_context():
+        assert Job.query.count() == 1
@@ -0,0 +1,24 @@
+"""
+Startup stays lean, checked on the import graph rather than on timings
+(benchmarks/startup_benchmark.py measures those): `import app` loads no
+views or models, and serving the first request loads none of the heavy
+modules kept for the features that use them.
+"""
+
+from benchmarks.startup_benchmark import APP_INTERNALS, DEFERRED_IMPORTS, environment, loaded_modules
+
+FIRST_REQUEST = """
+from app import create_app
+create_app().test_client().get('/home')
+"""
+
+
+def test_import_loads_only_the_extensions():
+    loaded = loaded_modules('import app', environment())
+    assert loaded.isdisjoint(APP_INTERNALS), sorted(loaded & set(APP_INTERNALS))
+
+
+def test_first_request_defers_heavy_imports():
+    loaded = loaded_modules(FIRST_REQUEST, environment())
+    assert 'app.reports' in loaded
+    assert loaded.isdisjoint(DEFERRED_IMPORTS), sorted(loaded & set(DEFERRED_IMPORTS))
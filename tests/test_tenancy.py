@@ -0,0 +1,59 @@
+"""
+Jobs and process-wide figures don't cross tenants: an admin sees the jobs
+of their own tenant's users, and only operators (admins of the operator
+tenant) see /metrics and /cache/stats.
+"""
+
+import pytest
+from app import jobs
+from app.extensions import db
+from app.models import Tenant, User
+
+
+def login(app, username, password):
+    client = app.test_client()
+    response = client.post('/login', data={'username': username, 'password': password})
+    assert response.status_code == 302, response.status_code
+    return client
+
+
+@pytest.fixture
+def other_admin(app):
+    """A client logged in as the admin of a second tenant."""
+    with app.app_context():
+        tenant = Tenant(name='Other')
+        db.session.add(tenant)
+        db.session.flush()
+        admin = User(username='other-admin', role='admin', tenant_id=tenant.id)
+        admin.set_password('other-password')
+        db.session.add(admin)
+        db.session.commit()
+    return login(app, 'other-admin', 'other-password')
+
+
+@pytest.fixture
+def admin(app):
+    with app.app_context():
+        user = User(username='admin', role='admin')
+        user.set_password('admin-password')
+        db.session.add(user)
+        db.session.commit()
+    return login(app, 'admin', 'admin-password')
+
+
+def test_job_status_stays_in_its_tenant(app, logged_in, manager, admin, other_admin):
+    response = logged_in.get('/reports/export.json', headers={'Accept': 'application/json'})
+    assert response.status_code == 202
+    status_url = response.headers['Location']
+    with app.app_context():
+        assert jobs.execute(jobs.claim_next()) == 'succeeded'
+
+    assert logged_in.get(status_url).get_json()['result']['totals'] is not None
+    assert admin.get(status_url).status_code == 200
+    assert other_admin.get(status_url).status_code == 404
+
+
+def test_process_wide_figures_are_for_operators(app, admin, other_admin):
+    for path in ('/metrics', '/cache/stats'):
+        assert admin.get(path).status_code == 200
+        assert other_admin.get(path).status_code == 403
@@ -0,0 +1,17 @@
+"""
+WSGI entry point for multi-worker servers.
+- gunicorn: gunicorn -c gunicorn.conf.py wsgi:app
+- waitress: python wsgi.py (threads from WEB_THREADS, port from PORT)
+WEB_THREADS also sizes the live-update stream cap (see app/realtime.py).
+Set APP_ENV=production and DATABASE_URL to pick the production config.
+"""
+
+import os
+from app import create_app
+
+app = create_app()
+
+if __name__ == '__main__':
+    from waitress import serve
+    serve(app, host=os.environ.get('HOST', '0.0.0.0'), port=int(os.environ.get('PORT', 8000)),
+          threads=app.config['WEB_THREADS'])